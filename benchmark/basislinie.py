@@ -0,0 +1,44 @@
+"""Gemeinsame Optionen der Messskripte zum Speichern von Messungen als Basislinie und zum Vergleich mit ihr"""
+
+import argparse
+import json
+from pathlib import Path
+
+
+def ergaenze_optionen(parser: argparse.ArgumentParser, toleranz: float = 0.25):
+    """
+    Ergänze die Optionen --speichere, --basislinie und --toleranz
+
+        :param parser: Argumentenparser des Messskripts
+        :param toleranz: voreingestellter erlaubter relativer Zuwachs der Laufzeit
+    """
+    parser.add_argument(
+        "--speichere", type=Path, help="schreibe die Messungen als Basislinie"
+    )
+    parser.add_argument(
+        "--basislinie", type=Path, help="vergleiche mit einer gespeicherten Basislinie"
+    )
+    parser.add_argument("--toleranz", type=float, default=toleranz)
+
+
+def lade_basislinie(datei: Path | None) -> dict:
+    """
+    Lade die Messungen einer gespeicherten Basislinie
+
+        :param datei: Datei aus --basislinie oder None
+        :return: Schlüssel → Messung, leer ohne Basislinie
+    """
+    if not datei:
+        return {}
+    return json.loads(datei.read_text(encoding="utf-8"))["messungen"]
+
+
+def speichere_basislinie(datei: Path | None, **inhalt):
+    """
+    Schreibe Umgebung, Parameter und Messungen als Basislinie
+
+        :param datei: Datei aus --speichere oder None, dann wird nichts geschrieben
+        :param inhalt: Einträge der Basislinie, darunter messungen
+    """
+    if datei:
+        datei.write_text(json.dumps(inhalt, indent=1), encoding="utf-8")
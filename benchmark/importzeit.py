@@ -0,0 +1,161 @@
+"""Misst die Startzeit des Sitzverteilungsrechners in frischen Interpretern. Je Fall werden der Median der Laufzeit und
+die größten Importe (python -X importtime) ausgegeben. Leichte Aufrufe dürfen weder pandas noch den Download laden.
+
+    python benchmark/importzeit.py [--faelle hilfe kompakt voll] [--wiederholungen N]
+                                   [--speichere basislinie.json] [--basislinie basislinie.json] [--toleranz 0.25]
+
+Das Skript endet mit Rückgabewert 1, sobald ein Fall ein verbotenes Modul lädt oder mit --basislinie die Toleranz
+überschreitet.
+"""
+
+import argparse
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from basislinie import ergaenze_optionen, lade_basislinie, speichere_basislinie
+
+WURZEL = Path(__file__).resolve().parent.parent
+SKRIPT = "sitzverteilungsrechner.py"
+
+# Fall → Argumente des Rechners und Module, die dabei nicht geladen werden dürfen
+FAELLE = {
+    "hilfe": (["--help"], ["pandas", "requests", "sitzverteilung.download"]),
+    "kompakt": (
+        ["-b", "vb", "9", "--kompakt", "-l", "zufall:1"],
+        ["pandas", "requests", "sitzverteilung.download"],
+    ),
+    "voll": (["-b", "vb", "9", "-l", "zufall:1"], ["requests"]),
+}
+
+
+def starte(argumente: list, importzeit: bool = False) -> subprocess.CompletedProcess:
+    """
+    Führe den Rechner in einem frischen Interpreter aus
+
+        :param argumente: Argumente des Rechners
+        :param importzeit: mit -X importtime, das Protokoll steht dann in stderr
+        :return: beendeter Prozess
+    """
+    schalter = ["-X", "importtime"] if importzeit else []
+    prozess = subprocess.run(
+        [sys.executable, *schalter, SKRIPT, *argumente],
+        cwd=WURZEL,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if prozess.returncode != 0:
+        raise RuntimeError(
+            f"{SKRIPT} {' '.join(argumente)} schlug fehl:\n{prozess.stderr}"
+        )
+    return prozess
+
+
+def miss(argumente: list, wiederholungen: int) -> float:
+    """
+    Median der Laufzeit über mehrere Starts
+
+        :param argumente: Argumente des Rechners
+        :param wiederholungen: Anzahl der Starts
+        :return: Zeit in Sekunden
+    """
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        starte(argumente)
+        zeiten.append(time.perf_counter() - start)
+    return statistics.median(zeiten)
+
+
+def importe(argumente: list) -> dict:
+    """
+    Geladene Module samt kumulierter Importzeit aus dem Protokoll von -X importtime
+
+        :param argumente: Argumente des Rechners
+        :return: Modul → kumulierte Importzeit in Sekunden, nur Importe der obersten Ebene sind nicht verschachtelt
+    """
+    geladen = {}
+    for zeile in starte(argumente, importzeit=True).stderr.splitlines():
+        if not zeile.startswith("import time:") or "|" not in zeile:
+            continue
+        _, kumuliert, name = zeile[len("import time:") :].split("|")
+        if kumuliert.strip().isdigit():
+            geladen[name.strip()] = int(kumuliert) / 1e6
+    return geladen
+
+
+def verbotene(geladen: dict, verboten: list) -> list:
+    """
+    Verbotene Module oder Pakete, von denen mindestens ein Modul geladen wurde
+
+        :param geladen: geladene Module
+        :param verboten: Namen von Modulen oder Paketen
+        :return: geladene verbotene Module oder Pakete
+    """
+    return [
+        paket
+        for paket in verboten
+        if any(name == paket or name.startswith(f"{paket}.") for name in geladen)
+    ]
+
+
+def umgebung() -> dict:
+    """Angaben zur Umgebung, in der gemessen wurde"""
+    return {"python": platform.python_version(), "plattform": platform.platform()}
+
+
+def main():
+    """Miss alle gewählten Fälle und gib eine Tabelle aus"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--faelle", nargs="+", choices=FAELLE, default=list(FAELLE))
+    parser.add_argument("--wiederholungen", type=int, default=7)
+    parser.add_argument(
+        "--groesste", type=int, default=3, help="Anzahl der gezeigten Importe je Fall"
+    )
+    ergaenze_optionen(parser)
+    args = parser.parse_args()
+    basislinie = lade_basislinie(args.basislinie)
+
+    messungen = {}
+    fehler = []
+    print(f"{'Fall':<10}{'Zeit':>10}{'Faktor':>9}  größte Importe")
+    for fall in args.faelle:
+        argumente, verboten = FAELLE[fall]
+        messungen[fall] = {"zeit": miss(argumente, args.wiederholungen)}
+        geladen = importe(argumente)
+        oberste = sorted(geladen.items(), key=lambda eintrag: -eintrag[1])[
+            : args.groesste
+        ]
+        zeile = f"{fall:<10}{1000 * messungen[fall]['zeit']:>8.0f}ms"
+        if fall in basislinie:
+            faktor = messungen[fall]["zeit"] / basislinie[fall]["zeit"]
+            zeile += f"{faktor:>8.2f}x"
+            if faktor > 1 + args.toleranz:
+                fehler.append(f"{fall}: {faktor:.2f}x gegenüber {args.basislinie}")
+        else:
+            zeile += " " * 9
+        zeile += "  " + ", ".join(
+            f"{name} {1000 * dauer:.0f} ms" for name, dauer in oberste
+        )
+        print(zeile, flush=True)
+        geladen_verboten = verbotene(geladen, verboten)
+        if geladen_verboten:
+            fehler.append(f"{fall} lädt {', '.join(geladen_verboten)}")
+
+    speichere_basislinie(
+        args.speichere,
+        umgebung=umgebung(),
+        wiederholungen=args.wiederholungen,
+        messungen=messungen,
+    )
+    if fehler:
+        print("\n".join(fehler))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""Reproduzierbare Messreihe für die Verteilungsverfahren, die Pipeline und die Umwandlung der Rohdaten. Synthetische
+Wahlen mit P Parteien, L Ländern und W Wahlkreisen werden in ein temporäres Verzeichnis geschrieben, samt Ergebnis- und
+Kandidaturen-CSV im Format des Bundeswahlleiters. Je Größe und Fall werden die beste Laufzeit und der Spitzenbedarf an
+Speicher (tracemalloc) gemessen und optional mit einer gespeicherten Basislinie verglichen.
+
+    python benchmark/messreihe.py [--groessen klein mittel gross] [--faelle ...] [--wiederholungen N]
+                                  [--speichere basislinie.json] [--basislinie basislinie.json] [--toleranz 0.25]
+
+Mit --basislinie endet das Skript mit Rückgabewert 1, sobald ein Fall die Toleranz überschreitet.
+"""
+
+import argparse
+import contextlib
+import io
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from basislinie import ergaenze_optionen, lade_basislinie, speichere_basislinie
+
+from sitzverteilung import download
+from sitzverteilung.hilfsmittel import dump_yaml, load_yaml
+from sitzverteilung.rechner.divisor import sainte_lague_divisor
+from sitzverteilung.rechner.losverfahren import Losverfahren
+from sitzverteilung.rechner.sainte_lague import sainte_lague_rangzahl
+from sitzverteilung.sitzverteilung import (
+    Losentscheide,
+    bestimme_mindestsitze,
+    ermittle_zulassung,
+    lade_eingaben,
+    setze_einstellungen,
+    sitzverteilung,
+    verteile_auf_laender,
+)
+
+# Parteien, Länder, Wahlkreise
+GROESSEN = {
+    "klein": (8, 4, 40),
+    "mittel": (30, 16, 299),
+    "gross": (80, 40, 1500),
+}
+FAELLE = [
+    "sainte_lague_divisor",
+    "sainte_lague_rangzahl",
+    "ermittle_zulassung",
+    "bestimme_mindestsitze",
+    "sitzverteilung",
+    "download",
+]
+ERGEBNISKOPF = [
+    "Wahlart",
+    "Wahltag",
+    "Gebietsart",
+    "Gebietsnummer",
+    "Gebietsname",
+    "UegGebietsart",
+    "UegGebietsnummer",
+    "Gruppenart",
+    "Gruppenname",
+    "Gruppenreihenfolge",
+    "Stimme",
+    "Anzahl",
+]
+KANDIDATENKOPF = [
+    "Gebietsart",
+    "Gebietsnummer",
+    "Gebietsname",
+    "Gruppenname",
+    "Nachname",
+    "Vornamen",
+]
+BUND = 99
+
+
+def erzeuge_wahl(parteien: int, laender: int, wahlkreise: int, saat: int) -> dict:
+    """
+    Synthetische Wahl: Parteistärken fallen nach dem Rang ab, sodass kleine Parteien an der Hürde scheitern. Die
+    Anteile streuen je Land und je Wahlkreis, die Erststimmen streuen stärker als die Zweitstimmen.
+
+        :param parteien: Anzahl der Parteien
+        :param laender: Anzahl der Länder
+        :param wahlkreise: Anzahl der Wahlkreise, mindestens einer je Land
+        :param saat: Startwert des Zufallsgenerators
+        :return: Inhalte von Länder.yaml, Zweitstimme.yaml, Erststimme.yaml und Einstellungen.yaml
+    """
+    zufall = np.random.default_rng(saat)
+    namen = [f"Partei {nummer}" for nummer in range(1, parteien + 1)]
+    gewicht = 1 / np.arange(1, parteien + 1) ** 1.2
+    land_je_wahlkreis = np.sort(
+        np.concatenate(
+            (np.arange(laender), zufall.integers(0, laender, wahlkreise - laender))
+        )
+    )
+
+    bevoelkerung, zweitstimmen, erststimmen = {}, {}, {}
+    for land in range(laender):
+        name = f"Land {land + 1}"
+        zweit, erststimmen[name] = erzeuge_land(
+            zufall,
+            namen,
+            zufall.dirichlet(gewicht / gewicht.sum() * 300),
+            np.flatnonzero(land_je_wahlkreis == land),
+        )
+        zweitstimmen[name] = dict(zip(namen, zweit.tolist()))
+        bevoelkerung[name] = int(zweit.sum() * 1.4)
+
+    return {
+        "Länder.yaml": bevoelkerung,
+        "Zweitstimme.yaml": zweitstimmen,
+        "Erststimme.yaml": erststimmen,
+        "Einstellungen.yaml": {
+            "Sitze": 2 * wahlkreise,
+            "Hürde": {"Prozent": 5, "Direkt": 3, "Ausnahmen": []},
+            "Mindestsitze": "Mittelwert",
+            "Überhang": 3,
+        },
+    }
+
+
+def erzeuge_land(zufall, namen: list, anteil: np.ndarray, wahlkreise: np.ndarray):
+    """
+    Stimmen der Wahlkreise eines Landes mit 100 000 bis 200 000 Wählern je Wahlkreis
+
+        :param zufall: Zufallsgenerator
+        :param namen: Namen der Parteien
+        :param anteil: erwartete Anteile der Parteien im Land
+        :param wahlkreise: Nummern der Wahlkreise, beginnend bei 0
+        :return: Zweitstimmen je Partei im Land, Erststimmen je Wahlkreis und Partei
+    """
+    zweit = np.zeros(len(namen), dtype="int64")
+    erststimmen = {}
+    for wahlkreis in wahlkreise:
+        waehler = int(zufall.integers(100_000, 200_000))
+        zweit += zufall.multinomial(waehler, zufall.dirichlet(anteil * 500 + 1e-3))
+        erst = zufall.multinomial(waehler, zufall.dirichlet(anteil * 50 + 1e-3))
+        erststimmen[f"Wahlkreis {wahlkreis + 1}"] = dict(zip(namen, erst.tolist()))
+    return zweit, erststimmen
+
+
+def schreibe_wahl(wahl: dict, ordner: Path):
+    """
+    Schreibe die Eingabedateien einer synthetischen Wahl
+
+        :param wahl: Inhalte der Dateien, siehe erzeuge_wahl
+        :param ordner: Zielverzeichnis
+    """
+    ordner.mkdir(parents=True, exist_ok=True)
+    for datei, inhalt in wahl.items():
+        dump_yaml(inhalt.items(), ordner / datei)
+
+
+def schreibe_rohdaten(wahl: dict, ordner: Path, listenplaetze: int = 10):
+    """
+    Schreibe die Wahl als Ergebnis- (kerg2) und Kandidaturen-CSV im Format des Bundeswahlleiters
+
+        :param wahl: Inhalte der Dateien, siehe erzeuge_wahl
+        :param ordner: Zielverzeichnis, erhält den Unterordner daten
+        :param listenplaetze: Kandidaten je Landesliste
+        :return: Pfade der Ergebnis- und Kandidaturendatei
+    """
+    daten = ordner / "daten"
+    daten.mkdir(parents=True, exist_ok=True)
+    kerg = daten / "kerg2_synthetisch.csv"
+    with open(kerg, "w", encoding="utf-8") as datei:
+        datei.write("# synthetische Wahl\n" * 9)
+        pd.DataFrame(ergebniszeilen(wahl), columns=ERGEBNISKOPF).to_csv(
+            datei, sep=";", index=False
+        )
+    kandidaten = daten / "kandidaturen_synthetisch.csv"
+    with open(kandidaten, "w", encoding="utf-8") as datei:
+        datei.write("# synthetische Kandidaturen\n" * 8)
+        pd.DataFrame(
+            kandidaturzeilen(wahl, listenplaetze), columns=KANDIDATENKOPF
+        ).to_csv(datei, sep=";", index=False)
+    dump_yaml(wahl["Länder.yaml"].items(), ordner / "Länder.yaml")
+    return kerg, kandidaten
+
+
+def ergebniszeilen(wahl: dict):
+    """
+    Zeilen der Ergebnisdatei: Erst- und Zweitstimmen je Land und je Wahlkreis
+
+        :param wahl: Inhalte der Dateien, siehe erzeuge_wahl
+        :return: Generator über Zeilen in der Reihenfolge von ERGEBNISKOPF
+    """
+    wahlkreisnummer = 0
+    for landesnummer, (land, wahlkreise) in enumerate(
+        wahl["Erststimme.yaml"].items(), start=1
+    ):
+        gebiet = ["Land", landesnummer, land, "Bund", BUND]
+        for stimme, tabelle in (
+            (1, summiere(wahlkreise)),
+            (2, wahl["Zweitstimme.yaml"][land]),
+        ):
+            for partei, anzahl in tabelle.items():
+                yield ["BT", "01.01.2000", *gebiet, "Partei", partei, 0, stimme, anzahl]
+        for wahlkreis, stimmen in wahlkreise.items():
+            wahlkreisnummer += 1
+            gebiet = ["Wahlkreis", wahlkreisnummer, wahlkreis, "Land", landesnummer]
+            for partei, anzahl in stimmen.items():
+                for stimme in (1, 2):
+                    yield [
+                        "BT",
+                        "01.01.2000",
+                        *gebiet,
+                        "Partei",
+                        partei,
+                        0,
+                        stimme,
+                        anzahl,
+                    ]
+
+
+def kandidaturzeilen(wahl: dict, listenplaetze: int):
+    """
+    Zeilen der Kandidaturendatei: Landeslisten und je Wahlkreis ein Direktkandidat jeder Partei
+
+        :param wahl: Inhalte der Dateien, siehe erzeuge_wahl
+        :param listenplaetze: Kandidaten je Landesliste
+        :return: Generator über Zeilen in der Reihenfolge von KANDIDATENKOPF
+    """
+    wahlkreisnummer = 0
+    for landesnummer, (land, wahlkreise) in enumerate(
+        wahl["Erststimme.yaml"].items(), start=1
+    ):
+        for partei in wahl["Zweitstimme.yaml"][land]:
+            for platz in range(1, listenplaetze + 1):
+                yield [
+                    "Land",
+                    landesnummer,
+                    land,
+                    partei,
+                    f"{partei} {land}",
+                    f"Platz {platz}",
+                ]
+        for wahlkreis, stimmen in wahlkreise.items():
+            wahlkreisnummer += 1
+            for partei in stimmen:
+                yield [
+                    "Wahlkreis",
+                    wahlkreisnummer,
+                    wahlkreis,
+                    partei,
+                    partei,
+                    wahlkreis,
+                ]
+
+
+def summiere(wahlkreise: dict) -> dict:
+    """Summe der Erststimmen eines Landes je Partei"""
+    return pd.DataFrame(wahlkreise).sum(axis=1).to_dict()
+
+
+def wandle_um(kerg: Path, kandidaten: Path):
+    """Die Umwandlung aus download.download ohne Herunterladen, geschrieben neben den Ordner daten"""
+    ordner = kerg.parent.parent
+    laender_yaml = load_yaml(ordner / "Länder.yaml")
+    alle_ergebnisse = download.lies_ergebnisse(kerg)
+    download.schreibe_zweitstimmen(alle_ergebnisse, laender_yaml, ordner)
+    download.schreibe_erststimme(alle_ergebnisse, laender_yaml, ordner)
+    kandidaturen = download.lies_kandidaten(kandidaten)
+    download.schreibe_direktkandidaten(kandidaturen, ordner)
+    download.schreibe_listen(kandidaturen, ordner)
+
+
+def bereite_faelle_vor(ordner: Path, rohdaten: tuple, saat: int) -> dict:
+    """
+    Bereite die Eingaben aller Fälle vor, sodass nur der jeweilige Aufruf gemessen wird
+
+        :param ordner: Verzeichnis mit den Eingabedateien
+        :param rohdaten: Ergebnis- und Kandidaturendatei in einem eigenen Verzeichnis, siehe schreibe_rohdaten
+        :param saat: Startwert des Losverfahrens
+        :return: Fall → Funktion ohne Argumente
+    """
+    einstellungen = setze_einstellungen(ordner)
+    laender, erststimmen, zweitstimmen = lade_eingaben(ordner)
+    losverfahren = Losverfahren("zufall", saat)
+    direktmandate, _, zugelassen = ermittle_zulassung(
+        einstellungen["hürde"], erststimmen, zweitstimmen, Losentscheide(losverfahren)
+    )
+    landesverteilung = verteile_auf_laender(
+        laender, einstellungen["sitze_geplant"], Losentscheide(losverfahren)
+    )
+    bund = pd.DataFrame({"Stimmen": zweitstimmen.sum(axis=1)})
+    return {
+        "sainte_lague_divisor": partial(
+            sainte_lague_divisor, bund, einstellungen["sitze_geplant"]
+        ),
+        "sainte_lague_rangzahl": partial(
+            sainte_lague_rangzahl, bund, einstellungen["sitze_geplant"]
+        ),
+        "ermittle_zulassung": lambda: ermittle_zulassung(
+            einstellungen["hürde"],
+            erststimmen,
+            zweitstimmen,
+            Losentscheide(losverfahren),
+        ),
+        "bestimme_mindestsitze": lambda: bestimme_mindestsitze(
+            direktmandate,
+            landesverteilung,
+            einstellungen["mindestsitze_methode"],
+            zugelassen,
+            Losentscheide(losverfahren),
+        ),
+        "sitzverteilung": partial(sitzverteilung, ordner, losverfahren=losverfahren),
+        "download": partial(wandle_um, *rohdaten),
+    }
+
+
+def miss(funktion, wiederholungen: int) -> dict:
+    """
+    Beste Laufzeit je Aufruf über mehrere Wiederholungen und Spitzenbedarf an Speicher in einem eigenen Lauf, da
+    tracemalloc die Laufzeit verfälscht. Ausgaben der Funktion, etwa zu Losentscheiden, werden verworfen.
+
+        :param funktion: Funktion ohne Argumente
+        :param wiederholungen: Anzahl der Wiederholungen
+        :return: Zeit in Sekunden und Spitze in Bytes
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        # kurze Fälle laufen je Wiederholung mehrfach, bis mindestens 0.2 s vergangen sind
+        messung = timeit.Timer(funktion)
+        anzahl, _ = messung.autorange()
+        zeiten = [
+            zeit / anzahl
+            for zeit in messung.repeat(repeat=wiederholungen, number=anzahl)
+        ]
+        tracemalloc.start()
+        try:
+            funktion()
+            _, spitze = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {"zeit": min(zeiten), "spitze": spitze}
+
+
+def vergleiche(
+    messungen: dict, basislinie: dict, toleranz: float, toleranz_speicher: float
+) -> dict:
+    """
+    Verhältnis jeder Messung zur Basislinie
+
+        :param messungen: Schlüssel → Zeit und Spitze
+        :param basislinie: gespeicherte Messungen gleicher Form
+        :param toleranz: erlaubter relativer Zuwachs der Laufzeit
+        :param toleranz_speicher: erlaubter relativer Zuwachs des Spitzenbedarfs
+        :return: Schlüssel → (Faktor Zeit, Faktor Spitze, Regression)
+    """
+    ergebnis = {}
+    for schluessel, messung in messungen.items():
+        alt = basislinie.get(schluessel)
+        if alt is None:
+            continue
+        faktor_zeit = messung["zeit"] / alt["zeit"] if alt["zeit"] else 1.0
+        faktor_spitze = messung["spitze"] / alt["spitze"] if alt["spitze"] else 1.0
+        ergebnis[schluessel] = (
+            faktor_zeit,
+            faktor_spitze,
+            faktor_zeit > 1 + toleranz or faktor_spitze > 1 + toleranz_speicher,
+        )
+    return ergebnis
+
+
+def umgebung() -> dict:
+    """Angaben zur Umgebung, in der gemessen wurde"""
+    return {
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def main():
+    """Miss alle gewählten Fälle für alle gewählten Größen und gib eine Tabelle aus"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--groessen", nargs="+", choices=GROESSEN, default=["klein", "mittel"]
+    )
+    parser.add_argument("--faelle", nargs="+", choices=FAELLE, default=FAELLE)
+    parser.add_argument("--wiederholungen", type=int, default=5)
+    parser.add_argument("--saat", type=int, default=2021)
+    ergaenze_optionen(parser)
+    parser.add_argument("--toleranz-speicher", type=float, default=0.10)
+    args = parser.parse_args()
+    basislinie = lade_basislinie(args.basislinie)
+
+    messungen = {}
+    print(
+        f"{'Größe':<8}{'Fall':<24}{'Zeit':>11}{'Spitze':>12}{'Faktor Zeit':>13}{'Faktor Speicher':>17}"
+    )
+    with tempfile.TemporaryDirectory() as temporaer:
+        for groesse in args.groessen:
+            ordner = Path(temporaer) / groesse
+            wahl = erzeuge_wahl(*GROESSEN[groesse], args.saat)
+            schreibe_wahl(wahl, ordner)
+            faelle = bereite_faelle_vor(
+                ordner, schreibe_rohdaten(wahl, ordner / "roh"), args.saat
+            )
+            for fall in args.faelle:
+                schluessel = f"{groesse}/{fall}"
+                messungen[schluessel] = miss(faelle[fall], args.wiederholungen)
+                zeile = (
+                    f"{groesse:<8}{fall:<24}{messungen[schluessel]['zeit']:>10.4f}s"
+                    f"{messungen[schluessel]['spitze'] / 2 ** 20:>9.2f} MB"
+                )
+                vergleich = vergleiche(
+                    {schluessel: messungen[schluessel]},
+                    basislinie,
+                    args.toleranz,
+                    args.toleranz_speicher,
+                ).get(schluessel)
+                if vergleich:
+                    zeile += f"{vergleich[0]:>12.2f}x{vergleich[1]:>16.2f}x{'  REGRESSION' if vergleich[2] else ''}"
+                print(zeile, flush=True)
+
+    speichere_basislinie(
+        args.speichere,
+        umgebung=umgebung(),
+        groessen={groesse: GROESSEN[groesse] for groesse in args.groessen},
+        saat=args.saat,
+        wiederholungen=args.wiederholungen,
+        messungen=messungen,
+    )
+    regressionen = [
+        schluessel
+        for schluessel, (_, _, regression) in vergleiche(
+            messungen, basislinie, args.toleranz, args.toleranz_speicher
+        ).items()
+        if regression
+    ]
+    if regressionen:
+        print(f"Regression gegenüber {args.basislinie}: {', '.join(regressionen)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Belastungstest für nebenläufige Sitzverteilungen: Viele zufällige Verteilungen, darunter solche mit Losentscheid,
+werden gleichzeitig in einem Threadpool berechnet und mit der seriellen Berechnung verglichen. Jeder Thread setzt
+dabei einen eigenen decimal-Kontext, der nach jeder Verteilung unverändert sein muss.
+
+    python benchmark/nebenlaeufigkeit.py [--auftraege N] [--arbeiter N] [--methode divisor ganzzahl rangzahl]
+"""
+
+import argparse
+import decimal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from sitzverteilung.rechner.sainte_lague import SainteLague, verteile_nebenlaeufig
+from sitzverteilung.rechner.verteilungsspeicher import Verteilungsspeicher
+
+KONTEXT = decimal.Context(prec=6, rounding=decimal.ROUND_FLOOR)
+
+
+def erzeuge_auftraege(anzahl: int, saat: int) -> list[tuple[pd.DataFrame, int]]:
+    """
+    Zufällige Stimmenverteilungen mit 2 bis 12 Parteien; kleine Stimmenzahlen erzeugen häufig Gleichstände
+
+        :param anzahl: Anzahl der Aufträge
+        :param saat: Startwert des Zufallsgenerators
+        :return: Paare aus Tabelle und Sitzzahl
+    """
+    zufall = np.random.default_rng(saat)
+    auftraege = []
+    for _ in range(anzahl):
+        parteien = int(zufall.integers(2, 13))
+        groesse = 10 ** int(zufall.integers(2, 8))
+        stimmen = zufall.integers(1, groesse, parteien)
+        auftraege.append(
+            (
+                pd.DataFrame(
+                    {"Stimmen": stimmen},
+                    index=[f"Partei {i}" for i in range(parteien)],
+                ),
+                int(zufall.integers(1, 120)),
+            )
+        )
+    return auftraege
+
+
+def mit_eigenem_kontext(rechner, auftrag):
+    """Berechne eine Verteilung unter dem Kontext KONTEXT und prüfe, dass er danach unverändert ist"""
+    decimal.setcontext(KONTEXT.copy())
+    ergebnis = rechner(*auftrag)
+    kontext = decimal.getcontext()
+    assert (kontext.prec, kontext.rounding) == (KONTEXT.prec, KONTEXT.rounding)
+    return ergebnis
+
+
+def gleich(erwartet, ergebnisse) -> bool:
+    """Vergleiche Sitze, Zitierdivisoren und Lose zweier Ergebnislisten"""
+    return all(
+        tabelle.equals(vergleich)
+        and tabelle.attrs == vergleich.attrs
+        and lose == lose_vergleich
+        for (tabelle, lose), (vergleich, lose_vergleich) in zip(erwartet, ergebnisse)
+    )
+
+
+def main():
+    """Berechne alle Aufträge seriell und nebenläufig je Methode und gib Laufzeiten aus"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--auftraege", type=int, default=2000)
+    parser.add_argument("--arbeiter", type=int, default=8)
+    parser.add_argument("--saat", type=int, default=0)
+    parser.add_argument(
+        "--methode", nargs="+", default=["divisor", "ganzzahl", "rangzahl"]
+    )
+    args = parser.parse_args()
+
+    auftraege = erzeuge_auftraege(args.auftraege, args.saat)
+    print(f"{'Methode':<10}{'seriell':>10}{'Threads':>10}{'Speicher':>10}")
+    for methode in args.methode:
+        rechner = SainteLague(methode, speicher=None)
+        start = time.perf_counter()
+        erwartet = [rechner(*auftrag) for auftrag in auftraege]
+        seriell = time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=args.arbeiter) as pool:
+            start = time.perf_counter()
+            ergebnisse = list(
+                pool.map(partial(mit_eigenem_kontext, rechner), auftraege)
+            )
+            nebenlaeufig = time.perf_counter() - start
+        assert gleich(erwartet, ergebnisse), f"{methode}: Threads weichen ab"
+
+        # mit gemeinsamem Speicher und jedem Auftrag doppelt, sodass Threads gleichzeitig lesen und schreiben
+        start = time.perf_counter()
+        ergebnisse = verteile_nebenlaeufig(
+            auftraege + auftraege,
+            methode,
+            args.arbeiter,
+            Verteilungsspeicher(args.auftraege),
+        )
+        gespeichert = time.perf_counter() - start
+        assert gleich(erwartet + erwartet, ergebnisse), f"{methode}: Speicher weicht ab"
+
+        print(f"{methode:<10}{seriell:>9.2f}s{nebenlaeufig:>9.2f}s{gespeichert:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
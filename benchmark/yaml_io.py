@@ -0,0 +1,110 @@
+"""Vergleicht Lesen und Schreiben der Eingabedateien mit dem reinen Python-Loader und -Dumper von PyYAML gegenüber den
+libyaml-Varianten, standardmäßig für die Bundestagswahl 2021.
+
+    python benchmark/yaml_io.py [Verzeichnis] [--wiederholungen N]
+"""
+
+import argparse
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+import yaml
+
+from sitzverteilung.hilfsmittel import YamlDumper, YamlLoader
+
+DATEIEN = [
+    "Zweitstimme.yaml",
+    "Erststimme.yaml",
+    "Direktkandidaten.yaml",
+    "Listenkandidaten.yaml",
+]
+
+
+def miss(funktion, wiederholungen: int) -> float:
+    """
+    Beste Laufzeit über mehrere Wiederholungen
+
+        :param funktion: Funktion ohne Argumente
+        :param wiederholungen: Anzahl der Wiederholungen
+        :return: kürzeste Laufzeit in Sekunden
+    """
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append(time.perf_counter() - start)
+    return min(zeiten)
+
+
+def lesen(datei: Path, loader):
+    """Lade eine Datei mit dem angegebenen Loader"""
+    with open(datei, "r", encoding="utf-8") as file:
+        return yaml.load(file, Loader=loader)
+
+
+def schreiben_vollstaendig(inhalt: dict, datei: Path, dumper):
+    """Schreibe das vollständige dict auf einmal, wie download.py es bisher tat"""
+    with open(datei, "w", encoding="utf-8") as file:
+        yaml.dump(inhalt, file, Dumper=dumper, sort_keys=False, allow_unicode=True)
+
+
+def schreiben_abschnittsweise(inhalt: dict, datei: Path, dumper):
+    """Schreibe Eintrag für Eintrag der obersten Ebene, wie dump_yaml"""
+    with open(datei, "w", encoding="utf-8") as file:
+        for schluessel, wert in inhalt.items():
+            yaml.dump(
+                {schluessel: wert},
+                file,
+                Dumper=dumper,
+                sort_keys=False,
+                allow_unicode=True,
+            )
+
+
+def main():
+    """Miss Lesen und Schreiben je Datei und gib eine Tabelle aus"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "verzeichnis",
+        nargs="?",
+        default=Path(__file__).parent.parent / "beispiele" / "bundestag" / "2021",
+        type=Path,
+    )
+    parser.add_argument("--wiederholungen", type=int, default=3)
+    args = parser.parse_args()
+
+    if YamlLoader is yaml.SafeLoader:
+        print("libyaml ist nicht verfügbar, beide Spalten verwenden PyYAML")
+
+    print(
+        f"{'Datei':<24}{'Lesen alt':>11}{'Lesen neu':>11}{'Schreiben alt':>15}{'Schreiben neu':>15}"
+    )
+    with tempfile.TemporaryDirectory() as ordner:
+        ziel = Path(ordner) / "ausgabe.yaml"
+        for name in DATEIEN:
+            datei = args.verzeichnis / name
+            if not datei.exists():
+                continue
+            inhalt = lesen(datei, YamlLoader)
+            assert inhalt == lesen(datei, yaml.SafeLoader)
+            zeiten = [
+                miss(partial(lesen, datei, yaml.SafeLoader), args.wiederholungen),
+                miss(partial(lesen, datei, YamlLoader), args.wiederholungen),
+                miss(
+                    partial(schreiben_vollstaendig, inhalt, ziel, yaml.SafeDumper),
+                    args.wiederholungen,
+                ),
+                miss(
+                    partial(schreiben_abschnittsweise, inhalt, ziel, YamlDumper),
+                    args.wiederholungen,
+                ),
+            ]
+            print(
+                f"{name:<24}{zeiten[0]:>10.3f}s{zeiten[1]:>10.3f}s{zeiten[2]:>14.3f}s{zeiten[3]:>14.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
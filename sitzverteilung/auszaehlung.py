@@ -0,0 +1,378 @@
+"""Dieses Modul verfolgt die Auszählung am Wahlabend. Die Ergebnisdatei des Bundeswahlleiters wird regelmäßig abgefragt
+und mit dem vorherigen Stand verglichen. Neu bestimmt werden nur die Sieger geänderter Wahlkreise und die
+Unterverteilungen der Länder mit geänderten Zweitstimmen oder Sitzen, die Oberverteilung folgt bei jeder Änderung.
+"""
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sitzverteilung import download
+from sitzverteilung.sitzverteilung import (
+    Ergebnis,
+    Losentscheide,
+    bestimme_wahlkreissieger,
+    direktmandate_je_land,
+    pruefe_huerde,
+    setze_einstellungen,
+    summiere_mindestsitze,
+    unabhaengige_sieger,
+    verteile_auf_laender,
+    verteile_landeslisten,
+    verteile_oberverteilung,
+)
+from sitzverteilung.zwischenspeicher import lade_laender
+
+EBENEN = ["Gebietsart", "Land", "Gebiet", "Partei"]
+
+
+@dataclass
+class Aktualisierung:
+    """
+    Neues Ergebnis nach einer Meldung
+
+        :ivar ergebnis: vollständige Sitzverteilung
+        :ivar wahlkreise: Wahlkreise mit geänderten Erststimmen als (Land, Wahlkreis)
+        :ivar laender: Länder mit geänderten Zweitstimmen
+        :ivar unterverteilungen: Länder, deren erste Unterverteilung neu berechnet wurde
+        :ivar latenz: Dauer je Schritt in Sekunden
+    """
+
+    ergebnis: Ergebnis
+    wahlkreise: list
+    laender: list
+    unterverteilungen: list
+    latenz: dict = field(default_factory=dict)
+
+
+@dataclass
+class Auszaehlung:  # pylint: disable=too-many-instance-attributes
+    """
+    Laufender Stand einer Auszählung mit den Zwischenergebnissen, die bei späteren Meldungen wiederverwendet werden
+
+        :ivar laender: Länder mit Spalte Stimmen
+        :ivar einstellungen: Einstellungen, siehe setze_einstellungen
+        :ivar losentscheide: Losverfahren und Protokoll über alle Meldungen hinweg
+        :ivar stand: Stimmen je Gebietsart, Land, Gebiet und Partei der letzten Meldung
+        :ivar zweitstimmen: Zweitstimmen je Partei und Land
+        :ivar erststimmen: Erststimmen je Partei und (Land, Wahlkreis)
+        :ivar sieger: Zeilennummer des Siegers je Wahlkreis, -1 für Wahlkreise ohne Stimmen
+        :ivar landesverteilung: Stimmen und Sitze je Land
+        :ivar unterverteilung: erste Unterverteilung je Partei und Land
+    """
+
+    laender: pd.DataFrame
+    einstellungen: dict
+    losentscheide: Losentscheide = field(default_factory=Losentscheide)
+    stand: pd.Series = None
+    zweitstimmen: pd.DataFrame = None
+    erststimmen: pd.DataFrame = None
+    sieger: np.ndarray = None
+    landesverteilung: pd.DataFrame = None
+    unterverteilung: pd.DataFrame = None
+
+    def __post_init__(self):
+        self.stand = pd.Series(
+            dtype="int64",
+            index=pd.MultiIndex.from_arrays([[]] * len(EBENEN), names=EBENEN),
+        )
+        self.zweitstimmen = pd.DataFrame(
+            index=pd.Index([], name="Partei"), columns=self.laender.index, dtype="int64"
+        )
+        self.erststimmen = pd.DataFrame(
+            index=pd.Index([], name="Partei"),
+            columns=pd.MultiIndex.from_arrays([[], []], names=["Land", "Gebiet"]),
+            dtype="int64",
+        )
+        self.sieger = np.array([], dtype="int64")
+
+    def aktualisiere(self, alle_ergebnisse):
+        """
+        Übernimm eine neue Meldung und berechne die davon betroffenen Teile der Sitzverteilung neu. Solange keine
+        Zweitstimmen gemeldet sind, entsteht kein Ergebnis.
+
+            :param pd.DataFrame alle_ergebnisse: Daten des Bundeswahlleiters, siehe download.lies_ergebnisse
+            :return: Ergebnis mit Angaben zu den neu berechneten Teilen oder None ohne Änderung
+            :rtype: Aktualisierung
+        """
+        zeiten = [time.perf_counter()]
+        neu = stimmen_je_gebiet(alle_ergebnisse, self.laender.index)
+        geaendert = unterschiede(self.stand, neu)
+        self.stand = neu
+        if geaendert.empty:
+            return None
+        art = geaendert.index.get_level_values("Gebietsart")
+        zweitstimmen = geaendert[art == "Land"].droplevel(["Gebietsart", "Gebiet"])
+        erststimmen = geaendert[art == "Wahlkreis"].droplevel("Gebietsart")
+        self.zweitstimmen = ergaenze(self.zweitstimmen, zweitstimmen)
+        laender = zweitstimmen.index.get_level_values("Land").unique().to_list()
+        zeiten.append(time.perf_counter())
+
+        wahlkreise = self.aktualisiere_wahlkreise(erststimmen)
+        zeiten.append(time.perf_counter())
+        if self.zweitstimmen.to_numpy().sum() == 0:
+            return None
+
+        ergebnis = Ergebnis()
+        ergebnis.direktmandate = direktmandate_je_land(
+            self.erststimmen, self.sieger, self.laender.index, self.zweitstimmen.index
+        )
+        ergebnis.mehrheitssieger, zugelassen = pruefe_huerde(
+            self.einstellungen["hürde"], ergebnis.direktmandate, self.zweitstimmen
+        )
+        ergebnis.unabhaengige = unabhaengige_sieger(
+            ergebnis.direktmandate, zugelassen.index
+        )
+        unterverteilungen = self.aktualisiere_unterverteilung(
+            zugelassen,
+            self.einstellungen["sitze_geplant"] - ergebnis.unabhaengige.sum(),
+            laender,
+        )
+        ergebnis.landesverteilung = self.landesverteilung.copy()
+        ergebnis.unterverteilung = self.unterverteilung.copy()
+        ergebnis.unterverteilung.attrs = {
+            "Zitierdivisor": dict(self.unterverteilung.attrs["Zitierdivisor"])
+        }
+        ergebnis.mindestsitze = summiere_mindestsitze(
+            ergebnis.direktmandate,
+            ergebnis.unterverteilung,
+            self.einstellungen["mindestsitze_methode"],
+            zugelassen.index,
+        )
+        zeiten.append(time.perf_counter())
+
+        self.losentscheide.gezogen.pop("Oberverteilung", None)
+        verteile_oberverteilung(
+            ergebnis, zugelassen, self.einstellungen, self.losentscheide
+        )
+        ergebnis.lose = dict(self.losentscheide.gezogen)
+        zeiten.append(time.perf_counter())
+
+        schritte = ["vergleich", "wahlkreise", "unterverteilung", "oberverteilung"]
+        latenz = dict(zip(schritte, np.diff(zeiten).tolist()))
+        latenz["berechnung"] = zeiten[-1] - zeiten[0]
+        return Aktualisierung(ergebnis, wahlkreise, laender, unterverteilungen, latenz)
+
+    def aktualisiere_wahlkreise(self, erststimmen):
+        """
+        Trage geänderte Erststimmen ein und bestimme die Sieger der betroffenen Wahlkreise neu
+
+            :param pd.Series erststimmen: geänderte Erststimmen je Land, Gebiet und Partei
+            :return: geänderte Wahlkreise als (Land, Wahlkreis)
+            :rtype: list
+        """
+        if erststimmen.empty:
+            return []
+        self.erststimmen = ergaenze(self.erststimmen, erststimmen)
+        self.sieger = np.concatenate(
+            (
+                self.sieger,
+                np.full(len(self.erststimmen.columns) - len(self.sieger), -1),
+            )
+        )
+        wahlkreise = erststimmen.index.droplevel("Partei").unique()
+        for wahlkreis in wahlkreise:
+            self.losentscheide.gezogen.pop(f"Wahlkreis {wahlkreis}", None)
+        spalten = self.erststimmen.columns.get_indexer(wahlkreise)
+        self.sieger[spalten] = bestimme_wahlkreissieger(
+            self.erststimmen.iloc[:, spalten], self.losentscheide
+        )
+        return wahlkreise.to_list()
+
+    def aktualisiere_unterverteilung(self, zugelassen, gesamtsitze, laender):
+        """
+        Verteile die Sitze neu auf die Länder, falls sich ihre Gesamtzahl geändert hat, und berechne die erste
+        Unterverteilung der Länder mit geänderten Zweitstimmen oder Sitzen neu. Ändert sich die Menge der zugelassenen
+        Parteien, werden alle Länder neu berechnet.
+
+            :param pd.DataFrame zugelassen: Zweitstimmen der zugelassenen Parteien je Land
+            :param int gesamtsitze: Sitze ohne unabhängige Wahlkreissieger
+            :param list laender: Länder mit geänderten Zweitstimmen
+            :return: Länder, deren erste Unterverteilung neu berechnet wurde
+            :rtype: list
+        """
+        neu = pd.Index(laender)
+        if (
+            self.landesverteilung is None
+            or self.landesverteilung["Sitze"].sum() != gesamtsitze
+        ):
+            self.losentscheide.gezogen.pop("Länder", None)
+            landesverteilung = verteile_auf_laender(
+                self.laender,
+                gesamtsitze,
+                self.losentscheide,
+                self.einstellungen["verfahren"],
+            )
+            if self.landesverteilung is not None:
+                neu = neu.union(
+                    landesverteilung.index[
+                        landesverteilung["Sitze"] != self.landesverteilung["Sitze"]
+                    ],
+                    sort=False,
+                )
+            self.landesverteilung = landesverteilung
+
+        if self.unterverteilung is None or not self.unterverteilung.index.equals(
+            zugelassen.index
+        ):
+            neu = self.laender.index
+        neu = self.laender.index[self.laender.index.isin(neu)]
+        if neu.empty:
+            return []
+        for land in neu:
+            self.losentscheide.gezogen.pop(land, None)
+        teil = verteile_landeslisten(
+            zugelassen,
+            self.landesverteilung.loc[neu],
+            self.losentscheide,
+            self.einstellungen["verfahren"],
+        )
+        if neu.equals(self.laender.index):
+            self.unterverteilung = teil
+            self.unterverteilung.attrs.setdefault("Zitierdivisor", {})
+        else:
+            divisoren = {
+                land: divisor
+                for land, divisor in self.unterverteilung.attrs["Zitierdivisor"].items()
+                if land not in neu
+            }
+            self.unterverteilung[neu] = teil[neu]
+            self.unterverteilung.attrs["Zitierdivisor"] = {
+                **divisoren,
+                **teil.attrs.get("Zitierdivisor", {}),
+            }
+        return neu.to_list()
+
+
+def stimmen_je_gebiet(alle_ergebnisse, laender):
+    """
+    Wähle die Stimmen der Parteien aus den Daten des Bundeswahlleiters: Zweitstimmen je Land und Erststimmen je
+    Wahlkreis. Noch nicht gemeldete Gebiete zählen 0 Stimmen.
+
+        :param pd.DataFrame alle_ergebnisse: Daten des Bundeswahlleiters
+        :param pd.Index laender: berücksichtigte Länder
+        :return: Stimmen je Gebietsart, Land, Gebiet und Partei
+        :rtype: pd.Series
+    """
+    gebietsart = alle_ergebnisse["Gebietsart"].astype("object")
+    land = gebietsart == "Land"
+    landesnamen = (
+        alle_ergebnisse.loc[land, ["Gebietsnummer", "Gebietsname"]]
+        .drop_duplicates(subset="Gebietsnummer")
+        .astype({"Gebietsnummer": "float64", "Gebietsname": "object"})
+        .set_index("Gebietsnummer")["Gebietsname"]
+    )
+    auswahl = (alle_ergebnisse["Gruppenart"] == "Partei") & (
+        (land & (alle_ergebnisse["Stimme"] == 2))
+        | ((gebietsart == "Wahlkreis") & (alle_ergebnisse["Stimme"] == 1))
+    )
+    gebiet = alle_ergebnisse.loc[auswahl, "Gebietsname"].astype("object")
+    landesname = gebiet.where(
+        land[auswahl],
+        alle_ergebnisse.loc[auswahl, "UegGebietsnummer"].map(landesnamen),
+    )
+    partei = alle_ergebnisse.loc[auswahl, "Gruppenname"].astype("object")
+    if download.UNIONSMERGER:
+        partei = partei.replace("CSU", "CDU")  # Unionsmerger
+    stimmen = pd.Series(
+        alle_ergebnisse.loc[auswahl, "Anzahl"].fillna(0).to_numpy("int64"),
+        index=pd.MultiIndex.from_arrays(
+            [gebietsart[auswahl], landesname, gebiet, partei], names=EBENEN
+        ),
+    )
+    stimmen = stimmen[landesname.isin(laender).to_numpy()]
+    if not stimmen.index.is_unique:
+        stimmen = stimmen.groupby(level=EBENEN, sort=False).sum()
+    return stimmen
+
+
+def unterschiede(alt, neu):
+    """
+    Bestimme die Einträge, die sich zwischen zwei Meldungen geändert haben. Entfallene Einträge zählen 0 Stimmen.
+
+        :param pd.Series alt: Stimmen der vorherigen Meldung
+        :param pd.Series neu: Stimmen der aktuellen Meldung
+        :return: geänderte Einträge mit ihren neuen Stimmen
+        :rtype: pd.Series
+    """
+    if alt.empty:
+        return neu[neu != 0]
+    gebiete = alt.index.union(neu.index, sort=False)
+    alt = alt.reindex(gebiete, fill_value=0)
+    neu = neu.reindex(gebiete, fill_value=0)
+    return neu[neu != alt]
+
+
+def ergaenze(tabelle, werte):
+    """
+    Trage Werte in eine Tabelle Partei × Gebiet ein. Neue Parteien und Gebiete werden in der Reihenfolge ihres
+    Auftretens angehängt, bestehende Zeilen und Spalten behalten ihre Position.
+
+        :param pd.DataFrame tabelle: Stimmen je Partei und Gebiet
+        :param pd.Series werte: Stimmen mit der Partei als letzter Indexebene und dem Gebiet davor
+        :return: ergänzte Tabelle
+        :rtype: pd.DataFrame
+    """
+    parteien = werte.index.get_level_values("Partei")
+    gebiete = werte.index.droplevel("Partei")
+    tabelle = tabelle.reindex(
+        index=tabelle.index.append(
+            parteien.unique()[~parteien.unique().isin(tabelle.index)]
+        ),
+        columns=tabelle.columns.append(
+            gebiete.unique()[~gebiete.unique().isin(tabelle.columns)]
+        ),
+        fill_value=0,
+    )
+    stimmen = tabelle.to_numpy(dtype="int64", copy=True)
+    stimmen[
+        tabelle.index.get_indexer(parteien), tabelle.columns.get_indexer(gebiete)
+    ] = werte.to_numpy()
+    return pd.DataFrame(stimmen, index=tabelle.index, columns=tabelle.columns)
+
+
+def beobachte(
+    pfad,
+    intervall=60,
+    url=download.BUNDESWAHLLEITER,
+    einstellungen=None,
+    losverfahren=None,
+):
+    """
+    Verfolge die Auszählung: lade alle intervall Sekunden die Daten herunter und gib nach jeder geänderten
+    Ergebnisdatei ein neues Ergebnis zurück
+
+        :param pfad: Verzeichnis mit Länder.yaml, Einstellungen.yaml und dem Ordner daten
+        :param float intervall: Wartezeit zwischen zwei Abfragen in Sekunden
+        :param str url: Verzeichnis der Daten, bei None wird nur der Ordner daten beobachtet
+        :param dict einstellungen: Einträge, die Einstellungen.yaml überschreiben
+        :param losverfahren: Losverfahren für Gleichstände, siehe Losverfahren
+        :return: Generator über Aktualisierungen
+    """
+    pfad = Path(pfad)
+    auszaehlung = Auszaehlung(
+        lade_laender(pfad),
+        setze_einstellungen(pfad, einstellungen),
+        Losentscheide(losverfahren),
+    )
+    kennung = None
+    while True:
+        beginn = time.perf_counter()
+        if url is not None:
+            download.lade_herunter(pfad, url)
+        dateien = sorted((pfad / "daten").glob("kerg2*.csv"))
+        status = dateien[-1].stat() if dateien else None
+        if status and kennung != (dateien[-1], status.st_mtime_ns, status.st_ctime_ns):
+            # ctime ändert sich auch, wenn eine neue Fassung mit gleicher Änderungszeit ersetzt wurde
+            kennung = (dateien[-1], status.st_mtime_ns, status.st_ctime_ns)
+            alle_ergebnisse = download.lies_ergebnisse(dateien[-1])
+            einlesen = time.perf_counter() - beginn
+            aktualisierung = auszaehlung.aktualisiere(alle_ergebnisse)
+            if aktualisierung is not None:
+                aktualisierung.latenz["einlesen"] = einlesen
+                aktualisierung.latenz["gesamt"] = time.perf_counter() - beginn
+                yield aktualisierung
+        time.sleep(intervall)
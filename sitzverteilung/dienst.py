@@ -0,0 +1,529 @@
+"""Dieses Modul stellt den Sitzverteilungsrechner als lokalen HTTP-Dienst bereit. Geladene Wahlen bleiben im Speicher,
+Anfragen überschreiben Einstellungen oder Stimmen als JSON. Gleichzeitig eintreffende Anfragen werden kurz gesammelt
+und je Wahl und Einstellungen als ein Block von Szenarien über die Arrays der Simulation berechnet. Ergebnisse hält ein
+begrenzter LRU-Speicher vor."""
+
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+from sitzverteilung.hilfsmittel import load_yaml
+from sitzverteilung.profil import stufe, zaehle
+from sitzverteilung.rechner.verteilungsspeicher import Verteilungsspeicher
+from sitzverteilung.simulation import berechne_szenarien
+from sitzverteilung.sitzverteilung import einstellungen_aus
+from sitzverteilung.wahldaten import Wahldaten, lade_wahldaten, positionen
+
+EINGABEDATEIEN = (
+    "Einstellungen.yaml",
+    "Länder.yaml",
+    "Zweitstimme.yaml",
+    "Erststimme.yaml",
+)
+
+
+@dataclass
+class Wahl:
+    """Eine geladene Wahl mit dem Inhalt von Einstellungen.yaml"""
+
+    daten: Wahldaten
+    einstellungen: dict
+    signatur: tuple  # Änderungszeiten der Eingabedateien
+    _spalten: dict = field(default_factory=dict, repr=False)
+
+    def spalte(self, land: str, wahlkreis: str) -> int:
+        """
+        Nummer eines Wahlkreises in der Erststimmenmatrix
+
+            :param land: Land
+            :param wahlkreis: Name des Wahlkreises
+            :return: Spalte der Erststimmenmatrix
+        """
+        if not self._spalten:
+            self._spalten = {
+                kennung: spalte
+                for spalte, kennung in enumerate(
+                    zip(
+                        self.daten.laender[self.daten.wahlkreis_land].tolist(),
+                        self.daten.wahlkreisnamen.tolist(),
+                    )
+                )
+            }
+        try:
+            return self._spalten[(land, wahlkreis)]
+        except KeyError as fehler:
+            raise ValueError(
+                f"Wahlkreis {wahlkreis} in {land} ist unbekannt"
+            ) from fehler
+
+
+class Wahlbestand:
+    """Geladene Wahlen je Verzeichnis unterhalb einer Wurzel, neu geladen nach Änderung einer Eingabedatei"""
+
+    def __init__(self, wurzel="."):
+        """
+        :param wurzel: Verzeichnis, außerhalb dessen keine Wahlen geladen werden
+        """
+        self.wurzel = Path(wurzel).resolve()
+        self._wahlen: dict = {}
+        self._sperre = threading.Lock()
+
+    def __len__(self):
+        return len(self._wahlen)
+
+    def wahl(self, pfad) -> tuple[Path, Wahl]:
+        """
+        Gib die Wahl im Verzeichnis zurück und lade sie bei Bedarf
+
+            :param pfad: Verzeichnis relativ zur Wurzel
+            :return: aufgelöstes Verzeichnis, Wahl
+        """
+        verzeichnis = (self.wurzel / pfad).resolve()
+        if not verzeichnis.is_relative_to(self.wurzel):
+            raise ValueError(f"{pfad} liegt außerhalb von {self.wurzel}")
+        signatur = tuple(
+            (verzeichnis / datei).stat().st_mtime_ns for datei in EINGABEDATEIEN
+        )
+        with self._sperre:
+            wahl = self._wahlen.get(verzeichnis)
+            if wahl is None or wahl.signatur != signatur:
+                with stufe("Eingaben laden"):
+                    wahl = Wahl(
+                        lade_wahldaten(verzeichnis),
+                        load_yaml(verzeichnis / "Einstellungen.yaml"),
+                        signatur,
+                    )
+                self._wahlen[verzeichnis] = wahl
+        return verzeichnis, wahl
+
+
+class Ergebnisspeicher(Verteilungsspeicher):
+    """Begrenzter LRU-Speicher für die Ergebnisse einzelner Anfragen, der Schlüssel ist eine Prüfsumme der Anfrage"""
+
+    def hole(self, schluessel: bytes) -> dict | None:
+        """
+        Gib ein gespeichertes Ergebnis zurück
+
+            :param schluessel: Prüfsumme der Anfrage
+            :return: Ergebnis oder None
+        """
+        with self._sperre:
+            ergebnis = self._eintraege.get(schluessel)
+            if ergebnis is None:
+                self.fehlschlaege += 1
+                return None
+            self._eintraege.move_to_end(schluessel)
+            self.treffer += 1
+        zaehle("Treffer im Ergebnisspeicher")
+        return ergebnis
+
+    def lege_ab(self, schluessel: bytes, ergebnis: dict):
+        """
+        Speichere ein Ergebnis und verdränge bei Bedarf das am längsten unbenutzte
+
+            :param schluessel: Prüfsumme der Anfrage
+            :param ergebnis: Ergebnis als JSON-fähiges dict
+        """
+        if self.groesse <= 0:
+            return
+        with self._sperre:
+            self._eintraege[schluessel] = ergebnis
+            self._eintraege.move_to_end(schluessel)
+            while len(self._eintraege) > self.groesse:
+                self._eintraege.popitem(last=False)
+
+
+@dataclass
+class Anfrage:
+    """Eine vorbereitete Anfrage in der Warteschlange"""
+
+    wahl: Wahl
+    gruppe: tuple  # Verzeichnis, Signatur und Einstellungen, gleiche Gruppen werden gemeinsam berechnet
+    einstellungen: dict
+    zweitstimmen: np.ndarray  # Partei mit Zweitstimmen × Land
+    erststimmen: np.ndarray  # Partei × Wahlkreis
+    zukunft: Future = field(default_factory=Future)
+
+
+class Sitzverteilungsdienst:  # pylint: disable=too-many-instance-attributes
+    """
+    Berechnet Anfragen über geladene Wahlen. Ein Sammelthread wartet nach der ersten Anfrage bis zu wartezeit
+    Sekunden auf weitere und berechnet jede Gruppe gleicher Wahl und Einstellungen als einen Block von Szenarien.
+    Gleichstände entscheidet der Zufallsgenerator des Dienstes.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        wurzel=".",
+        standardpfad=".",
+        wartezeit: float = 0.005,
+        stapelgroesse: int = 64,
+        speichergroesse: int = 1024,
+        saat=None,
+    ):
+        """
+        :param wurzel: Verzeichnis, außerhalb dessen keine Wahlen geladen werden
+        :param standardpfad: Verzeichnis für Anfragen ohne pfad, relativ zur Wurzel
+        :param wartezeit: Sekunden, die nach der ersten Anfrage eines Stapels auf weitere gewartet wird
+        :param stapelgroesse: Höchstzahl gemeinsam gesammelter Anfragen
+        :param speichergroesse: Höchstzahl gespeicherter Ergebnisse
+        :param saat: Startwert des Zufallsgenerators für Lose
+        """
+        self.bestand = Wahlbestand(wurzel)
+        self.speicher = Ergebnisspeicher(speichergroesse)
+        self.standardpfad = standardpfad
+        self.wartezeit = wartezeit
+        self.stapelgroesse = stapelgroesse
+        self.stapel = 0
+        self.szenarien = 0
+        self._rng = np.random.default_rng(saat)
+        self._warteschlange: queue.Queue = queue.Queue()
+        self._laufend: dict = {}
+        self._sperre = threading.Lock()
+        threading.Thread(target=self._sammle, daemon=True).start()
+
+    def berechne(self, auftrag: dict) -> dict:
+        """
+        Berechne die Sitzverteilung zu einer Anfrage, z. B.
+        {"pfad": "beispiele/bundestag/2021", "einstellungen": {"Mindestsitze": "Pur"},
+        "zweitstimmen": {"CDU": {"Bayern": 0}}, "erststimmen": {"Bayern": {"Altötting": {"CSU": 0}}}}
+
+            :param auftrag: Anfrage mit optionalen Einträgen pfad, einstellungen, zweitstimmen und erststimmen
+            :return: Gesamtsitze, Sitze je Partei, unausgeglichene Überhangsmandate, unabhängige Wahlkreissieger
+        """
+        unbekannt = set(auftrag) - {
+            "pfad",
+            "einstellungen",
+            "zweitstimmen",
+            "erststimmen",
+        }
+        if unbekannt:
+            raise ValueError(f"unbekannte Einträge {sorted(unbekannt)}")
+        verzeichnis, wahl = self.bestand.wahl(auftrag.get("pfad", self.standardpfad))
+        schluessel = pruefsumme(verzeichnis, wahl.signatur, auftrag)
+        ergebnis = self.speicher.hole(schluessel)
+        if ergebnis is not None:
+            return ergebnis
+
+        # gleiche Anfragen, die noch berechnet werden, warten auf dasselbe Ergebnis
+        with self._sperre:
+            zukunft = self._laufend.get(schluessel)
+            eigene = zukunft is None
+            if eigene:
+                zukunft = self._laufend[schluessel] = Future()
+        if not eigene:
+            return zukunft.result()
+        try:
+            anfrage = bereite_vor(verzeichnis, wahl, auftrag)
+            self._warteschlange.put(anfrage)
+            ergebnis = anfrage.zukunft.result()
+            self.speicher.lege_ab(schluessel, ergebnis)
+            zukunft.set_result(ergebnis)
+        except Exception as fehler:
+            zukunft.set_exception(fehler)
+            raise
+        finally:
+            with self._sperre:
+                del self._laufend[schluessel]
+        return ergebnis
+
+    def statistik(self) -> dict:
+        """
+        Kennzahlen des Dienstes
+
+            :return: geladene Wahlen, berechnete Stapel und Szenarien, Ergebnisspeicher
+        """
+        return {
+            "wahlen": len(self.bestand),
+            "stapel": self.stapel,
+            "szenarien": self.szenarien,
+            "speicher": self.speicher.statistik(),
+        }
+
+    def _sammle(self):
+        """Sammle Anfragen zu Stapeln und berechne sie, läuft im Sammelthread"""
+        while True:
+            stapel = [self._warteschlange.get()]
+            frist = time.monotonic() + self.wartezeit
+            while len(stapel) < self.stapelgroesse:
+                rest = frist - time.monotonic()
+                if rest <= 0:
+                    break
+                try:
+                    stapel.append(self._warteschlange.get(timeout=rest))
+                except queue.Empty:
+                    break
+            self._berechne_stapel(stapel)
+
+    def _berechne_stapel(self, stapel: list):
+        """
+        Berechne jede Gruppe eines Stapels als einen Block von Szenarien
+
+            :param stapel: Liste von Anfragen
+        """
+        gruppen = defaultdict(list)
+        for anfrage in stapel:
+            gruppen[anfrage.gruppe].append(anfrage)
+        self.stapel += 1
+        zaehle("Stapel des Dienstes")
+        for anfragen in gruppen.values():
+            self._berechne_gruppe(anfragen)
+
+    def _berechne_gruppe(self, anfragen: list):
+        """
+        Berechne Anfragen gleicher Wahl und Einstellungen als einen Block von Szenarien und setze ihre Ergebnisse.
+        Schlägt der Block fehl, werden die Anfragen einzeln berechnet, damit der Fehler nur die Anfragen trifft, die
+        ihn auslösen.
+
+            :param anfragen: Liste von Anfragen derselben Gruppe
+        """
+        erste = anfragen[0]
+        try:
+            with stufe("Stapel berechnen"):
+                simulation = berechne_szenarien(
+                    erste.wahl.daten,
+                    erste.einstellungen,
+                    np.stack([anfrage.zweitstimmen for anfrage in anfragen]),
+                    np.stack([anfrage.erststimmen for anfrage in anfragen]),
+                    self._rng,
+                )
+        except Exception as fehler:  # pylint: disable=broad-exception-caught
+            if len(anfragen) == 1:
+                erste.zukunft.set_exception(fehler)
+                return
+            for anfrage in anfragen:
+                self._berechne_gruppe([anfrage])
+            return
+        self.szenarien += len(anfragen)
+        for szenario, anfrage in enumerate(anfragen):
+            anfrage.zukunft.set_result(
+                {
+                    "gesamtsitze": int(simulation.gesamtsitze[szenario]),
+                    "sitze": {
+                        partei: int(sitze)
+                        for partei, sitze in zip(
+                            simulation.parteien.tolist(), simulation.sitze[szenario]
+                        )
+                        if sitze
+                    },
+                    "ueberhang": int(simulation.ueberhang[szenario]),
+                    "unabhaengige": int(simulation.unabhaengige[szenario]),
+                }
+            )
+
+
+def bereite_vor(verzeichnis: Path, wahl: Wahl, auftrag: dict) -> Anfrage:
+    """
+    Prüfe eine Anfrage und setze Einstellungen und Stimmen zusammen. Die Stimmenmatrizen der Wahl werden nur kopiert,
+    wenn die Anfrage sie überschreibt.
+
+        :param verzeichnis: Verzeichnis der Wahl
+        :param wahl: geladene Wahl
+        :param auftrag: Anfrage, siehe Sitzverteilungsdienst.berechne
+        :return: vorbereitete Anfrage
+    """
+    ueberschreibungen = auftrag.get("einstellungen") or {}
+    if not isinstance(ueberschreibungen, dict):
+        raise ValueError("einstellungen muss ein JSON-Objekt sein")
+    einstellungen = einstellungen_aus({**wahl.einstellungen, **ueberschreibungen})
+
+    return Anfrage(
+        wahl,
+        (verzeichnis, wahl.signatur, json.dumps(ueberschreibungen, sort_keys=True)),
+        einstellungen,
+        ueberschreibe_zweitstimmen(wahl.daten, auftrag.get("zweitstimmen")),
+        ueberschreibe_erststimmen(wahl, auftrag.get("erststimmen")),
+    )
+
+
+def ueberschreibe_zweitstimmen(daten: Wahldaten, inhalt) -> np.ndarray:
+    """
+    Zweitstimmen mit den Einträgen einer Anfrage
+
+        :param daten: Eingabedaten der Wahl
+        :param inhalt: Partei → Land → Stimmen oder None
+        :return: Zweitstimmen je Partei und Land, ohne Einträge die Matrix der Wahl selbst
+    """
+    if not inhalt:
+        return daten.zweitstimmen
+    zweitstimmen = daten.zweitstimmen.copy()
+    parteien = daten.parteien[: len(zweitstimmen)]
+    for partei, laender in eintraege(inhalt, "zweitstimmen"):
+        zeile = nummer(parteien, partei, "Partei")
+        for land, stimmen in eintraege(laender, partei):
+            zweitstimmen[zeile, nummer(daten.laender, land, "Land")] = anzahl(stimmen)
+    return zweitstimmen
+
+
+def ueberschreibe_erststimmen(wahl: Wahl, inhalt) -> np.ndarray:
+    """
+    Erststimmen mit den Einträgen einer Anfrage
+
+        :param wahl: geladene Wahl
+        :param inhalt: Land → Wahlkreis → Partei → Stimmen oder None
+        :return: Erststimmen je Partei und Wahlkreis, ohne Einträge die Matrix der Wahl selbst
+    """
+    if not inhalt:
+        return wahl.daten.erststimmen
+    erststimmen = wahl.daten.erststimmen.copy()
+    for land, wahlkreise in eintraege(inhalt, "erststimmen"):
+        for wahlkreis, parteien in eintraege(wahlkreise, land):
+            spalte = wahl.spalte(land, wahlkreis)
+            for partei, stimmen in eintraege(parteien, wahlkreis):
+                zeile = nummer(wahl.daten.parteien, partei, "Partei")
+                erststimmen[zeile, spalte] = anzahl(stimmen)
+    return erststimmen
+
+
+def eintraege(inhalt, name: str):
+    """
+    Einträge eines JSON-Objekts aus einer Anfrage
+
+        :param inhalt: Wert aus der Anfrage
+        :param name: Bezeichnung für die Fehlermeldung
+        :return: Paare (Schlüssel, Wert)
+    """
+    if not isinstance(inhalt, dict):
+        raise ValueError(f"{name} muss ein JSON-Objekt sein")
+    return inhalt.items()
+
+
+def nummer(namen: np.ndarray, name: str, art: str) -> int:
+    """
+    Position eines Namens in einer Namenstabelle
+
+        :param namen: Parteien oder Länder
+        :param name: gesuchter Name
+        :param art: Bezeichnung für die Fehlermeldung
+        :return: Position
+    """
+    position = int(positionen(namen, [name])[0])
+    if position < 0:
+        raise ValueError(f"{art} {name} ist unbekannt")
+    return position
+
+
+def anzahl(stimmen) -> int:
+    """
+    Prüfe eine Stimmenzahl aus einer Anfrage
+
+        :param stimmen: Wert aus der Anfrage
+        :return: nichtnegative ganze Zahl
+    """
+    if isinstance(stimmen, bool) or not isinstance(stimmen, int) or stimmen < 0:
+        raise ValueError(f"{stimmen!r} ist keine gültige Stimmenzahl")
+    return stimmen
+
+
+def pruefsumme(verzeichnis: Path, signatur: tuple, auftrag: dict) -> bytes:
+    """
+    Prüfsumme über Wahl und Anfrage als Schlüssel des Ergebnisspeichers
+
+        :param verzeichnis: Verzeichnis der Wahl
+        :param signatur: Änderungszeiten der Eingabedateien
+        :param auftrag: Anfrage
+        :return: Prüfsumme
+    """
+    summe = hashlib.blake2b(digest_size=16)
+    summe.update(repr((str(verzeichnis), signatur)).encode())
+    summe.update(
+        json.dumps(
+            {
+                schluessel: auftrag.get(schluessel)
+                for schluessel in ("einstellungen", "zweitstimmen", "erststimmen")
+            },
+            sort_keys=True,
+        ).encode()
+    )
+    return summe.digest()
+
+
+class Anfragebearbeitung(BaseHTTPRequestHandler):
+    """
+    HTTP-Schnittstelle: POST /sitzverteilung mit einer Anfrage als JSON, GET /status für die Kennzahlen des Dienstes
+    """
+
+    dienst: Sitzverteilungsdienst = None
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Berechne eine Anfrage"""
+        if self.path != "/sitzverteilung":
+            self._antworte(404, {"fehler": f"{self.path} ist unbekannt"})
+            return
+        try:
+            laenge = int(self.headers.get("Content-Length", 0))
+            auftrag = json.loads(self.rfile.read(laenge) or b"{}")
+            if not isinstance(auftrag, dict):
+                raise ValueError("die Anfrage muss ein JSON-Objekt sein")
+            ergebnis = self.dienst.berechne(auftrag)
+        except FileNotFoundError as fehler:
+            self._antworte(404, {"fehler": f"{Path(fehler.filename).name} fehlt"})
+        except (ValueError, KeyError, TypeError) as fehler:
+            self._antworte(400, {"fehler": str(fehler)})
+        except Exception as fehler:  # pylint: disable=broad-exception-caught
+            self._antworte(500, {"fehler": repr(fehler)})
+        else:
+            self._antworte(200, ergebnis)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Gib die Kennzahlen des Dienstes aus"""
+        if self.path != "/status":
+            self._antworte(404, {"fehler": f"{self.path} ist unbekannt"})
+            return
+        self._antworte(200, self.dienst.statistik())
+
+    def _antworte(self, status: int, inhalt: dict):
+        """
+        Sende eine JSON-Antwort
+
+            :param status: HTTP-Statuscode
+            :param inhalt: Antwort als JSON-fähiges dict
+        """
+        antwort = json.dumps(inhalt, ensure_ascii=False).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(antwort)))
+        self.end_headers()
+        self.wfile.write(antwort)
+
+
+def erzeuge_server(
+    dienst: Sitzverteilungsdienst, host="127.0.0.1", port=8080
+) -> ThreadingHTTPServer:
+    """
+    Erzeuge einen HTTP-Server für den Dienst, jede Verbindung läuft in einem eigenen Thread
+
+        :param dienst: Sitzverteilungsdienst
+        :param host: Adresse, standardmäßig nur lokal erreichbar
+        :param port: Port, 0 wählt einen freien Port
+        :return: Server, gestartet mit serve_forever()
+    """
+    bearbeitung = type("Bearbeitung", (Anfragebearbeitung,), {"dienst": dienst})
+    return ThreadingHTTPServer((host, port), bearbeitung)
+
+
+def starte_dienst(host="127.0.0.1", port=8080, **optionen):
+    """
+    Starte den Dienst und bediene Anfragen bis zum Abbruch mit Strg+C
+
+        :param host: Adresse, standardmäßig nur lokal erreichbar
+        :param port: Port
+        :param optionen: Argumente für Sitzverteilungsdienst
+    """
+    server = erzeuge_server(Sitzverteilungsdienst(**optionen), host, port)
+    print(f"Sitzverteilungsdienst auf http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,15 +1,42 @@
 """Dieses Modul lädt Wahlergebnisdaten (bisher nur 2021) vom deutschen Bundeswahlleiter herunter und überführt die
 aktuellsten Daten in ein yaml-Format für die Sitzverteilungsberechnung"""
 
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
 from html.parser import HTMLParser
+from urllib.parse import urljoin
 
 import pandas as pd
 import requests
-import yaml
 
-from sitzverteilung.hilfsmittel import load_yaml
+from sitzverteilung.hilfsmittel import dump_yaml, load_yaml
 
 UNIONSMERGER = False
+BUNDESWAHLLEITER = (
+    "https://www.bundeswahlleiter.de/bundestagswahlen/2021/ergebnisse/opendata/daten/"
+)
+KENNUNGEN = ".kennungen.json"  # ETag und Last-Modified je Datei
+STUECKGROESSE = 1 << 16
+TIMEOUT = (10, 60)  # Verbindungsaufbau und Lesen in Sekunden
+ERGEBNISSPALTEN = {
+    "Gebietsart": "category",
+    "Gebietsnummer": "int64",
+    "Gebietsname": "category",
+    "UegGebietsnummer": "float64",
+    "Gruppenart": "category",
+    "Gruppenname": "category",
+    "Stimme": "float64",
+    "Anzahl": "float64",
+}
+KANDIDATENSPALTEN = {
+    "Gebietsart": "category",
+    "Gebietsname": "category",
+    "Gruppenname": "category",
+    "Nachname": "object",
+    "Vornamen": "object",
+}
 
 
 def download(pfad):
@@ -26,39 +53,220 @@ def download(pfad):
         for _ in range(0, 6):
             inhalt = file.readline()
         print(inhalt.split(";")[:3])
-    alle_ergebnisse = pd.read_csv(
-        neuste_csv, delimiter=";", skiprows=9, encoding="utf8"
-    )
+    alle_ergebnisse = lies_ergebnisse(neuste_csv)
     laender_yaml = load_yaml(pfad / "Länder.yaml")
 
     schreibe_zweitstimmen(alle_ergebnisse, laender_yaml, pfad)
     schreibe_erststimme(alle_ergebnisse, laender_yaml, pfad)
 
-    kandidaten = pd.read_csv(
-        pfad / "daten/btw21_kandidaturen_utf8.csv",
-        delimiter=";",
-        skiprows=8,
-        encoding="utf8",
-    )
-    kandidaten = pd.DataFrame(kandidaten)
+    kandidaten = lies_kandidaten(pfad / "daten/btw21_kandidaturen_utf8.csv")
     schreibe_direktkandidaten(kandidaten, pfad)
     schreibe_listen(kandidaten, pfad)
 
 
-def lade_herunter(pfad):
+def lade_herunter(pfad, url=BUNDESWAHLLEITER, arbeiter=8) -> dict:
     """
-    Lade alle Daten vom Bundeswahlleiter herunter
+    Lade alle Daten vom Bundeswahlleiter herunter. Die Dateien werden parallel über eine gemeinsame Session geladen.
+    Bereits vorhandene Dateien werden nur erneut übertragen, wenn sie sich auf dem Server geändert haben.
 
     :param pfad: Zielpfad des Ordners dateien
     :type pfad: pathlib.Path
+    :param url: Verzeichnis der Daten, z. B. ein lokaler Server zum Testen
+    :type url: str
+    :param arbeiter: Anzahl gleichzeitiger Downloads
+    :type arbeiter: int
+    :return: Dateiname → "neu", "aktualisiert" oder "unverändert"
+    :rtype: dict
     """
     ordner = pfad / "daten"
     if not ordner.exists():
         ordner.mkdir()
-    url = "https://www.bundeswahlleiter.de/bundestagswahlen/2021/ergebnisse/opendata/daten/"
-    bundeswahlleiter = requests.get(url)
-    parser = MyHTMLParser(url, ordner)
-    parser.feed(bundeswahlleiter.text)
+    try:
+        kennungen = json.loads((ordner / KENNUNGEN).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        kennungen = {}
+
+    with erstelle_session(arbeiter) as session:
+        bundeswahlleiter = session.get(url, timeout=TIMEOUT)
+        bundeswahlleiter.raise_for_status()
+        parser = MyHTMLParser(url, ordner)
+        parser.feed(bundeswahlleiter.text)
+
+        with ThreadPoolExecutor(max_workers=arbeiter) as pool:
+            zukuenfte = {
+                name: pool.submit(
+                    lade_datei,
+                    session,
+                    urljoin(url, name),
+                    ordner / name,
+                    kennungen.get(name, {}),
+                )
+                for name in parser.dateien
+            }
+            ergebnisse, fehler = {}, []
+            for name, zukunft in zukuenfte.items():
+                try:
+                    ergebnisse[name] = zukunft.result()
+                except Exception as ausnahme:  # pylint: disable=broad-exception-caught
+                    fehler.append(ausnahme)
+
+    # Kennungen der erfolgreichen Downloads auch dann sichern, wenn andere fehlschlagen
+    kennungen.update({name: kennung for name, (_, kennung) in ergebnisse.items()})
+    schreibe_kennungen(ordner, kennungen)
+    if fehler:
+        raise fehler[0]
+    return {name: zustand for name, (zustand, _) in ergebnisse.items()}
+
+
+def schreibe_kennungen(ordner, kennungen):
+    """
+    Schreibe ETag und Last-Modified aller Dateien atomar nach .kennungen.json
+
+    :param ordner: Ordner daten
+    :type ordner: pathlib.Path
+    :param kennungen: Dateiname → ETag und Last-Modified
+    :type kennungen: dict
+    """
+    temporaer = ordner / f"{KENNUNGEN}.{os.getpid()}"
+    temporaer.write_text(json.dumps(kennungen, indent=1), encoding="utf-8")
+    os.replace(temporaer, ordner / KENNUNGEN)
+
+
+def erstelle_session(arbeiter) -> requests.Session:
+    """
+    Erstelle eine Session, deren Verbindungspool alle gleichzeitigen Downloads aufnimmt
+
+    :param arbeiter: Anzahl gleichzeitiger Downloads
+    :type arbeiter: int
+    :return: Session
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=arbeiter)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def lade_datei(session, url, datei, kennung) -> tuple:
+    """
+    Lade eine Datei mit bedingtem GET herunter. Der Inhalt wird stückweise in eine Teildatei geschrieben und erst nach
+    vollständiger Übertragung an ihren Platz verschoben. Die Kennung eines begonnenen Downloads liegt neben der
+    Teildatei, so wird eine abgebrochene Teildatei beim nächsten Aufruf fortgesetzt, sofern der Server Range-Anfragen
+    unterstützt und die Datei seitdem unverändert ist.
+
+    :param session: gemeinsame Session
+    :type session: requests.Session
+    :param url: Adresse der Datei
+    :type url: str
+    :param datei: Zieldatei
+    :type datei: pathlib.Path
+    :param kennung: ETag und Last-Modified des letzten Downloads
+    :type kennung: dict
+    :return: "neu", "aktualisiert" oder "unverändert" sowie die neue Kennung
+    :rtype: tuple
+    """
+    teil = datei.with_name(f"{datei.name}.teil")
+    teilkennung = datei.with_name(f"{datei.name}.teil.kennung")
+    begonnen = lies_teilkennung(teil, teilkennung)
+    validator = begonnen.get("ETag") or begonnen.get("Last-Modified")
+    kopfzeilen = {}
+    if validator:
+        # ein begonnener Download wird fortgesetzt, solange die Datei auf dem Server unverändert ist
+        kopfzeilen["Range"] = f"bytes={teil.stat().st_size}-"
+        kopfzeilen["If-Range"] = validator
+    elif datei.exists():
+        if "ETag" in kennung:
+            kopfzeilen["If-None-Match"] = kennung["ETag"]
+        kopfzeilen["If-Modified-Since"] = kennung.get(
+            "Last-Modified", formatdate(datei.stat().st_mtime, usegmt=True)
+        )
+
+    with session.get(url, headers=kopfzeilen, stream=True, timeout=TIMEOUT) as antwort:
+        if antwort.status_code == 304:
+            return "unverändert", kennung
+        if antwort.status_code == 416:
+            # die Teildatei ist bereits vollständig oder passt nicht mehr, neu beginnen
+            teil.unlink()
+            teilkennung.unlink(missing_ok=True)
+            return lade_datei(session, url, datei, kennung)
+        antwort.raise_for_status()
+        fortgesetzt = antwort.status_code == 206
+        kennung = {
+            schluessel: antwort.headers[schluessel]
+            for schluessel in ("ETag", "Last-Modified")
+            if schluessel in antwort.headers
+        } or (begonnen if fortgesetzt else {})
+        zustand = "aktualisiert" if datei.exists() else "neu"
+        if not fortgesetzt:
+            teilkennung.write_text(json.dumps(kennung), encoding="utf-8")
+        with open(teil, "ab" if fortgesetzt else "wb") as ziel:
+            for stueck in antwort.iter_content(chunk_size=STUECKGROESSE):
+                ziel.write(stueck)
+    os.replace(teil, datei)
+    teilkennung.unlink(missing_ok=True)
+    if "Last-Modified" in kennung:
+        zeitpunkt = parsedate_to_datetime(kennung["Last-Modified"]).timestamp()
+        os.utime(datei, (zeitpunkt, zeitpunkt))
+    return zustand, kennung
+
+
+def lies_teilkennung(teil, teilkennung) -> dict:
+    """
+    Kennung eines begonnenen Downloads, leer ohne Inhalt der Teildatei oder ohne lesbare Kennung
+
+    :param teil: Teildatei
+    :type teil: pathlib.Path
+    :param teilkennung: Datei mit ETag und Last-Modified beim Beginn des Downloads
+    :type teilkennung: pathlib.Path
+    :return: ETag und Last-Modified
+    :rtype: dict
+    """
+    if not teil.exists() or not teil.stat().st_size:
+        return {}
+    try:
+        return json.loads(teilkennung.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def lies_ergebnisse(datei) -> pd.DataFrame:
+    """
+    Lies die Ergebnisdatei (kerg2*.csv) des Bundeswahlleiters. Es werden nur die benötigten Spalten eingelesen, Namen
+    und Arten als kategorische Spalten.
+
+    :param datei: CSV-Datei
+    :type datei: pathlib.Path
+    :return: Daten des Bundeswahlleiters
+    :rtype: pd.DataFrame
+    """
+    return pd.read_csv(
+        datei,
+        delimiter=";",
+        skiprows=9,
+        encoding="utf8",
+        usecols=list(ERGEBNISSPALTEN),
+        dtype=ERGEBNISSPALTEN,
+    )
+
+
+def lies_kandidaten(datei) -> pd.DataFrame:
+    """
+    Lies die Kandidaturen des Bundeswahlleiters mit den benötigten Spalten
+
+    :param datei: CSV-Datei
+    :type datei: pathlib.Path
+    :return: Informationen zu allen Kandidaten
+    :rtype: pd.DataFrame
+    """
+    return pd.read_csv(
+        datei,
+        delimiter=";",
+        skiprows=8,
+        encoding="utf8",
+        usecols=list(KANDIDATENSPALTEN),
+        dtype=KANDIDATENSPALTEN,
+    )
 
 
 def schreibe_zweitstimmen(alle_ergebnisse, laender_yaml, pfad):
@@ -72,33 +280,33 @@ def schreibe_zweitstimmen(alle_ergebnisse, laender_yaml, pfad):
         :param pfad: Pfad des Arbeitsverzeichnisses
         :type pfad: pathlib.Path
     """
-    gesamt_tabelle = pd.DataFrame()
-    for land in laender_yaml.keys():
-        ergebnis = alle_ergebnisse[
-            (alle_ergebnisse["Gebietsname"] == land)
-            & (alle_ergebnisse["Gruppenart"] == "Partei")
-            & (alle_ergebnisse["Stimme"] == 2)
-        ]
-        ergebnis = ergebnis[["Gruppenname", "Anzahl"]]
-        ergebnis = ergebnis.set_index("Gruppenname")
-        if ergebnis["Anzahl"].sum() == 0:
-            # raise Exception(f'Noch keine Zahlen aus {land}!')
-            ergebnis["Anzahl"] = 1
-        ergebnis = ergebnis.rename(columns={"Anzahl": land})
-        gesamt_tabelle = pd.concat([gesamt_tabelle, ergebnis], axis=1)
-    gesamt_tabelle = gesamt_tabelle.fillna(0)
-    gesamt_tabelle = gesamt_tabelle.astype("int64")
+    laender = list(laender_yaml.keys())
+    ergebnis = alle_ergebnisse.loc[
+        alle_ergebnisse["Gebietsname"].isin(laender)
+        & (alle_ergebnisse["Gruppenart"] == "Partei")
+        & (alle_ergebnisse["Stimme"] == 2),
+        ["Gebietsname", "Gruppenname", "Anzahl"],
+    ].astype({"Gebietsname": "object", "Gruppenname": "object"})
+    # Parteien in der Reihenfolge ihres ersten Auftretens, Land für Land
+    reihenfolge = ergebnis["Gebietsname"].map(
+        {land: i for i, land in enumerate(laender)}
+    )
+    parteien = ergebnis["Gruppenname"].iloc[reihenfolge.argsort(kind="stable")].unique()
+    # Länder ohne Ergebnisse behalten 0 Stimmen, ihre Unterverteilung entfällt bis zur ersten Meldung
+    gesamt_tabelle = (
+        ergebnis.set_index(["Gruppenname", "Gebietsname"])["Anzahl"]
+        .unstack()
+        .reindex(index=parteien, columns=laender)
+        .fillna(0)
+        .astype("int64")
+    )
     if UNIONSMERGER:
         gesamt_tabelle.loc["CDU"] += gesamt_tabelle.loc["CSU"]  # Unionsmerger
         gesamt_tabelle.loc["CSU"] = 0  # Unionsmerger
-    with open(pfad / "Zweitstimme.yaml", "w", encoding="utf-8") as datei:
-        yaml.dump(
-            gesamt_tabelle.to_dict(),
-            datei,
-            sort_keys=False,
-            encoding="utf-8",
-            allow_unicode=True,
-        )
+    dump_yaml(
+        ((land, spalte.to_dict()) for land, spalte in gesamt_tabelle.items()),
+        pfad / "Zweitstimme.yaml",
+    )
 
 
 def schreibe_erststimme(alle_ergebnisse, laender_yaml, pfad):
@@ -112,37 +320,52 @@ def schreibe_erststimme(alle_ergebnisse, laender_yaml, pfad):
     :param pfad: Pfad des Arbeitsverzeichnisses
     :type pfad: pathlib.Path
     """
-    ergebnis = alle_ergebnisse[
+    dump_yaml(
+        erststimmen_je_land(alle_ergebnisse, laender_yaml), pfad / "Erststimme.yaml"
+    )
+
+
+def erststimmen_je_land(alle_ergebnisse, laender_yaml):
+    """
+    Bereite die Erststimmenergebnisse Land für Land auf
+
+    :param alle_ergebnisse: Daten des Bundeswahlleiters
+    :type alle_ergebnisse: pd.DataFrame
+    :param laender_yaml: Informationen zu den Bundesländern
+    :type laender_yaml: dict
+    :return: Generator über Land und Erststimmen je Wahlkreis und Partei
+    """
+    nummern = (
+        alle_ergebnisse[["Gebietsname", "Gebietsnummer"]]
+        .drop_duplicates(subset="Gebietsname")
+        .astype({"Gebietsname": "object"})
+        .set_index("Gebietsname")["Gebietsnummer"]
+    )
+    ergebnis = alle_ergebnisse.loc[
         (alle_ergebnisse["Gebietsart"] == "Wahlkreis")
         & (alle_ergebnisse["Gruppenart"] == "Partei")
-        & (alle_ergebnisse["Stimme"] == 1)
-    ]
+        & (alle_ergebnisse["Stimme"] == 1),
+        ["UegGebietsnummer", "Gebietsname", "Gruppenname", "Anzahl"],
+    ].astype({"Gebietsname": "object", "Gruppenname": "object"})
     if UNIONSMERGER:
         ergebnis = ergebnis.replace("CSU", "CDU")  # Unionsmerger
-    bundesergebnis = {}
+    gruppen = dict(list(ergebnis.groupby("UegGebietsnummer", sort=False)))
     for land in laender_yaml:
-        landesergebnis = pd.DataFrame()
-        nummer = (
-            alle_ergebnisse[alle_ergebnisse["Gebietsname"] == land]
-            .head(1)["Gebietsnummer"]
-            .values[0]
-        )
-        teilergebnis = ergebnis[ergebnis["UegGebietsnummer"] == nummer]
-        wahlkreise = teilergebnis.drop_duplicates(subset="Gebietsnummer")["Gebietsname"]
-        for kreis in wahlkreise:
-            kreisergebnis = teilergebnis[teilergebnis["Gebietsname"] == kreis][
-                ["Gruppenname", "Anzahl"]
-            ]
-            kreisergebnis = kreisergebnis.set_index("Gruppenname")
-            kreisergebnis = kreisergebnis.rename(columns={"Anzahl": kreis})
-            landesergebnis = pd.concat([landesergebnis, kreisergebnis], axis=1)
-        landesergebnis = landesergebnis.fillna(0)
-        landesergebnis = landesergebnis.astype("int64")
-        bundesergebnis.update({land: landesergebnis.to_dict()})
-    with open(pfad / "Erststimme.yaml", "w", encoding="utf-8") as datei:
-        yaml.dump(
-            bundesergebnis, datei, sort_keys=False, encoding="utf-8", allow_unicode=True
+        teilergebnis = gruppen.get(nummern[land])
+        if teilergebnis is None:
+            yield land, {}
+            continue
+        landesergebnis = (
+            teilergebnis.set_index(["Gruppenname", "Gebietsname"])["Anzahl"]
+            .unstack()
+            .reindex(
+                index=teilergebnis["Gruppenname"].unique(),
+                columns=teilergebnis["Gebietsname"].unique(),
+            )
+            .fillna(0)
+            .astype("int64")
         )
+        yield land, landesergebnis.to_dict()
 
 
 def schreibe_direktkandidaten(kandidaten, pfad):
@@ -154,27 +377,20 @@ def schreibe_direktkandidaten(kandidaten, pfad):
     :param pfad: Pfad des Arbeitsverzeichnisses
     :type pfad: pathlib.Path
     """
-    direkt = kandidaten.loc[kandidaten["Gebietsart"] == "Wahlkreis"]
-    kandidaten_dict = {}
-    for wahlkreis in direkt["Gebietsname"].drop_duplicates():
-        wahlkreis_dict = {}
-        for _, kandidat in direkt[direkt["Gebietsname"] == wahlkreis].iterrows():
-            wahlkreis_dict.update(
-                {
-                    kandidat["Gruppenname"]: ", ".join(
-                        [kandidat["Nachname"], kandidat["Vornamen"]]
-                    )
-                }
-            )
-        kandidaten_dict.update({wahlkreis: wahlkreis_dict})
-    with open(pfad / "Direktkandidaten.yaml", "w", encoding="utf-8") as datei:
-        yaml.dump(
-            kandidaten_dict,
-            datei,
-            sort_keys=False,
-            encoding="utf-8",
-            allow_unicode=True,
-        )
+    dump_yaml(direktkandidaten_je_wahlkreis(kandidaten), pfad / "Direktkandidaten.yaml")
+
+
+def direktkandidaten_je_wahlkreis(kandidaten):
+    """
+    Bereite die Direktkandidaten Wahlkreis für Wahlkreis auf
+
+    :param kandidaten: Informationen zu allen Kandidaten
+    :type kandidaten: pd.DataFrame
+    :return: Generator über Wahlkreis und Kandidat je Partei
+    """
+    direkt = kandidatennamen(kandidaten, "Wahlkreis")
+    for wahlkreis, gruppe in direkt.groupby("Gebietsname", sort=False):
+        yield wahlkreis, dict(zip(gruppe["Gruppenname"], gruppe["Name"]))
 
 
 def schreibe_listen(kandidaten, pfad):
@@ -186,30 +402,45 @@ def schreibe_listen(kandidaten, pfad):
     :param pfad: Pfad des Arbeitsverzeichnisses
     :type pfad: pathlib.Path
     """
-    liste = kandidaten.loc[kandidaten["Gebietsart"] == "Land"]
-    kandidaten_dict = {}
-    for land in liste["Gebietsname"].drop_duplicates():
-        land_dict = {}
-        for partei in liste[liste["Gebietsname"] == land][
-            "Gruppenname"
-        ].drop_duplicates():
-            partei_list = []
-            for _, kandidat in liste[
-                (liste["Gebietsname"] == land) & (liste["Gruppenname"] == partei)
-            ].iterrows():
-                partei_list.append(
-                    ", ".join([kandidat["Nachname"], kandidat["Vornamen"]])
-                )
-            land_dict.update({partei: partei_list})
-        kandidaten_dict.update({land: land_dict})
-    with open(pfad / "Listenkandidaten.yaml", "w", encoding="utf-8") as datei:
-        yaml.dump(
-            kandidaten_dict,
-            datei,
-            sort_keys=False,
-            encoding="utf-8",
-            allow_unicode=True,
-        )
+    dump_yaml(listen_je_land(kandidaten), pfad / "Listenkandidaten.yaml")
+
+
+def listen_je_land(kandidaten):
+    """
+    Bereite die Landeslisten Land für Land auf
+
+    :param kandidaten: Informationen zu allen Kandidaten
+    :type kandidaten: pd.DataFrame
+    :return: Generator über Land und Liste je Partei
+    """
+    liste = kandidatennamen(kandidaten, "Land")
+    for land, gruppe in liste.groupby("Gebietsname", sort=False):
+        yield land, {
+            partei: namen.tolist()
+            for partei, namen in gruppe.groupby("Gruppenname", sort=False)["Name"]
+        }
+
+
+def kandidatennamen(kandidaten, gebietsart) -> pd.DataFrame:
+    """
+    Wähle die Kandidaturen einer Gebietsart und bilde ihre Namen als "Nachname, Vornamen"
+
+    :param kandidaten: Informationen zu allen Kandidaten
+    :type kandidaten: pd.DataFrame
+    :param gebietsart: "Wahlkreis" oder "Land"
+    :type gebietsart: str
+    :return: Gebietsname, Gruppenname und Name je Kandidatur
+    :rtype: pd.DataFrame
+    """
+    auswahl = kandidaten.loc[
+        kandidaten["Gebietsart"] == gebietsart, ["Gebietsname", "Gruppenname"]
+    ].astype("object")
+    auswahl["Name"] = (
+        kandidaten["Nachname"].astype("object")
+        + ", "
+        + kandidaten["Vornamen"].astype("object")
+    )
+    return auswahl
 
 
 class MyHTMLParser(HTMLParser):
@@ -220,6 +451,7 @@ class MyHTMLParser(HTMLParser):
         self.flag = False
         self.url = url
         self.directory = directory
+        self.dateien = []
 
     def error(self, message):  # pylint: disable=missing-function-docstring
         print("Encountered an error:", message)
@@ -233,8 +465,5 @@ class MyHTMLParser(HTMLParser):
             self.flag = False
 
     def handle_data(self, data):
-        if self.flag:
-            datei = self.directory / data
-            if not datei.exists():
-                inhalt = requests.get(self.url + data)
-                datei.write_bytes(inhalt.content)
+        if self.flag and not data.endswith("/"):
+            self.dateien.append(data)
@@ -1,9 +1,26 @@
 """Dieses Modul stellt verschiedene Hilfsfunktionen für die Sitzverteilungsberechnung zur Verfügung"""
+
 import decimal
+import importlib
+import importlib.util
+import math
+import sys
+from fractions import Fraction
 from pathlib import Path
 
 import yaml
 
+# libyaml ist deutlich schneller, steht aber nicht in jeder Installation zur Verfügung
+try:
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
+    from yaml import SafeLoader as YamlLoader
+
+# Vorzugsreihenfolge der letzten Ziffer eines "schönen" Divisors
+SCHOENE_ZIFFERN = [5, 8, 6, 4, 2, 9, 7, 3, 1]
+
 
 def remove_exponent(zahl):
     """Wandle eine Dezimalzahl mit Exponent in eine Dezimalzahl ohne Exponent um
@@ -29,7 +46,7 @@ def nice_round(first, second) -> str:
     :return: "schöne" Zahl als string
     :rtype: str
     """
-    # check if arguments are floats and bring them in correct order. just return the value if both are identical
+    # check if arguments are numbers. just return the value if both are identical
     if not isinstance(first, (float, int, decimal.Decimal)) or not isinstance(
         second, (float, int, decimal.Decimal)
     ):
@@ -38,43 +55,87 @@ def nice_round(first, second) -> str:
         ) from None
     if first == second:
         return str(first)
-    first, second = sorted((first, second))
-
-    # make them strings and compare dimensions
-    first = str(first)
-    second = str(second)
-    first = first if "." in first else f"{first}."
-    second = second if "." in second else f"{second}."
-    pre_decimal = len(first.split(".")[0]) - len(second.split(".")[0])
-    post_decimal = len(first.split(".")[1]) - len(second.split(".")[1])
-
-    if pre_decimal < 0:
-        first = "".join(["0" * abs(pre_decimal), first])
-    elif pre_decimal > 0:
-        second = "".join(["0" * abs(pre_decimal), second])
-
-    if post_decimal < 0:
-        first = "".join([first, "0" * abs(post_decimal)])
-    elif pre_decimal > 0:
-        second = "".join([second, "0" * abs(post_decimal)])
-
-    # finally, compare numbers digit-wise
-    resulting_number = ""
-    for first_digit, second_digit in zip(first, second):
-        if first_digit == second_digit:
-            resulting_number = "".join([resulting_number, first_digit])
-        else:
-            for nice_digit in [5, 8, 6, 4, 2, 9, 7, 5, 3, 1, 0]:
-                if nice_digit in range(int(first_digit) + 1, int(second_digit) + 1):
-                    resulting_number = "".join([resulting_number, str(nice_digit)])
-                    if "." not in resulting_number:
-                        adding_zeros = len(first.split(".")[0]) - len(resulting_number)
-                        resulting_number = "".join(
-                            [resulting_number, "0" * adding_zeros]
-                        )
-                    break
-            break
-    return resulting_number
+    # Gleitkommazahlen gelten mit ihrer Dezimaldarstellung
+    first, second = (
+        decimal.Decimal(repr(zahl)) if isinstance(zahl, float) else zahl
+        for zahl in (first, second)
+    )
+    return str(rundeste_zahl(first, second))
+
+
+def rundeste_zahl(untergrenze, obergrenze) -> decimal.Decimal:
+    """
+    Bestimme die "schönste" Zahl im Intervall (untergrenze, obergrenze]. Die Grenzen werden als exakte Brüche
+    behandelt: Ab der höchsten Dezimalstelle, in der sie sich unterscheiden, wird die erste Ziffer aus 5, 8, 6, 4, 2, 9,
+    7, 3, 1 gewählt, die größer als die Ziffer der Untergrenze und höchstens so groß wie die der Obergrenze ist, alle
+    folgenden Stellen werden 0.
+
+    :param untergrenze: untere Grenze, z.B. int, Fraction oder decimal.Decimal
+    :param obergrenze: obere Grenze
+    :return: "schöne" Zahl
+    :rtype: decimal.Decimal
+    """
+    untergrenze, obergrenze = sorted((Fraction(untergrenze), Fraction(obergrenze)))
+    if untergrenze == obergrenze:
+        return remove_exponent(
+            decimal.Decimal(untergrenze.numerator) / untergrenze.denominator
+        )
+
+    # höchste Stelle 10^stelle, in der sich die Grenzen unterscheiden
+    stelle = len(str(math.floor(obergrenze))) - 1
+    while abschneiden(untergrenze, stelle) == abschneiden(obergrenze, stelle):
+        stelle -= 1
+    praefix = abschneiden(untergrenze, stelle + 1)
+    unten = abschneiden(untergrenze, stelle) - 10 * praefix
+    oben = abschneiden(obergrenze, stelle) - 10 * praefix
+    ziffer = next(ziffer for ziffer in SCHOENE_ZIFFERN if unten < ziffer <= oben)
+    if stelle >= 0:
+        return decimal.Decimal((10 * praefix + ziffer) * 10**stelle)
+    return decimal.Decimal(f"{10 * praefix + ziffer}E{stelle}")
+
+
+def abschneiden(zahl: Fraction, stelle: int) -> int:
+    """
+    Schneide eine nichtnegative Zahl vor der Dezimalstelle 10^stelle ab: ⌊zahl / 10^stelle⌋
+
+    :param zahl: Zahl
+    :param stelle: Exponent der letzten behaltenen Stelle
+    :return: abgeschnittene Zahl
+    """
+    if stelle >= 0:
+        return zahl.numerator // (zahl.denominator * 10**stelle)
+    return zahl.numerator * 10**-stelle // zahl.denominator
+
+
+class _VerzoegertesModul:  # pylint: disable=too-few-public-methods
+    """
+    Stellvertreter eines noch nicht importierten Moduls. Der erste fehlende Attributzugriff importiert das Modul mit
+    importlib, danach teilt der Stellvertreter dessen Namensraum. Greifen mehrere Threads gleichzeitig zu, warten sie
+    auf den vollständigen Import, anders als bei importlib.util.LazyLoader vor Python 3.12.
+    """
+
+    def __init__(self, name: str):
+        self.__name__ = name
+
+    def __getattr__(self, attribut: str):
+        modul = importlib.import_module(self.__name__)
+        self.__dict__ = modul.__dict__
+        return getattr(modul, attribut)
+
+
+def lade_bei_bedarf(name: str):
+    """
+    Importiere ein Modul erst beim ersten Zugriff auf eines seiner Attribute. So bleibt etwa pandas ungeladen, solange
+    nur mit Arrays gerechnet wird.
+
+    :param name: Name des Moduls, z. B. "pandas"
+    :return: Modul, falls es bereits geladen ist, sonst ein Stellvertreter, der es beim ersten Attributzugriff lädt
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return _VerzoegertesModul(name)
 
 
 def load_yaml(filename: str | Path):
@@ -85,10 +146,29 @@ def load_yaml(filename: str | Path):
     :return: Daten aus Datei
     """
     with open(filename, "r", encoding="utf8") as file:
-        yaml_data = yaml.load(file, Loader=yaml.SafeLoader)
+        yaml_data = yaml.load(file, Loader=YamlLoader)
     return yaml_data
 
 
+def dump_yaml(abschnitte, filename: str | Path):
+    """
+    Schreibe eine .yaml Datei abschnittsweise. Jeder Abschnitt wird sofort als Eintrag der obersten Ebene geschrieben,
+    das Ergebnis entspricht dem Schreiben des vollständigen dict.
+
+    :param abschnitte: Paare aus Schlüssel und Inhalt, z.B. ein Generator über die Länder
+    :param filename: Dateiname
+    """
+    with open(filename, "w", encoding="utf-8") as file:
+        for schluessel, inhalt in abschnitte:
+            yaml.dump(
+                {schluessel: inhalt},
+                file,
+                Dumper=YamlDumper,
+                sort_keys=False,
+                allow_unicode=True,
+            )
+
+
 def sort_two(eins: int, zwei: int) -> [int, int]:
     """
     Hilfsfunktion: Sortiere zwei Ganzzahlen
@@ -0,0 +1,454 @@
+"""Dieses Modul besetzt die Sitze mit den Bewerbern aus Direktkandidaten.yaml und Listenkandidaten.yaml. Alle Bewerber
+werden einmal vorab nummeriert und mit Direktkandidatur und Listenplatz indiziert. Die Wahlkreissieger erhalten ihr
+Direktmandat, die übrigen Sitze einer Partei in einem Land gehen in Listenreihenfolge an die Bewerber der Landesliste,
+die nicht bereits in einem Wahlkreis gewählt sind. Reicht eine Liste nicht aus, bleiben die Sitze unbesetzt. Die
+Besetzung läuft für alle Szenarien eines Blocks gemeinsam über Arrays, ihr Aufwand wächst linear mit der Länge der
+Listen."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+from sitzverteilung.rechner.ganzzahl import SAINTE_LAGUE
+from sitzverteilung.rechner.verfahren import zuteilungsregel
+from sitzverteilung.simulation import (
+    berechne_szenarien,
+    verteile_mit_los,
+    zaehle_direktmandate,
+    ziehe_szenarien,
+)
+from sitzverteilung.sitzverteilung import setze_einstellungen
+from sitzverteilung.wahldaten import (
+    Wahldaten,
+    lade_wahldaten,
+    positionen,
+    pruefe_laender,
+)
+from sitzverteilung.zwischenspeicher import (
+    direktkandidaten_als_arrays,
+    lade_arrays,
+    listen_als_arrays,
+)
+
+pd = lade_bei_bedarf("pandas")
+
+UNBEKANNT = "N. N."
+
+
+@dataclass
+class Kandidatenindex:  # pylint: disable=too-many-instance-attributes
+    """
+    Alle Bewerber einer Wahl mit Direktkandidatur und Listenplatz. Ein Bewerber ist durch Land, Partei und Namen
+    bestimmt, so werden Direktkandidaten ihrem Platz auf der Landesliste ihrer Partei zugeordnet.
+    """
+
+    namen: np.ndarray  # Name je Bewerber
+    partei: np.ndarray  # Zeile in Wahldaten.parteien je Bewerber
+    land: np.ndarray  # Land je Bewerber
+    wahlkreis: np.ndarray  # Wahlkreis der Direktkandidatur je Bewerber, -1 für keine
+    listenplatz: np.ndarray  # Platz auf der Landesliste je Bewerber ab 1, 0 für keinen
+    direkt: np.ndarray  # Bewerber je Partei × Wahlkreis, -1 für keinen bekannten
+    # Bewerber aller Landeslisten hintereinander, geordnet nach Partei, dann Land
+    liste: np.ndarray
+    # erster Eintrag je Liste Partei · Länder + Land in liste, zuletzt das Ende
+    listen_versatz: np.ndarray
+
+    @property
+    def listenfeld(self) -> np.ndarray:
+        """Liste Partei · Länder + Land je Eintrag in liste"""
+        return np.repeat(
+            np.arange(len(self.listen_versatz) - 1), np.diff(self.listen_versatz)
+        )
+
+
+@dataclass
+class Besetzung:
+    """Besetzung der Sitze aller Szenarien eines Blocks"""
+
+    # Szenario × Wahlkreis, gewählter Bewerber, -1 ohne Sieger oder ohne bekannten Bewerber
+    direkt: np.ndarray
+    liste: np.ndarray  # Szenario × Eintrag in Kandidatenindex.liste, gewählt
+    gewaehlt: np.ndarray  # Szenario × Bewerber
+    unbesetzt: np.ndarray  # Szenario × Partei × Land, Sitze ohne verbliebene Bewerber
+
+    @classmethod
+    def verbinde(cls, bloecke):
+        """
+        Füge die Besetzungen mehrerer Blöcke von Szenarien zusammen
+
+            :param list bloecke: Besetzungen zum selben Kandidatenindex
+            :return: Besetzung aller Szenarien
+        """
+        return cls(
+            np.concatenate([block.direkt for block in bloecke]),
+            np.concatenate([block.liste for block in bloecke]),
+            np.concatenate([block.gewaehlt for block in bloecke]),
+            np.concatenate([block.unbesetzt for block in bloecke]),
+        )
+
+
+def lade_kandidatenindex(pfad, daten: Wahldaten = None) -> Kandidatenindex:
+    """
+    Lade Direktkandidaten.yaml und Listenkandidaten.yaml über den Zwischenspeicher und nummeriere alle Bewerber
+
+        :param pfad: Verzeichnispfad
+        :param daten: bereits geladene Eingabedaten, sonst werden sie geladen
+        :return: Kandidatenindex
+    """
+    pfad = Path(pfad)
+    daten = daten or lade_wahldaten(pfad)
+    return erstelle_kandidatenindex(
+        daten,
+        lade_arrays(pfad / "Direktkandidaten.yaml", direktkandidaten_als_arrays),
+        lade_arrays(pfad / "Listenkandidaten.yaml", listen_als_arrays),
+    )
+
+
+def erstelle_kandidatenindex(  # pylint: disable=too-many-locals
+    daten: Wahldaten, direkt: dict, listen: dict
+) -> Kandidatenindex:
+    """
+    Nummeriere alle Bewerber und ordne ihnen Direktkandidatur und Listenplatz zu. Kandidaturen in Wahlkreisen, die in
+    Erststimme.yaml fehlen, und für Parteien ohne Stimmen können keinen Sitz erhalten und werden übergangen.
+
+        :param daten: Eingabedaten der Wahl
+        :param direkt: Arrays aus direktkandidaten_als_arrays
+        :param listen: Arrays aus listen_als_arrays
+        :return: Kandidatenindex
+    """
+    laender = len(daten.laender)
+    bewerber: dict = {}
+    namen, partei, land, wahlkreis, listenplatz = [], [], [], [], []
+
+    def nummer(schluessel: tuple) -> int:
+        if schluessel not in bewerber:
+            bewerber[schluessel] = len(namen)
+            land.append(schluessel[0])
+            partei.append(schluessel[1])
+            namen.append(schluessel[2])
+            wahlkreis.append(-1)
+            listenplatz.append(0)
+        return bewerber[schluessel]
+
+    # Landeslisten in der Reihenfolge Partei · Länder + Land
+    listen_land = pruefe_laender(
+        daten.laender, listen["laender"], "Listenkandidaten.yaml"
+    )
+    listen_partei = positionen(daten.parteien, listen["parteien"])
+    feld = listen_partei * laender + listen_land
+    liste = []
+    laengen = np.zeros(len(daten.parteien) * laender, dtype="int64")
+    for block in np.argsort(feld, kind="stable"):
+        if listen_partei[block] < 0:
+            continue
+        anfang, ende = listen["versatz"][block : block + 2]
+        for platz, name in enumerate(listen["namen"][anfang:ende].tolist(), 1):
+            kandidat = nummer(
+                (int(listen_land[block]), int(listen_partei[block]), name)
+            )
+            listenplatz[kandidat] = platz
+            liste.append(kandidat)
+        laengen[feld[block]] = ende - anfang
+
+    # Direktkandidaturen, Wahlkreise über ihren Namen
+    spalten = positionen(daten.wahlkreisnamen, direkt["wahlkreise"])
+    if (
+        len(np.unique(daten.wahlkreisnamen[spalten[spalten >= 0]]))
+        < (spalten >= 0).sum()
+    ):
+        raise ValueError("Direktkandidaten.yaml enthält Wahlkreise mehrfach")
+    kandidatur_spalte = np.repeat(spalten, np.diff(direkt["versatz"]))
+    kandidatur_partei = positionen(daten.parteien, direkt["parteien"])
+    wahlkreis_land = daten.wahlkreis_land
+    direktkandidat = np.full(daten.erststimmen.shape, -1, dtype="int64")
+    for spalte, zeile, name in zip(
+        kandidatur_spalte.tolist(),
+        kandidatur_partei.tolist(),
+        direkt["namen"].tolist(),
+    ):
+        if spalte >= 0 and zeile >= 0:
+            kandidat = nummer((int(wahlkreis_land[spalte]), zeile, name))
+            wahlkreis[kandidat] = spalte
+            direktkandidat[zeile, spalte] = kandidat
+
+    return Kandidatenindex(
+        np.array(namen, dtype=str),
+        np.array(partei, dtype="int64"),
+        np.array(land, dtype="int64"),
+        np.array(wahlkreis, dtype="int64"),
+        np.array(listenplatz, dtype="int64"),
+        direktkandidat,
+        np.array(liste, dtype="int64"),
+        np.concatenate(([0], np.cumsum(laengen))),
+    )
+
+
+def zweite_unterverteilung(  # pylint: disable=too-many-locals
+    sitze, zweitstimmen, direktmandate, rng, regel=SAINTE_LAGUE
+) -> np.ndarray:
+    """
+    Verteile die Sitze jeder Partei auf ihre Landeslisten. Jede Liste erhält mindestens die Direktmandate der Partei im
+    Land: Länder, deren Anteil darunter liegt, werden auf die Direktmandate festgesetzt und die übrigen Sitze erneut
+    auf die anderen Länder verteilt, bis keine Liste mehr darunter liegt. Länder ohne Zweitstimmen erhalten so nur ihre
+    Direktmandate. Alle Parteien aller Szenarien werden gemeinsam als Spalten verteilt.
+
+        :param np.ndarray sitze: Sitze je Szenario und Partei
+        :param np.ndarray zweitstimmen: Zweitstimmen je Szenario, Partei und Land
+        :param np.ndarray direktmandate: Direktmandate in gleicher Form
+        :param np.random.Generator rng: Zufallsgenerator für Lose
+        :param Zuteilungsregel regel: Zuteilungsregel, standardmäßig Sainte-Laguë
+        :return: Sitze je Szenario, Partei und Land
+        :rtype: np.ndarray
+    """
+    landessitze = np.zeros(zweitstimmen.shape, dtype="int64")
+    szenario, partei = np.nonzero(sitze > 0)
+    # Land (Zeilen) × Partei eines Szenarios (Spalten)
+    stimmen = zweitstimmen[szenario, partei].T
+    mindest = direktmandate[szenario, partei].T
+    fest = np.zeros(stimmen.shape, dtype=bool)
+    while True:
+        rest = sitze[szenario, partei] - (mindest * fest).sum(axis=0)
+        frei = np.where(fest, 0, stimmen)
+        offen = np.flatnonzero((rest > 0) & (frei.sum(axis=0) > 0))
+        verteilung = np.where(fest, mindest, 0)
+        if len(offen):
+            verteilung[:, offen] += verteile_mit_los(
+                frei[:, offen], rest[offen], rng, regel
+            )
+        neu = ~fest & (verteilung < mindest)
+        if not neu.any():
+            break
+        fest |= neu
+    landessitze[szenario, partei] = verteilung.T
+    return landessitze
+
+
+def besetze(  # pylint: disable=too-many-locals
+    index: Kandidatenindex, sieger, landessitze, direktmandate
+) -> Besetzung:
+    """
+    Besetze die Sitze aller Szenarien: zuerst die Direktmandate, dann die Landeslisten in Listenreihenfolge ohne die
+    bereits im Wahlkreis gewählten Bewerber
+
+        :param index: Kandidatenindex
+        :param np.ndarray sieger: Zeile der siegreichen Partei je Szenario und Wahlkreis, -1 für keine
+        :param np.ndarray landessitze: Sitze je Szenario, Partei und Land, alle Parteien des Kandidatenindex
+        :param np.ndarray direktmandate: Direktmandate in gleicher Form
+        :return: Besetzung
+    """
+    anzahl, wahlkreise = sieger.shape
+    direkt = np.where(
+        sieger >= 0, index.direkt[np.maximum(sieger, 0), np.arange(wahlkreise)], -1
+    )
+    gewaehlt = np.zeros((anzahl, len(index.namen)), dtype=bool)
+    szenario, wahlkreis = np.nonzero(direkt >= 0)
+    gewaehlt[szenario, direkt[szenario, wahlkreis]] = True
+
+    # Nur Listen, die in mindestens einem Szenario Sitze brauchen, zusammenhängend wie in index.liste
+    bedarf = np.maximum(landessitze - direktmandate, 0).reshape(anzahl, -1)
+    feld = index.listenfeld
+    aktiv = np.flatnonzero(bedarf.any(axis=0)[feld])
+    grenzen = np.searchsorted(aktiv, index.listen_versatz)
+
+    # Rang der noch nicht gewählten Bewerber innerhalb ihrer Liste über kumulierte Summen je Liste
+    frei = ~gewaehlt[:, index.liste[aktiv]]
+    summe = np.zeros((anzahl, len(aktiv) + 1), dtype="int64")
+    np.cumsum(frei, axis=1, out=summe[:, 1:])
+    rang = summe[:, 1:] - summe[:, grenzen[feld[aktiv]]]
+    liste = np.zeros((anzahl, len(index.liste)), dtype=bool)
+    liste[:, aktiv] = frei & (rang <= bedarf[:, feld[aktiv]])
+    szenario, eintrag = np.nonzero(liste)
+    gewaehlt[szenario, index.liste[eintrag]] = True
+
+    verfuegbar = summe[:, grenzen[1:]] - summe[:, grenzen[:-1]]
+    unbesetzt = np.maximum(bedarf - verfuegbar, 0).reshape(landessitze.shape)
+    return Besetzung(direkt, liste, gewaehlt, unbesetzt)
+
+
+def besetze_szenarien(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    daten, index, einstellungen, zweitstimmen, erststimmen, rng
+):
+    """
+    Berechne die Sitzverteilung für einen Block von Szenarien und besetze die Sitze
+
+        :param Wahldaten daten: Eingabedaten
+        :param Kandidatenindex index: Kandidatenindex zu den Eingabedaten
+        :param dict einstellungen: Einstellungen aus setze_einstellungen
+        :param np.ndarray zweitstimmen: Zweitstimmen je Szenario, Partei und Land
+        :param np.ndarray erststimmen: Erststimmen je Szenario, Partei und Wahlkreis
+        :param np.random.Generator rng: Zufallsgenerator für Lose
+        :return: Sitzverteilung und Besetzung des Blocks
+        :rtype: (Simulation, Besetzung)
+    """
+    simulation = berechne_szenarien(
+        daten, einstellungen, zweitstimmen, erststimmen, rng
+    )
+    direktmandate = zaehle_direktmandate(
+        simulation.wahlkreissieger,
+        daten.wahlkreis_land,
+        len(daten.parteien),
+        len(daten.laender),
+    )
+    parteien = zweitstimmen.shape[1]
+    landessitze = np.zeros(direktmandate.shape, dtype="int64")
+    landessitze[:, :parteien] = zweite_unterverteilung(
+        simulation.sitze,
+        zweitstimmen,
+        direktmandate[:, :parteien],
+        rng,
+        zuteilungsregel(einstellungen["verfahren"]),
+    )
+    return simulation, besetze(
+        index, simulation.wahlkreissieger, landessitze, direktmandate
+    )
+
+
+def abgeordnete(pfad, seed=None) -> pd.DataFrame:
+    """
+    Bestimme die gewählten Abgeordneten für die unveränderten Eingabedaten im Verzeichnis. Lose werden mit dem
+    Zufallsgenerator gezogen.
+
+        :param pfad: Verzeichnispfad
+        :param seed: Startwert des Zufallsgenerators für Lose
+        :return: Tabelle mit Partei, Land, Mandat, Wahlkreis, Listenplatz und Name je Sitz
+    """
+    pfad = Path(pfad)
+    rng = np.random.default_rng(seed)
+    daten = lade_wahldaten(pfad)
+    index = lade_kandidatenindex(pfad, daten)
+    simulation, besetzung = besetze_szenarien(
+        daten,
+        index,
+        setze_einstellungen(pfad),
+        daten.zweitstimmen[np.newaxis],
+        daten.erststimmen[np.newaxis],
+        rng,
+    )
+    return abgeordnetentabelle(daten, index, simulation.wahlkreissieger, besetzung)
+
+
+def wahlchancen(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    pfad,
+    anzahl=1000,
+    konzentration=2000,
+    konzentration_erststimmen=500,
+    seed=None,
+    blockgroesse=500,
+) -> pd.DataFrame:
+    """
+    Simuliere viele Wahlausgänge wie simuliere und bestimme je Bewerber den Anteil der Szenarien, in denen er ein
+    Direktmandat erhält oder überhaupt gewählt wird
+
+        :param pfad: Verzeichnispfad
+        :param anzahl: Anzahl der Szenarien
+        :param konzentration: Konzentrationsparameter der Zweitstimmen, None für unveränderte Stimmen
+        :param konzentration_erststimmen: Konzentrationsparameter der Erststimmen, None für unveränderte Stimmen
+        :param seed: Startwert des Zufallsgenerators
+        :param blockgroesse: Anzahl gemeinsam berechneter Szenarien, begrenzt den Speicherbedarf
+        :return: Tabelle mit Partei, Land, Name, Wahlkreis, Listenplatz, Direktmandat und Gewählt je Bewerber
+    """
+    pfad = Path(pfad)
+    rng = np.random.default_rng(seed)
+    daten = lade_wahldaten(pfad)
+    index = lade_kandidatenindex(pfad, daten)
+    einstellungen = setze_einstellungen(pfad)
+    direkt = np.zeros(len(index.namen), dtype="int64")
+    gewaehlt = np.zeros(len(index.namen), dtype="int64")
+    for zweitstimmen, erststimmen in ziehe_szenarien(
+        daten, anzahl, (konzentration, konzentration_erststimmen), rng, blockgroesse
+    ):
+        _, besetzung = besetze_szenarien(
+            daten, index, einstellungen, zweitstimmen, erststimmen, rng
+        )
+        direkt += np.bincount(
+            besetzung.direkt[besetzung.direkt >= 0], minlength=len(index.namen)
+        )
+        gewaehlt += besetzung.gewaehlt.sum(axis=0)
+    return pd.DataFrame(
+        {
+            "Partei": daten.parteien[index.partei],
+            "Land": daten.laender[index.land],
+            "Name": index.namen,
+            "Wahlkreis": np.where(
+                index.wahlkreis >= 0, daten.wahlkreisnamen[index.wahlkreis], ""
+            ),
+            "Listenplatz": listenplaetze(index.listenplatz),
+            "Direktmandat": direkt / anzahl,
+            "Gewählt": gewaehlt / anzahl,
+        }
+    )
+
+
+def listenplaetze(listenplatz: np.ndarray) -> pd.api.extensions.ExtensionArray:
+    """
+    Listenplätze als Spalte einer Tabelle, fehlend für Bewerber ohne Listenplatz
+
+        :param listenplatz: Listenplätze ab 1, 0 für keinen
+        :return: Listenplätze mit pd.NA statt 0
+    """
+    return pd.arrays.IntegerArray(listenplatz, listenplatz == 0)
+
+
+def abgeordnetentabelle(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    daten: Wahldaten,
+    index: Kandidatenindex,
+    sieger: np.ndarray,
+    besetzung: Besetzung,
+    szenario: int = 0,
+) -> pd.DataFrame:
+    """
+    Gewählte Abgeordnete und unbesetzte Sitze eines Szenarios als Tabelle, geordnet nach Partei und Land. Für
+    Wahlkreissieger ohne Eintrag in Direktkandidaten.yaml steht N. N.
+
+        :param daten: Eingabedaten
+        :param index: Kandidatenindex
+        :param sieger: Zeile der siegreichen Partei je Szenario und Wahlkreis, -1 für keine
+        :param besetzung: Besetzung
+        :param szenario: Nummer des Szenarios
+        :return: Tabelle mit Partei, Land, Mandat, Wahlkreis, Listenplatz und Name je Sitz, ohne Listenplatz fehlt
+            dieser
+    """
+    wahlkreis = np.flatnonzero(sieger[szenario] >= 0)
+    direkt = besetzung.direkt[szenario, wahlkreis]
+    liste = index.liste[np.flatnonzero(besetzung.liste[szenario])]
+    feld = np.repeat(
+        np.arange(besetzung.unbesetzt[szenario].size),
+        besetzung.unbesetzt[szenario].ravel(),
+    )
+    laender = len(daten.laender)
+
+    namen = np.append(index.namen, UNBEKANNT)
+    listenplatz = np.append(index.listenplatz, 0)
+    tabelle = pd.DataFrame(
+        {
+            "Partei": np.concatenate(
+                [sieger[szenario, wahlkreis], index.partei[liste], feld // laender]
+            ),
+            "Land": np.concatenate(
+                [daten.wahlkreis_land[wahlkreis], index.land[liste], feld % laender]
+            ),
+            "Mandat": ["Wahlkreis"] * len(wahlkreis)
+            + ["Liste"] * len(liste)
+            + ["unbesetzt"] * len(feld),
+            "Wahlkreis": daten.wahlkreisnamen[wahlkreis].tolist()
+            + [""] * (len(liste) + len(feld)),
+            "Listenplatz": listenplaetze(
+                np.concatenate(
+                    [
+                        listenplatz[direkt],
+                        listenplatz[liste],
+                        np.zeros(len(feld), "int64"),
+                    ]
+                )
+            ),
+            "Name": namen[direkt].tolist() + namen[liste].tolist() + [""] * len(feld),
+        }
+    )
+    tabelle = tabelle.sort_values(["Partei", "Land"], kind="stable", ignore_index=True)
+    tabelle["Partei"] = daten.parteien[tabelle["Partei"]]
+    tabelle["Land"] = daten.laender[tabelle["Land"]]
+    return tabelle
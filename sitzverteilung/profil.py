@@ -0,0 +1,136 @@
+"""Dieses Modul misst die Stufen einer Berechnung und zählt Ereignisse wie Verteilungen, Schritte der Oberverteilung,
+Diskrepanzabbau und Lose. Gemeldet wird an registrierte Beobachter, also Funktionen (art, name, wert). Ohne
+Beobachter kehren alle Messpunkte sofort zurück, die Berechnung bleibt unverändert."""
+
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Callable
+
+Beobachter = Callable[[str, str, float], None]
+
+_BEOBACHTER: list[Beobachter] = []
+_TIEFE = threading.local()
+
+
+def melde(art: str, name: str, wert: float = 1):
+    """
+    Gib ein Ereignis an alle Beobachter weiter
+
+        :param art: "stufe" (Dauer in Sekunden), "zaehler" (Anzahl) oder "tiefe" (aktuelle Rekursionstiefe)
+        :param name: Name der Stufe bzw. des Zählers
+        :param wert: Dauer, Anzahl oder Tiefe
+    """
+    for beobachter in _BEOBACHTER:
+        beobachter(art, name, wert)
+
+
+def zaehle(name: str, anzahl: float = 1):
+    """
+    Erhöhe einen Zähler um anzahl
+
+        :param name: Name des Zählers
+        :param anzahl: Erhöhung
+    """
+    if _BEOBACHTER:
+        melde("zaehler", name, anzahl)
+
+
+@contextmanager
+def stufe(name: str):
+    """
+    Miss die Dauer des umschlossenen Blocks als Stufe
+
+        :param name: Name der Stufe
+    """
+    if not _BEOBACHTER:
+        yield
+        return
+    beginn = time.perf_counter()
+    try:
+        yield
+    finally:
+        melde("stufe", name, time.perf_counter() - beginn)
+
+
+@contextmanager
+def rekursion(name: str):
+    """
+    Verfolge die Rekursionstiefe einer Funktion je Thread, gemeldet wird die Tiefe beim Eintritt
+
+        :param name: Name der Rekursion
+    """
+    if not _BEOBACHTER:
+        yield
+        return
+    tiefen = _TIEFE.__dict__.setdefault("tiefen", Counter())
+    tiefen[name] += 1
+    try:
+        melde("tiefe", name, tiefen[name])
+        yield
+    finally:
+        tiefen[name] -= 1
+
+
+@contextmanager
+def registriere(beobachter: Beobachter):
+    """
+    Melde Ereignisse für die Dauer des Blocks an beobachter
+
+        :param beobachter: Funktion (art, name, wert)
+    """
+    _BEOBACHTER.append(beobachter)
+    try:
+        yield beobachter
+    finally:
+        _BEOBACHTER.remove(beobachter)
+
+
+class Profil:
+    """Beobachter, der Dauer und Aufrufe je Stufe, Zähler und größte Rekursionstiefen sammelt"""
+
+    def __init__(self):
+        self.dauer: defaultdict = defaultdict(float)
+        self.aufrufe: Counter = Counter()
+        self.zaehler: Counter = Counter()
+        self.tiefe: Counter = Counter()
+        self._sperre = threading.Lock()
+
+    def __call__(self, art: str, name: str, wert: float = 1):
+        with self._sperre:
+            if art == "stufe":
+                self.dauer[name] += wert
+                self.aufrufe[name] += 1
+            elif art == "zaehler":
+                self.zaehler[name] += wert
+            elif art == "tiefe":
+                self.tiefe[name] = max(self.tiefe[name], wert)
+
+    def bericht(self) -> str:
+        """
+        Stufen in der Reihenfolge ihres ersten Abschlusses, danach Zähler und Rekursionstiefen
+
+            :return: Tabelle als Text
+        """
+        zeilen = [f"{'Stufe':<32}{'Aufrufe':>9}{'Dauer':>12}"]
+        zeilen += [
+            f"{name:<32}{self.aufrufe[name]:>9}{1000 * dauer:>9.1f} ms"
+            for name, dauer in self.dauer.items()
+        ]
+        zeilen += [f"{name:<32}{anzahl:>9}" for name, anzahl in self.zaehler.items()]
+        zeilen += [
+            f"{name:<32}{tiefe:>9} (größte Tiefe)" for name, tiefe in self.tiefe.items()
+        ]
+        return "\n".join(zeilen)
+
+
+@contextmanager
+def profiliere():
+    """
+    Sammle alle Ereignisse des Blocks in einem Profil
+
+        :return: Profil, gefüllt nach Ende des Blocks
+    """
+    with registriere(Profil()) as profil:
+        yield profil
@@ -1,11 +1,16 @@
 """Gesammelte Methoden für die Berechnung von Divisormethoden. Derzeit nur Standardrundung."""
 
+from __future__ import annotations
+
 import decimal
 
 import numpy as np
-import pandas as pd
 
-from sitzverteilung.hilfsmittel import nice_round, remove_exponent, sort_two
+from sitzverteilung.hilfsmittel import lade_bei_bedarf, rundeste_zahl, sort_two
+from sitzverteilung.profil import rekursion, zaehle
+from sitzverteilung.rechner.verteilungsspeicher import SPEICHER
+
+pd = lade_bei_bedarf("pandas")
 
 HALB = decimal.Decimal("0.5")
 
@@ -20,50 +25,57 @@ def sainte_lague_divisor(
         :param pd.DataFrame tabelle: Dataframe mit Stimmenverteilung
         :return: Dataframe erweitert um Sitzverteilung, Liste für Verlosung
     """
-    # initiiere decimal-modul und übertrage Zahlen in decimal. Decimal ist hier notwendig für exaktes runden.
-    decimal.setcontext(decimal.Context(rounding=decimal.ROUND_HALF_UP))
-    tabelle = tabelle.applymap(decimal.Decimal)
-    lose = []
-
-    # bestimme vorläufigen Divisor und ermittle die entsprechende Sitzanzahl
-    divisor = tabelle["Stimmen"].sum() / sitze
-    tabelle["Sitze"] = (tabelle["Stimmen"] / divisor).map(
-        decimal.Decimal.to_integral_value
-    )
+    zaehle("Verteilungen (Divisor)")
+    # übertrage Zahlen in decimal. Decimal ist hier notwendig für exaktes runden. Der Kontext gilt nur lokal, der des
+    # Aufrufers bleibt unverändert und nebenläufige Berechnungen in anderen Threads beeinflussen sich nicht.
+    with decimal.localcontext(
+        decimal.Context(rounding=decimal.ROUND_HALF_UP)
+    ), rekursion("Rekursionstiefe (Divisor)"):
+        tabelle = tabelle.applymap(decimal.Decimal)
+        lose = []
+
+        # bestimme vorläufigen Divisor und ermittle die entsprechende Sitzanzahl
+        divisor = tabelle["Stimmen"].sum() / sitze
+        tabelle["Sitze"] = (tabelle["Stimmen"] / divisor).map(
+            decimal.Decimal.to_integral_value
+        )
 
-    # Differenz zwischen zu verteilenden Sitzen und verteilten Sitzen
-    differenz = tabelle["Sitze"].sum() - sitze
-
-    # wenn nötig: Diskrepanzabbaumethode
-    if not differenz == 0:
-        # versuche zunächst diskrepanz einfach abzubauen
-        tabelle_neu = diskrepanzabbaumethode(tabelle, int(differenz), divisor)
-
-        # wenn diskrepanz nicht auflösbar → Losentscheid notwendig
-        if isinstance(tabelle_neu, int):
-            los_kandidaten = tabelle_neu
-            # bestimme Untergrenze, für die Sitze problemlos verteilt werden können
-            tabelle_neu, _ = sainte_lague_divisor(tabelle, sitze - 1)
-            # bestimme Obergrenze
-            tabelle_ueberschuss, _ = sainte_lague_divisor(
-                tabelle, tabelle_neu["Sitze"].sum() + los_kandidaten
-            )
-            # wenn eine Tabelle zurückgegeben wurde, kann ermittelt werden, wer die Lose erhält
-            if not isinstance(tabelle_neu, int):
-                lose = tabelle.index[
-                    (tabelle_ueberschuss["Sitze"] - tabelle_neu["Sitze"]) == 1
-                ].to_list()
-        tabelle: pd.DataFrame = tabelle_neu
-
-    # wähle "schönen" Zitierdivisor
-    divisor = bestimme_zitierdivisor(tabelle)
-
-    # endgültige Sitzberechnung
-    tabelle["Sitze"] = (tabelle["Stimmen"] / divisor).apply(
-        lambda x: x.to_integral_value()
-    )
+        # Differenz zwischen zu verteilenden Sitzen und verteilten Sitzen
+        differenz = tabelle["Sitze"].sum() - sitze
+
+        # wenn nötig: Diskrepanzabbaumethode
+        if not differenz == 0:
+            # versuche zunächst diskrepanz einfach abzubauen
+            tabelle_neu = diskrepanzabbaumethode(tabelle, int(differenz), divisor)
+
+            # wenn diskrepanz nicht auflösbar → Losentscheid notwendig
+            if isinstance(tabelle_neu, int):
+                los_kandidaten = tabelle_neu
+                # bestimme Untergrenze, für die Sitze problemlos verteilt werden können
+                hilfsverteilung = SPEICHER.umhuelle("divisor", sainte_lague_divisor)
+                tabelle_neu, _ = hilfsverteilung(tabelle, sitze - 1)
+                # bestimme Obergrenze
+                tabelle_ueberschuss, _ = hilfsverteilung(
+                    tabelle, tabelle_neu["Sitze"].sum() + los_kandidaten
+                )
+                # wenn eine Tabelle zurückgegeben wurde, kann ermittelt werden, wer die Lose erhält
+                if not isinstance(tabelle_neu, int):
+                    lose = tabelle.index[
+                        (tabelle_ueberschuss["Sitze"] - tabelle_neu["Sitze"]) == 1
+                    ].to_list()
+            tabelle: pd.DataFrame = tabelle_neu
+
+        # wähle "schönen" Zitierdivisor
+        divisor = bestimme_zitierdivisor(tabelle)
+
+        # endgültige Sitzberechnung
+        tabelle["Sitze"] = (tabelle["Stimmen"] / divisor).apply(
+            lambda x: x.to_integral_value()
+        )
+        tabelle = tabelle.astype("int64")
+        tabelle.attrs["Zitierdivisor"] = divisor
 
-    return tabelle.astype("int64"), lose
+    return tabelle, lose
 
 
 def bestimme_zitierdivisor(tabelle: pd.DataFrame) -> decimal.Decimal:
@@ -79,22 +91,17 @@ def bestimme_zitierdivisor(tabelle: pd.DataFrame) -> decimal.Decimal:
     # bestimme neue Divisorgrenzen
     for schritt in [-1, 1]:
         rundung = decimal.ROUND_UP if schritt > 0 else decimal.ROUND_DOWN
-        decimal.setcontext(decimal.Context(rounding=rundung))
-        tabelle[f"Divisor {- schritt * HALB}"] = bestimme_divisoren(tabelle, schritt)
-
-    # setze Rundung zurück
-    rundung = decimal.ROUND_HALF_UP
-    decimal.setcontext(decimal.Context(rounding=rundung))
+        with decimal.localcontext(decimal.Context(rounding=rundung)):
+            tabelle[f"Divisor {- schritt * HALB}"] = bestimme_divisoren(
+                tabelle, schritt
+            )
 
     # ermittle Grenzen
     untergrenze = tabelle[f"Divisor {HALB}"].max()
     obergrenze = tabelle[f"Divisor {- HALB}"].min()
 
     # wähle "schönen" Divisor
-    divisor = decimal.Decimal(
-        nice_round(remove_exponent(untergrenze), remove_exponent(obergrenze))
-    )
-    return divisor
+    return rundeste_zahl(untergrenze, obergrenze)
 
 
 def bestimme_divisoren(tabelle: pd.DataFrame, schritt: int) -> pd.Series:
@@ -119,6 +126,7 @@ def diskrepanzabbaumethode(
     :param divisor: für die gegebene Sitzverteilung verwendeter Divisor
     :return: Tabelle mit korrigierter Sitzverteilung
     """
+    zaehle("Diskrepanzabbau (Divisor)")
     tabelle = tabelle.copy()
 
     # Bestimme Vorzeichen für Richtung
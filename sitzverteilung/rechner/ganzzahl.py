@@ -0,0 +1,648 @@
+"""Exakte Ganzzahlvariante des Sainte-Laguë-Divisorverfahrens. Statt jede Zelle in decimal.Decimal umzuwandeln, werden
+Rangzahlen und Divisoren als Brüche geführt und ausschließlich über ganzzahlige Kreuzprodukte auf NumPy-Arrays
+verglichen. Derselbe Kern verteilt über eine Zuteilungsregel auch nach D'Hondt, Adams, Huntington-Hill und
+Hare-Niemeyer."""
+
+from __future__ import annotations
+
+import decimal
+from collections.abc import Mapping
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Callable
+
+import numpy as np
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf, rundeste_zahl
+from sitzverteilung.profil import zaehle
+
+pd = lade_bei_bedarf("pandas")
+
+# oberhalb dieser Schranke wird mit Python-Ganzzahlen statt int64 gerechnet, um Überläufe auszuschließen
+INT64_SCHRANKE = 2**62
+
+
+@dataclass(frozen=True)
+class Zuteilungsregel:
+    """
+    Regel eines Zuteilungsverfahrens für verteile. Divisorverfahren vergeben den nächsten Sitz nach der Rangzahl
+    V / d(S) ihrer Rundungsregel d, Quotenverfahren nach dem Rest V·sitze / gesamt - S. Beides wird als Bruch
+    zaehler / nenner geführt, nenner 0 steht für unendlich.
+
+        :ivar name: Name des Verfahrens, wie in Einstellungen.yaml
+        :ivar rangzahl: (stimmen, sitzzahl, sitze, gesamt) -> zaehler, nenner der Rangzahl für den nächsten Sitz
+        :ivar start: (stimmen, sitze, gesamt) -> vorläufige Sitzzahl
+        :ivar divisor: Divisorverfahren, nur dann gibt es einen Zitierdivisor
+        :ivar hausmonoton: mit mehr Gesamtsitzen verliert keine Partei Sitze
+        :ivar quadriert: die Rangzahl ist das Quadrat von V / d(S)
+    """
+
+    name: str
+    rangzahl: Callable
+    start: Callable
+    divisor: bool = True
+    hausmonoton: bool = True
+    quadriert: bool = False
+
+
+def rangzahl_sainte_lague(stimmen, sitzzahl, _sitze=None, _gesamt=None):
+    """Rangzahl V / (S + 0.5) = 2V / (2S + 1)"""
+    return 2 * stimmen, 2 * sitzzahl + 1
+
+
+def rangzahl_d_hondt(stimmen, sitzzahl, _sitze=None, _gesamt=None):
+    """Rangzahl V / (S + 1)"""
+    return stimmen, sitzzahl + 1
+
+
+def rangzahl_adams(stimmen, sitzzahl, _sitze=None, _gesamt=None):
+    """Rangzahl V / S, unendlich für Parteien ohne Sitz"""
+    return stimmen, sitzzahl
+
+
+def rangzahl_huntington_hill(stimmen, sitzzahl, _sitze=None, _gesamt=None):
+    """Quadrierte Rangzahl V² / (S·(S + 1)) zum geometrischen Mittel, unendlich für Parteien ohne Sitz"""
+    return stimmen * stimmen, sitzzahl * (sitzzahl + 1)
+
+
+def rangzahl_hare_niemeyer(stimmen, sitzzahl, sitze, gesamt):
+    """Rest V·sitze - gesamt·S der Quote V·sitze / gesamt, bezogen auf gesamt"""
+    return stimmen * sitze - gesamt * sitzzahl, np.ones_like(sitzzahl)
+
+
+def start_kaufmaennisch(stimmen, sitze, gesamt):
+    """vorläufiger Divisor gesamt / sitze, kaufmännisch gerundet: ⌊(2·V·sitze + gesamt) / (2·gesamt)⌋"""
+    return (2 * stimmen * sitze + gesamt) // (2 * gesamt)
+
+
+def start_abgerundet(stimmen, sitze, gesamt):
+    """Quote V·sitze / gesamt abgerundet"""
+    return stimmen * sitze // gesamt
+
+
+def start_aufgerundet(stimmen, sitze, gesamt):
+    """Quote V·sitze / gesamt aufgerundet"""
+    return -(-stimmen * sitze // gesamt)
+
+
+def start_geometrisch(stimmen, sitze, gesamt):
+    """
+    Quote x = V·sitze / gesamt geometrisch gerundet: ⌊x⌋ + 1, falls x² ≥ ⌊x⌋·(⌊x⌋ + 1), sonst ⌊x⌋. Parteien mit
+    Stimmen erhalten so mindestens einen Sitz.
+    """
+    abgerundet = stimmen * sitze // gesamt
+    aufrunden = (stimmen > 0) & (
+        abgerundet * (abgerundet + 1) * gesamt * gesamt
+        <= (stimmen * sitze) * (stimmen * sitze)
+    )
+    return abgerundet + aufrunden
+
+
+SAINTE_LAGUE = Zuteilungsregel(
+    "Sainte-Laguë", rangzahl_sainte_lague, start_kaufmaennisch
+)
+D_HONDT = Zuteilungsregel("D'Hondt", rangzahl_d_hondt, start_abgerundet)
+ADAMS = Zuteilungsregel("Adams", rangzahl_adams, start_aufgerundet)
+HUNTINGTON_HILL = Zuteilungsregel(
+    "Huntington-Hill", rangzahl_huntington_hill, start_geometrisch, quadriert=True
+)
+HARE_NIEMEYER = Zuteilungsregel(
+    "Hare-Niemeyer",
+    rangzahl_hare_niemeyer,
+    start_abgerundet,
+    divisor=False,
+    hausmonoton=False,
+)
+
+
+def sainte_lague_ganzzahl(
+    tabelle: pd.DataFrame, sitze: int
+) -> tuple[pd.DataFrame, list]:
+    """
+    Nutze das Sainte-Laguë-Divisorverfahren mit exakter Ganzzahlarithmetik zur Sitzberechnung. Sitze, Lose und
+    Zitierdivisor stimmen mit sainte_lague_divisor überein.
+
+        :param sitze: Anzahl zu verteilender Sitze
+        :param pd.DataFrame tabelle: Dataframe mit Stimmenverteilung
+        :return: Dataframe erweitert um Sitzverteilung, Liste für Verlosung
+    """
+    stimmen = als_ganzzahlen(tabelle["Stimmen"], 4 * (int(sitze) + 1))
+    sitzzahl, losmaske = verteile(stimmen, int(sitze))
+
+    # wähle "schönen" Zitierdivisor und führe die endgültige Sitzberechnung mit ihm durch
+    divisor = bestimme_zitierdivisor(stimmen, sitzzahl)
+    tabelle = tabelle.copy()
+    tabelle["Sitze"] = sitze_aus_divisor(stimmen, divisor)
+    tabelle = tabelle.astype("int64")
+    tabelle.attrs["Zitierdivisor"] = divisor
+
+    return tabelle, tabelle.index[losmaske].to_list()
+
+
+def zuteilung_ganzzahl(
+    tabelle: pd.DataFrame, sitze: int, regel: Zuteilungsregel = SAINTE_LAGUE
+) -> tuple[pd.DataFrame, list]:
+    """
+    Nutze ein beliebiges Zuteilungsverfahren mit exakter Ganzzahlarithmetik zur Sitzberechnung
+
+        :param tabelle: Dataframe mit Stimmenverteilung
+        :param sitze: Anzahl zu verteilender Sitze
+        :param regel: Zuteilungsregel, z.B. D_HONDT
+        :return: Dataframe erweitert um Sitzverteilung, Liste für Verlosung
+    """
+    stimmen = als_ganzzahlen(tabelle["Stimmen"], 4 * (int(sitze) + 1))
+    sitzzahl, losmaske = verteile(stimmen, int(sitze), regel)
+
+    tabelle = tabelle.copy()
+    tabelle["Sitze"] = sitzzahl
+    tabelle = tabelle.astype("int64")
+    tabelle.attrs["Zitierdivisor"] = bestimme_zitierdivisor(stimmen, sitzzahl, regel)
+
+    return tabelle, tabelle.index[losmaske].to_list()
+
+
+def sainte_lague_matrix(
+    stimmen: pd.DataFrame, sitze: pd.Series | np.ndarray | int
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Nutze das Sainte-Laguë-Divisorverfahren für viele Verteilungen in einem vektorisierten Durchlauf, z.B. für alle
+    Unterverteilungen auf die Länder oder für viele Szenarien
+
+        :param stimmen: Dataframe mit Parteien als Zeilen und einer Stimmenverteilung je Spalte
+        :param sitze: Anzahl zu verteilender Sitze je Spalte
+        :return: Dataframe mit Sitzverteilung je Spalte und erst bei Bedarf berechneten Zitierdivisoren je Spalte in
+            attrs, Listen für Verlosung je Spalte mit Losentscheid
+    """
+    return verteilungsmatrix(stimmen, sitze, SAINTE_LAGUE)
+
+
+def verteilungsmatrix(
+    stimmen: pd.DataFrame,
+    sitze: pd.Series | np.ndarray | int,
+    regel: Zuteilungsregel = SAINTE_LAGUE,
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Nutze ein beliebiges Zuteilungsverfahren für viele Verteilungen in einem vektorisierten Durchlauf
+
+        :param stimmen: Dataframe mit Parteien als Zeilen und einer Stimmenverteilung je Spalte
+        :param sitze: Anzahl zu verteilender Sitze je Spalte
+        :param regel: Zuteilungsregel
+        :return: Dataframe mit Sitzverteilung je Spalte und erst bei Bedarf berechneten Zitierdivisoren je Spalte in
+            attrs, Listen für Verlosung je Spalte mit Losentscheid
+    """
+    if isinstance(sitze, pd.Series):
+        sitze = sitze.reindex(stimmen.columns)
+    sitze = np.broadcast_to(np.asarray(sitze, dtype="int64"), (stimmen.shape[1],))
+    werte = als_ganzzahlen(stimmen.to_numpy(), 4 * (int(sitze.max(initial=0)) + 1))
+    sitzzahl, losmaske = verteile(werte, sitze, regel)
+
+    lose = {
+        spalte: stimmen.index[losmaske[:, position]].to_list()
+        for position, spalte in enumerate(stimmen.columns)
+        if losmaske[:, position].any()
+    }
+    tabelle = pd.DataFrame(
+        sitzzahl.astype("int64"), index=stimmen.index, columns=stimmen.columns
+    )
+    tabelle.attrs["Zitierdivisor"] = Zitierdivisoren(
+        stimmen.columns, werte, sitzzahl, regel
+    )
+    return tabelle, lose
+
+
+def sainte_lague_bereich(
+    tabelle: pd.DataFrame, von: int, bis: int
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Nutze das Sainte-Laguë-Verfahren für alle Sitzzahlen von bis bis in einem Durchlauf, z.B. zur Untersuchung von
+    Obergrenzen oder Überhang. Das Verfahren ist hausmonoton, die Verteilung zu h Sitzen besteht daher aus den h
+    größten Rangzahlen V / (S + 0.5) einer einzigen absteigend sortierten Folge. Wie bei verteile bleiben an
+    Gleichstandsstellen alle gleichauf liegenden Sitze unvergeben.
+
+        :param tabelle: Dataframe mit Stimmenverteilung
+        :param von: kleinste Sitzzahl
+        :param bis: größte Sitzzahl
+        :return: Dataframe mit einer Zeile je Sitzzahl und einer Spalte je Partei, Listen für Verlosung je Sitzzahl
+            mit Losentscheid
+    """
+    if not 1 <= von <= bis:
+        raise ValueError(f"Ungültiger Sitzbereich {von} bis {bis}")
+    stimmen = als_ganzzahlen(tabelle["Stimmen"], 4 * (int(bis) + 2))
+    if stimmen.sum() <= 0:
+        raise ValueError("Es müssen Sitze auf positive Stimmen verteilt werden")
+
+    partei, zaehler, nenner = sortiere_rangzahlen(stimmen, int(bis) + 1)
+    # gleich[k]: die Rangzahlen an Position k und k + 1 der Folge sind exakt gleich
+    gleich = zaehler[:-1] * nenner[1:] == zaehler[1:] * nenner[:-1]
+    # Beginn des Gleichstandsblocks je Position und kumulierte Sitze je Präfix der Folge
+    anfang = np.maximum.accumulate(
+        np.where(np.r_[True, ~gleich], np.arange(len(partei)), 0)
+    )
+    kumuliert = np.zeros((len(partei) + 1, len(stimmen)), dtype="int64")
+    kumuliert[np.arange(1, len(partei) + 1), partei] = 1
+    kumuliert = kumuliert.cumsum(axis=0)
+
+    sitze = np.arange(int(von), int(bis) + 1)
+    los = gleich[sitze - 1]
+    grenze = np.where(los, anfang[sitze - 1], sitze)
+
+    lose = {
+        int(sitze[position]): tabelle.index[
+            np.sort(partei[grenze[position] : blockende(gleich, grenze[position])])
+        ].to_list()
+        for position in np.flatnonzero(los)
+    }
+    return (
+        pd.DataFrame(
+            kumuliert[grenze],
+            index=pd.Index(sitze, name="Sitze"),
+            columns=tabelle.index,
+        ),
+        lose,
+    )
+
+
+def blockende(gleich: np.ndarray, anfang: int) -> int:
+    """
+    Ende eines Blocks exakt gleicher Rangzahlen in der sortierten Folge
+
+        :param gleich: Gleichheit jeder Rangzahl mit ihrer Nachfolgerin
+        :param anfang: erste Position des Blocks
+        :return: erste Position nach dem Block
+    """
+    ende = anfang + 1
+    while ende <= len(gleich) and gleich[ende - 1]:
+        ende += 1
+    return ende
+
+
+def sortiere_rangzahlen(
+    stimmen: np.ndarray, anzahl: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Erzeuge die absteigend sortierte Folge der Rangzahlen 2V / (2S + 1), die mindestens die anzahl + 1 größten enthält.
+    Sortiert wird nach Gleitkommanäherung; die Rundung ist monoton, nur gleich genäherte Blöcke werden daher exakt
+    nachsortiert.
+
+        :param stimmen: Ganzzahlige Stimmen je Partei
+        :param anzahl: Länge des benötigten Präfixes
+        :return: Partei, Zähler und Nenner je Rangzahl
+    """
+    gesamt = stimmen.sum()
+    parteien = int((stimmen > 0).sum())
+    # bei anzahl Sitzen erhält jede Partei höchstens (V·(2·anzahl + P) + gesamt) / (2·gesamt) Sitze
+    je_partei = (stimmen * (2 * anzahl + parteien) + gesamt) // (2 * gesamt) + 2
+    je_partei = np.where(stimmen > 0, np.minimum(je_partei, anzahl + 1), 0)
+    je_partei = je_partei.astype("int64")
+    partei = np.repeat(np.arange(len(stimmen)), je_partei)
+    # S läuft je Partei von 0 bis je_partei - 1
+    sitz = np.arange(len(partei)) - np.repeat(
+        np.cumsum(je_partei) - je_partei, je_partei
+    )
+    zaehler = 2 * stimmen[partei]
+    nenner = (2 * sitz + 1).astype(zaehler.dtype)
+
+    naeherung = zaehler.astype("float64") / nenner.astype("float64")
+    reihenfolge = np.argsort(-naeherung, kind="stable")
+    naeherung = naeherung[reihenfolge]
+    blockgrenzen = np.flatnonzero(np.r_[True, naeherung[1:] != naeherung[:-1], True])
+    for block in np.flatnonzero(np.diff(blockgrenzen) > 1):
+        anfang, ende = blockgrenzen[block], blockgrenzen[block + 1]
+        reihenfolge[anfang:ende] = sorted(
+            reihenfolge[anfang:ende],
+            key=lambda i: -Fraction(int(zaehler[i]), int(nenner[i])),
+        )
+    return partei[reihenfolge], zaehler[reihenfolge], nenner[reihenfolge]
+
+
+def verteile(
+    stimmen: np.ndarray,
+    sitze: int | np.ndarray,
+    regel: Zuteilungsregel = SAINTE_LAGUE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Verteile die Sitze über vorläufigen Divisor und exakten Diskrepanzabbau. Ist die Diskrepanz nur per Los auflösbar,
+    werden alle gleichauf liegenden Sitze zurückgehalten und die betroffenen Parteien markiert. Bei zweidimensionalen
+    Stimmen wird jede Spalte als eigene Verteilung behandelt und alle Spalten werden gemeinsam abgearbeitet.
+
+        :param stimmen: Ganzzahlige Stimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param sitze: Anzahl zu verteilender Sitze, je Spalte oder für alle gemeinsam
+        :param regel: Zuteilungsregel, standardmäßig Sainte-Laguë
+        :return: Sitze je Partei, Maske der Parteien im Lostopf
+    """
+    form = stimmen.shape
+    stimmen = stimmen.reshape(form[0], -1)
+    sitze = np.broadcast_to(np.asarray(sitze, dtype="int64"), stimmen.shape[1:])
+    gesamt = stimmen.sum(axis=0)
+    if (sitze < 1).any() or (gesamt <= 0).any():
+        raise ValueError(
+            f"Es müssen Sitze ({sitze}) auf positive Stimmen ({gesamt}) verteilt werden"
+        )
+
+    # quadrierte Rangzahlen wachsen mit dem Quadrat der Stimmen
+    if regel.quadriert and stimmen.dtype != object:
+        if int(gesamt.max()) ** 2 * 4 * (int(sitze.max()) + 2) ** 2 >= INT64_SCHRANKE:
+            stimmen = stimmen.astype(object)
+            gesamt = stimmen.sum(axis=0)
+
+    sitzzahl = regel.start(stimmen, sitze, gesamt)
+    differenz = sitzzahl.sum(axis=0) - sitze
+    losmaske = np.zeros(stimmen.shape, dtype=bool)
+    zaehle("Verteilungen (Ganzzahl)", stimmen.shape[1])
+
+    # Diskrepanzabbau: vergib bzw. entziehe Sitze in Reihenfolge der nächsten Divisorsprünge
+    while (differenz != 0).any():
+        vorzeichen = np.sign(differenz)
+        entziehen = vorzeichen > 0
+        # zu viele Sitze: der kleinste Divisor V / d(S - 1) verliert zuerst, also größtes d(S - 1) / V
+        # zu wenige Sitze: die größte Rangzahl V / d(S) gewinnt zuerst
+        maske = (differenz != 0) & (stimmen > 0) & ((sitzzahl > 0) | ~entziehen)
+        gleichauf = gleichauf_maximum(
+            *naechste_rangzahl(regel, stimmen, sitzzahl, (sitze, gesamt), entziehen),
+            maske,
+        )
+        anzahl = gleichauf.sum(axis=0)
+
+        # Losentscheid notwendig: alle gleichauf liegenden Sitze bleiben unvergeben
+        los = anzahl > np.abs(differenz)
+        losmaske |= gleichauf & los
+        sitzzahl -= gleichauf & los & entziehen
+
+        sitzzahl -= (gleichauf & ~los) * vorzeichen
+        differenz = np.where(los, 0, differenz - vorzeichen * anzahl)
+        zaehle("Diskrepanzabbau (Ganzzahl)")
+
+    return sitzzahl.reshape(form), losmaske.reshape(form)
+
+
+def naechste_rangzahl(
+    regel: Zuteilungsregel,
+    stimmen: np.ndarray,
+    sitzzahl: np.ndarray,
+    verteilung: tuple,
+    entziehen: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rangzahl für den nächsten Sitz bzw. Kehrwert der Rangzahl des zuletzt vergebenen Sitzes, je Spalte
+
+        :param regel: Zuteilungsregel
+        :param stimmen: Ganzzahlige Stimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param sitzzahl: bisherige Sitze je Partei und Verteilung
+        :param verteilung: Sitze und Stimmensumme je Spalte
+        :param entziehen: Spalten, in denen Sitze entzogen werden
+        :return: zaehler, nenner
+    """
+    zaehler, nenner = regel.rangzahl(stimmen, sitzzahl, *verteilung)
+    nenner_vorher, zaehler_vorher = regel.rangzahl(stimmen, sitzzahl - 1, *verteilung)
+    return (
+        np.where(entziehen, zaehler_vorher, zaehler),
+        np.where(entziehen, nenner_vorher, nenner),
+    )
+
+
+def gleichauf_maximum(
+    zaehler: np.ndarray, nenner: np.ndarray, maske: np.ndarray
+) -> np.ndarray:
+    """
+    Bestimme alle Einträge, deren Bruch zaehler / nenner unter den zulässigen Einträgen maximal ist, bei
+    zweidimensionalen Arrays je Spalte. Die Gleitkommadivision liefert nur einen Kandidaten, entschieden wird über
+    exakte Kreuzprodukte.
+
+        :param zaehler: nichtnegative Zähler
+        :param nenner: nichtnegative Nenner, 0 steht für unendlich
+        :param maske: zulässige Einträge
+        :return: Maske der maximalen Einträge
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        naeherung = np.where(
+            maske, zaehler.astype("float64") / nenner.astype("float64"), -np.inf
+        )
+    kandidat = np.argmax(naeherung, axis=0)[np.newaxis]
+    while True:
+        zaehler_kandidat = np.take_along_axis(zaehler, kandidat, axis=0)
+        nenner_kandidat = np.take_along_axis(nenner, kandidat, axis=0)
+        groesser = maske & (zaehler * nenner_kandidat > zaehler_kandidat * nenner)
+        if not groesser.any():
+            break
+        kandidat = np.where(
+            groesser.any(axis=0),
+            np.argmax(np.where(groesser, naeherung, -np.inf), axis=0),
+            kandidat,
+        )
+    return maske & (zaehler * nenner_kandidat == zaehler_kandidat * nenner)
+
+
+class Zitierdivisoren(Mapping):
+    """
+    Zitierdivisoren je Spalte einer Verteilungsmatrix. Sie werden erst beim ersten Zugriff berechnet, dann für alle
+    Spalten gemeinsam, sodass Aufrufer, die nur Sitze benötigen, keine Divisoren bestimmen.
+    """
+
+    def __init__(
+        self,
+        spalten,
+        stimmen: np.ndarray,
+        sitzzahl: np.ndarray,
+        regel: Zuteilungsregel = SAINTE_LAGUE,
+    ):
+        """
+        :param spalten: Namen der Verteilungen
+        :param stimmen: Ganzzahlige Stimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param sitzzahl: Sitze je Partei und Verteilung
+        :param regel: Zuteilungsregel
+        """
+        self.spalten = list(spalten)
+        self._stimmen = stimmen
+        self._sitzzahl = sitzzahl
+        self._regel = regel
+        self._divisoren = None
+
+    def _berechne(self) -> dict:
+        if self._divisoren is None:
+            self._divisoren = dict(
+                zip(
+                    self.spalten,
+                    bestimme_zitierdivisoren(
+                        self._stimmen, self._sitzzahl, self._regel
+                    ),
+                )
+            )
+        return self._divisoren
+
+    def __getitem__(self, spalte):
+        return self._berechne()[spalte]
+
+    def __iter__(self):
+        return iter(self.spalten)
+
+    def __len__(self):
+        return len(self.spalten)
+
+    def __repr__(self):
+        return repr(self._berechne())
+
+
+def bestimme_zitierdivisor(
+    stimmen: np.ndarray, sitzzahl: np.ndarray, regel: Zuteilungsregel = SAINTE_LAGUE
+) -> decimal.Decimal | None:
+    """
+    bestimme einen "schönen" divisor für die gegebene Sitzverteilung
+
+        :param stimmen: Ganzzahlige Stimmen je Partei
+        :param sitzzahl: Sitze je Partei
+        :param regel: Zuteilungsregel
+        :return: "schöner" Divisor, None bei Quotenverfahren
+    """
+    return bestimme_zitierdivisoren(
+        stimmen[:, np.newaxis], sitzzahl[:, np.newaxis], regel
+    )[0]
+
+
+def bestimme_zitierdivisoren(
+    stimmen: np.ndarray, sitzzahl: np.ndarray, regel: Zuteilungsregel = SAINTE_LAGUE
+) -> list[decimal.Decimal | None]:
+    """
+    bestimme "schöne" Divisoren für alle Spalten einer Verteilungsmatrix
+
+        :param stimmen: Ganzzahlige Stimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param sitzzahl: Sitze je Partei und Verteilung
+        :param regel: Zuteilungsregel
+        :return: "schöner" Divisor je Spalte, None bei Quotenverfahren
+    """
+    if not regel.divisor:
+        return [None] * stimmen.shape[1]
+    divisoren = []
+    for untergrenze, obergrenze in grenzen_je_verteilung(stimmen, sitzzahl, regel):
+        # ohne vergebene Sitze erzeugt nur ein unendlicher Divisor die Verteilung, Parteien mit unendlicher Rangzahl
+        # ohne Sitz (Losentscheid bei Adams) erzeugt keiner
+        if untergrenze is None:
+            divisoren.append(decimal.Decimal("NaN"))
+            continue
+        if obergrenze is None:
+            divisoren.append(decimal.Decimal("Infinity"))
+            continue
+
+        divisoren.append(rundeste_zahl(*dezimalgrenzen(untergrenze, obergrenze, regel)))
+    return divisoren
+
+
+def dezimalgrenzen(
+    untergrenze: Fraction, obergrenze: Fraction, regel: Zuteilungsregel
+) -> tuple[decimal.Decimal, decimal.Decimal]:
+    """
+    Runde ein exaktes Divisorintervall auf 28 Stellen. Bei Sainte-Laguë wird wie in sainte_lague_divisor nach außen
+    gerundet. Alle anderen Verfahren runden nach innen, sodass der Divisor echt im Intervall liegt und auch bei
+    Aufrundung (Adams) oder irrationalen Grenzen (Huntington-Hill) die Verteilung erzeugt.
+
+        :param untergrenze: exakte Untergrenze, bei quadrierten Rangzahlen ihr Quadrat
+        :param obergrenze: exakte Obergrenze, bei quadrierten Rangzahlen ihr Quadrat
+        :param regel: Zuteilungsregel
+        :return: gerundete Grenzen
+    """
+    if regel is SAINTE_LAGUE:
+        with decimal.localcontext(decimal.Context(rounding=decimal.ROUND_DOWN)):
+            untergrenze = (
+                decimal.Decimal(untergrenze.numerator) / untergrenze.denominator
+            )
+        with decimal.localcontext(decimal.Context(rounding=decimal.ROUND_UP)):
+            obergrenze = decimal.Decimal(obergrenze.numerator) / obergrenze.denominator
+        return untergrenze, obergrenze
+
+    kontext = decimal.Context()
+    grenzen = [
+        kontext.divide(grenze.numerator, grenze.denominator)
+        for grenze in (untergrenze, obergrenze)
+    ]
+    if regel.quadriert:
+        grenzen = [grenze.sqrt(kontext) for grenze in grenzen]
+    return kontext.next_plus(grenzen[0]), kontext.next_minus(grenzen[1])
+
+
+def grenzen_je_verteilung(
+    stimmen: np.ndarray, sitzzahl: np.ndarray, regel: Zuteilungsregel = SAINTE_LAGUE
+) -> list[tuple[Fraction | None, Fraction | None]]:
+    """
+    Bestimme die exakten Divisorintervalle aller Spalten einer Verteilungsmatrix mit je einem vektorisierten Vergleich
+    für Unter- und Obergrenze. Bei quadrierten Rangzahlen sind es die Intervalle der quadrierten Divisoren.
+
+        :param stimmen: Ganzzahlige Stimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param sitzzahl: Sitze je Partei und Verteilung
+        :param regel: Zuteilungsregel eines Divisorverfahrens
+        :return: Untergrenze max(V / d(S)) (oder None, wenn sie unendlich ist) und Obergrenze min(V / d(S - 1)) (oder
+            None, wenn sie unendlich ist) je Spalte
+    """
+    maske = stimmen > 0
+    zaehler, nenner = regel.rangzahl(stimmen, sitzzahl)
+    unten = np.argmax(gleichauf_maximum(zaehler, nenner, maske), axis=0)
+    nenner_vorher, zaehler_vorher = regel.rangzahl(stimmen, sitzzahl - 1)
+    maske = maske & (sitzzahl > 0) & (zaehler_vorher > 0)
+    oben = np.argmax(gleichauf_maximum(zaehler_vorher, nenner_vorher, maske), axis=0)
+
+    return [
+        (
+            (
+                Fraction(int(zaehler[u, spalte]), int(nenner[u, spalte]))
+                if nenner[u, spalte] > 0
+                else None
+            ),
+            (
+                Fraction(int(nenner_vorher[o, spalte]), int(zaehler_vorher[o, spalte]))
+                if vergeben
+                else None
+            ),
+        )
+        for spalte, (u, o, vergeben) in enumerate(zip(unten, oben, maske.any(axis=0)))
+    ]
+
+
+def sitze_aus_divisor(stimmen: np.ndarray, divisor: decimal.Decimal) -> np.ndarray:
+    """
+    Berechne die Sitze zu einem Divisor exakt mit kaufmännischer Rundung: ⌊V / D + 1/2⌋ = ⌊(2·V·q + p) / 2p⌋ für D = p/q
+
+        :param stimmen: Ganzzahlige Stimmen je Partei
+        :param divisor: Divisor
+        :return: Sitze je Partei
+    """
+    if divisor.is_infinite():
+        return np.zeros(len(stimmen), dtype="int64")
+    bruch = Fraction(divisor)
+    stimmen = als_ganzzahlen(stimmen, 2 * bruch.denominator + bruch.numerator)
+    return (2 * stimmen * bruch.denominator + bruch.numerator) // (2 * bruch.numerator)
+
+
+def als_ganzzahlen(werte, faktor: int) -> np.ndarray:
+    """
+    Überführe Stimmen in ein Ganzzahlarray. Können Produkte mit faktor über int64 hinauswachsen, werden
+    Python-Ganzzahlen verwendet.
+
+        :param werte: Stimmen
+        :param faktor: größter Faktor, mit dem die Stimmensumme einer Verteilung multipliziert wird
+        :return: Array vom Typ int64 oder object
+    """
+    werte = np.asarray(werte)
+    if werte.dtype.kind == "f" and not np.all(np.mod(werte, 1) == 0):
+        raise ValueError("Stimmen müssen ganzzahlig sein")
+    if werte.dtype.kind in "iuf" and werte.size:
+        if int(np.abs(werte).sum(axis=0).max()) * faktor < INT64_SCHRANKE:
+            return werte.astype("int64")
+    return np.array([int(wert) for wert in werte.ravel()], dtype=object).reshape(
+        werte.shape
+    )
+
+
+def vorabzuteilung(stimmen: np.ndarray, sitze: int) -> np.ndarray:
+    """
+    Bestimme eine sichere Startverteilung für Rangzahlverfahren. Vergeben werden alle Rangzahlen oberhalb der Schwelle
+    T = gesamt / (sitze - P/2); davon gibt es stets weniger als sitze, sodass kein Gleichstand angeschnitten wird und
+    höchstens P Sitze offen bleiben.
+
+        :param stimmen: Ganzzahlige Stimmen je Partei
+        :param sitze: Anzahl zu verteilender Sitze
+        :return: Sitze je Partei
+    """
+    gesamt = stimmen.sum()
+    restfaktor = 2 * sitze - int((stimmen > 0).sum())
+    if restfaktor <= 0 or gesamt <= 0:
+        return np.zeros_like(stimmen)
+    # Anzahl der Rangzahlen V / (j + 0.5) > T ist ⌈V / T - 1/2⌉ = ⌈(V·(2·sitze - P) - gesamt) / (2·gesamt)⌉
+    return np.maximum(-((gesamt - stimmen * restfaktor) // (2 * gesamt)), 0)
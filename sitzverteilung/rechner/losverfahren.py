@@ -0,0 +1,129 @@
+"""Dieses Modul stellt die Verfahren für Losentscheide bei Gleichständen bereit. Ein Losverfahren erhält die Lose im
+Lostopf und die Anzahl zu losender Sitze und gibt die Empfänger der Sitze zurück."""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import random
+from typing import Callable
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+
+pd = lade_bei_bedarf("pandas")
+
+
+Losziehung = Callable[[list, int], list]
+
+
+class Gleichstand(Exception):
+    """Ein Losentscheid wäre erforderlich, ist aber nicht erlaubt"""
+
+
+def los_interaktiv(lose: list, anzahl: int) -> list:
+    """
+    Frage die Empfänger der Sitze auf der Konsole ab. Die Sitze können mit pseudo-Zufall (Option 0) oder mit externer
+    Methode zugelost werden.
+
+        :param lose: Liste mit Losen für den Lostopf
+        :param anzahl: Anzahl zu losender Sitze
+        :return: Empfänger der Sitze
+    """
+    liste = []
+    lose = list(lose)
+    while len(liste) < anzahl:
+        optionen = pd.Series(["Zufall"] + lose)
+        los = input(f"Lose zwischen:\n{optionen}\n")
+        try:
+            los = int(los)
+        except ValueError:
+            print("Wähle eine Zahl")
+            continue
+        if los == 0:
+            liste.extend(random.sample(lose, k=anzahl - len(liste)))
+        elif 0 < los < len(optionen):
+            liste.append(lose.pop(los - 1))
+        else:
+            print(f"{los} ist keine wählbare Option")
+    return liste
+
+
+def los_zufall(lose: list, anzahl: int, rng: random.Random) -> list:
+    """
+    Ziehe die Empfänger mit einem eigenen Zufallsgenerator, bei gleichem Startwert ergeben sich gleiche Lose
+
+        :param lose: Liste mit Losen für den Lostopf
+        :param anzahl: Anzahl zu losender Sitze
+        :param rng: Zufallsgenerator
+        :return: Empfänger der Sitze
+    """
+    return rng.sample(list(lose), k=anzahl)
+
+
+def los_reihenfolge(lose: list, anzahl: int, reihenfolge: list) -> list:
+    """
+    Vergib die Sitze in einer festen Reihenfolge. Nicht aufgeführte Lose folgen in der Reihenfolge des Lostopfs.
+
+        :param lose: Liste mit Losen für den Lostopf
+        :param anzahl: Anzahl zu losender Sitze
+        :param reihenfolge: Vorrangliste
+        :return: Empfänger der Sitze
+    """
+    rang = {los: position for position, los in enumerate(reihenfolge)}
+    return sorted(lose, key=lambda los: rang.get(los, len(rang)))[:anzahl]
+
+
+def los_ablehnen(lose: list, anzahl: int) -> list:
+    """
+    Lehne jeden Losentscheid ab
+
+        :param lose: Liste mit Losen für den Lostopf
+        :param anzahl: Anzahl zu losender Sitze
+        :raises Gleichstand: immer
+    """
+    raise Gleichstand(
+        f"Losentscheid über {anzahl} Sitze zwischen {list(lose)} erforderlich"
+    )
+
+
+def Losverfahren(  # pylint: disable=invalid-name
+    art: str | Callable = "interaktiv", seed=None, reihenfolge: list = None
+) -> Losziehung:
+    """
+    Fabrik um das passende Losverfahren zu erhalten
+        :param art: "interaktiv", "zufall", "reihenfolge", "ablehnen" oder eine Funktion (lose, anzahl) -> Empfänger
+        :param seed: Startwert des Zufallsgenerators für "zufall"
+        :param reihenfolge: Vorrangliste für "reihenfolge"
+        :return: gewünschtes Losverfahren
+    """
+    if callable(art):
+        return art
+    verfahren: dict = {
+        "interaktiv": lambda: los_interaktiv,
+        "zufall": lambda: functools.partial(los_zufall, rng=random.Random(seed)),
+        "reihenfolge": lambda: functools.partial(
+            los_reihenfolge, reihenfolge=list(reihenfolge or [])
+        ),
+        "ablehnen": lambda: los_ablehnen,
+    }
+    if art not in verfahren:
+        raise ValueError(
+            f"{art} ist keine gültige Art für {inspect.stack()[0][3]}, "
+            f"wähle aus {list(verfahren.keys())}"
+        )
+    return verfahren[art]()
+
+
+def losverfahren_aus_text(text: str) -> dict:
+    """
+    Übersetze eine Angabe der Kommandozeile in Argumente für Losverfahren, z. B. "zufall:42" oder "reihenfolge:A,B"
+
+        :param text: Art, optional gefolgt von ":" und Startwert bzw. kommagetrennter Vorrangliste
+        :return: Argumente für Losverfahren
+    """
+    art, _, wert = text.partition(":")
+    if art == "zufall":
+        return {"art": art, "seed": int(wert) if wert else None}
+    if art == "reihenfolge":
+        return {"art": art, "reihenfolge": wert.split(",") if wert else []}
+    return {"art": art}
@@ -1,72 +1,149 @@
 """Dieses Modul stellt die Methoden der Sainte-Lague-Methode bereit"""
+
+from __future__ import annotations
+
+import heapq
 import inspect
-import random
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from typing import Callable, Iterable
 
-import pandas as pd
+import numpy as np
 
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+from sitzverteilung.profil import zaehle
 from sitzverteilung.rechner.divisor import sainte_lague_divisor
+from sitzverteilung.rechner.ganzzahl import (
+    als_ganzzahlen,
+    gleichauf_maximum,
+    sainte_lague_ganzzahl,
+    vorabzuteilung,
+)
+from sitzverteilung.rechner.losverfahren import Losziehung, los_interaktiv
+from sitzverteilung.rechner.verteilungsspeicher import SPEICHER, Verteilungsspeicher
+
+pd = lade_bei_bedarf("pandas")
 
-Sitzverteilungsrechner = Callable[[pd.DataFrame, int], tuple[pd.DataFrame, list]]
+Sitzverteilungsrechner = Callable[["pd.DataFrame", int], tuple["pd.DataFrame", list]]
 
 
 def sainte_lague_rangzahl(
     tabelle: pd.DataFrame, sitze: int
 ) -> tuple[pd.DataFrame, list]:
     """
-    Nutze das Sainte-Laguë-Rangzahlverfahren zur Sitzberechnung
+    Nutze das Sainte-Laguë-Rangzahlverfahren zur Sitzberechnung. Nach einer sicheren Startverteilung werden die
+    restlichen Sitze entweder in einem Schritt oder über eine Prioritätswarteschlange exakter Rangzahlen vergeben.
 
         :param int sitze: Anzahl zu verteilender Sitze
         :param pd.DataFrame tabelle: Dataframe mit Stimmenverteilung
         :return: Dataframe erweitert um Sitzverteilung, Liste für Verlosung
     """
+    zaehle("Verteilungen (Rangzahl)")
+    stimmen = als_ganzzahlen(tabelle["Stimmen"], 4 * (int(sitze) + 1))
+    sitzzahl = vorabzuteilung(stimmen, int(sitze))
+    rest = int(sitze) - int(sitzzahl.sum())
     lose = []
-    tabelle["Sitze"] = 0
-    while tabelle["Sitze"].sum() < sitze:
-        tabelle["Divisor"] = tabelle["Sitze"] + 0.5
-        tabelle["Rangzahl"] = tabelle["Stimmen"] / tabelle["Divisor"]
-        anzahl_gewinner = tabelle["Rangzahl"][
-            tabelle["Rangzahl"] == tabelle["Rangzahl"].max()
-        ].count()
-        if anzahl_gewinner > (sitze - tabelle["Sitze"].sum()):
-            lose = list(tabelle[tabelle["Rangzahl"] == tabelle["Rangzahl"].max()].index)
-            break
-        gewinner = tabelle["Rangzahl"].idxmax()
-        tabelle.at[gewinner, "Sitze"] += 1
-    return tabelle.drop(["Divisor", "Rangzahl"], axis=1), lose
-
-
-def losentscheid(dataframe: pd.DataFrame, lose: list, sitze: int) -> pd.DataFrame:
+
+    if not vergebe_rest_auf_einmal(stimmen, sitzzahl, rest):
+        # Prioritätswarteschlange mit exakten Rangzahlen V / (S + 0.5), größte zuerst
+        warteschlange = [
+            (-Fraction(2 * int(stimmen[i]), 2 * int(sitzzahl[i]) + 1), i)
+            for i in np.flatnonzero(stimmen > 0)
+        ]
+        heapq.heapify(warteschlange)
+        while rest > 0 and warteschlange:
+            rangzahl, gewinner = heapq.heappop(warteschlange)
+            gewinner = [gewinner]
+            while warteschlange and warteschlange[0][0] == rangzahl:
+                gewinner.append(heapq.heappop(warteschlange)[1])
+            if len(gewinner) > rest:
+                lose = list(tabelle.index[sorted(gewinner)])
+                break
+            for partei in gewinner:
+                sitzzahl[partei] += 1
+                heapq.heappush(
+                    warteschlange,
+                    (
+                        -Fraction(
+                            2 * int(stimmen[partei]), 2 * int(sitzzahl[partei]) + 1
+                        ),
+                        partei,
+                    ),
+                )
+            rest -= len(gewinner)
+
+    tabelle = tabelle.copy()
+    tabelle["Sitze"] = sitzzahl.astype("int64")
+    return tabelle, lose
+
+
+def vergebe_rest_auf_einmal(
+    stimmen: np.ndarray, sitzzahl: np.ndarray, rest: int
+) -> bool:
+    """
+    Vergebe die restlichen Sitze in einem Schritt an die Parteien mit den höchsten nächsten Rangzahlen. Das ist nur
+    zulässig, wenn die schwächste dieser Rangzahlen echt größer ist als alle übrigen nächsten Rangzahlen und als jede
+    übernächste Rangzahl.
+
+        :param stimmen: Ganzzahlige Stimmen je Partei
+        :param sitzzahl: Startverteilung, wird bei Erfolg angepasst
+        :param rest: Anzahl noch zu vergebender Sitze
+        :return: ob die Sitze vergeben wurden
+    """
+    if rest == 0:
+        return True
+    maske = stimmen > 0
+    if rest > int(maske.sum()):
+        return False
+
+    # Kandidaten nach genäherter Rangzahl, geprüft wird anschließend exakt
+    naeherung = np.where(maske, stimmen / (sitzzahl + 0.5), -np.inf)
+    reihenfolge = np.argsort(-naeherung, kind="stable")
+    gewinner = np.zeros(len(stimmen), dtype=bool)
+    gewinner[reihenfolge[:rest]] = True
+
+    # schwächste Gewinnerrangzahl als Bruch, d.h. größtes (2S + 1) / 2V unter den Gewinnern
+    schwaechste = np.flatnonzero(
+        gleichauf_maximum(2 * sitzzahl + 1, 2 * stimmen, gewinner)
+    )[0]
+    zaehler, nenner = 2 * stimmen[schwaechste], 2 * sitzzahl[schwaechste] + 1
+    naechste_rangzahl_kleiner = (
+        2 * stimmen[maske & ~gewinner] * nenner
+        < zaehler * (2 * sitzzahl[maske & ~gewinner] + 1)
+    ).all()
+    uebernaechste_rangzahl_kleiner = (
+        2 * stimmen[maske] * nenner < zaehler * (2 * sitzzahl[maske] + 3)
+    ).all()
+    if not (naechste_rangzahl_kleiner and uebernaechste_rangzahl_kleiner):
+        return False
+
+    sitzzahl[gewinner] += 1
+    return True
+
+
+def losentscheid(
+    dataframe: pd.DataFrame, lose: list, sitze: int, verfahren: Losziehung = None
+) -> pd.DataFrame:
     """
-    Führe einen Losentscheid durch. Die Sitze können mit pseudo-Zufall (Option 0) oder mit externen Methode zugelost
-    werden. Die pandas Tabelle wird mit den zusätzlichen Sitzen zurückgegeben.
+    Führe einen Losentscheid durch. Ohne Losverfahren werden die Sitze interaktiv mit pseudo-Zufall (Option 0) oder
+    mit externer Methode zugelost. Die pandas Tabelle wird mit den zusätzlichen Sitzen zurückgegeben.
         :param dataframe: Tabelle mit Sitzverteilung vor der Verlosung
         :param lose: Liste mit Losen für den Lostopf
         :param sitze: Soll-Anzahl Sitze (implizit Anzahl Lose)
+        :param verfahren: Losverfahren, siehe Losverfahren
         :return: Tabelle mit Sitzverteilung nach der Verlosung
     """
     dataframe = dataframe.copy()
-    liste = []
     anzahl_lose = int(sitze - dataframe["Sitze"].sum())
-    while len(liste) < anzahl_lose:
-        lose = pd.Series(["Zufall"] + lose)
-        los = input(f"Lose zwischen:\n{lose}\n")
-        try:
-            los = int(los)
-        except ValueError:
-            print("Wähle eine Zahl")
-            continue
-        if los == 0:
-            liste.extend(
-                random.sample(list(lose.values[1:]), k=anzahl_lose - len(liste))
-            )
-        else:
-            try:
-                liste.append(lose[los])
-                lose = lose.drop(los)
-            except KeyError:
-                print(f"{los} ist keine wählbare Option")
-    print(f"Lose an {liste}")
+    liste = (verfahren or los_interaktiv)(list(lose), anzahl_lose)
+    if (
+        len(set(liste)) != anzahl_lose
+        or len(liste) != anzahl_lose
+        or set(liste) - set(lose)
+    ):
+        raise ValueError(
+            f"Losverfahren muss {anzahl_lose} verschiedene Lose aus {lose} ziehen, nicht {liste}"
+        )
     for partei in liste:
         dataframe.at[partei, "Sitze"] += 1
     return dataframe
@@ -74,14 +151,17 @@ def losentscheid(dataframe: pd.DataFrame, lose: list, sitze: int) -> pd.DataFram
 
 def SainteLague(  # pylint: disable=invalid-name
     methode: str = "divisor",
+    speicher: Verteilungsspeicher | None = SPEICHER,
 ) -> Sitzverteilungsrechner:
     """
     Fabrik um die passende Sainte-Lague-Methode zu erhalten
-        :param methode: welcher Algorithmus verwendet wird. Entweder "divisor" oder "rangzahl"
+        :param methode: welcher Algorithmus verwendet wird. Entweder "divisor", "ganzzahl" oder "rangzahl"
+        :param speicher: LRU-Speicher für bereits berechnete Verteilungen, None rechnet immer neu
         :return: gewünschte Sainte-Lague-Methode
     """
     methoden: dict = {
         "divisor": sainte_lague_divisor,
+        "ganzzahl": sainte_lague_ganzzahl,
         "rangzahl": sainte_lague_rangzahl,
     }
     if methode not in methoden:
@@ -89,4 +169,26 @@ def SainteLague(  # pylint: disable=invalid-name
             f"{methode} ist keine gültige Methode für {inspect.stack()[0][3]}, "
             f"wähle aus {list(methoden.keys())}"
         )
-    return methoden.get(methode)
+    if speicher is None:
+        return methoden.get(methode)
+    return speicher.umhuelle(methode, methoden.get(methode))
+
+
+def verteile_nebenlaeufig(
+    auftraege: Iterable[tuple[pd.DataFrame, int]],
+    methode: str = "divisor",
+    arbeiter: int | None = None,
+    speicher: Verteilungsspeicher | None = SPEICHER,
+) -> list[tuple[pd.DataFrame, list]]:
+    """
+    Berechne unabhängige Sitzverteilungen in einem Threadpool, z.B. hinter einem Server. Die Verfahren verändern
+    keinen globalen Zustand, auch nicht den decimal-Kontext, und der Speicher ist durch eine Sperre geschützt.
+        :param auftraege: Paare aus Tabelle mit Stimmenverteilung und Anzahl zu verteilender Sitze
+        :param methode: welcher Algorithmus verwendet wird, siehe SainteLague
+        :param arbeiter: Anzahl der Threads, standardmäßig die Vorgabe von ThreadPoolExecutor
+        :param speicher: LRU-Speicher für bereits berechnete Verteilungen, None rechnet immer neu
+        :return: Tabelle und Liste für Verlosung je Auftrag, in der Reihenfolge der Aufträge
+    """
+    rechner = SainteLague(methode, speicher)
+    with ThreadPoolExecutor(max_workers=arbeiter) as pool:
+        return list(pool.map(lambda auftrag: rechner(*auftrag), auftraege))
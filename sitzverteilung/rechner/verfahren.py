@@ -0,0 +1,58 @@
+"""Dieses Modul stellt die Zuteilungsverfahren unter ihren Namen in Einstellungen.yaml bereit"""
+
+import functools
+
+from sitzverteilung.rechner.ganzzahl import (
+    ADAMS,
+    D_HONDT,
+    HARE_NIEMEYER,
+    HUNTINGTON_HILL,
+    SAINTE_LAGUE,
+    Zuteilungsregel,
+    zuteilung_ganzzahl,
+)
+from sitzverteilung.rechner.sainte_lague import SainteLague, Sitzverteilungsrechner
+from sitzverteilung.rechner.verteilungsspeicher import SPEICHER, Verteilungsspeicher
+
+VERFAHREN: dict[str, Zuteilungsregel] = {
+    regel.name: regel
+    for regel in (SAINTE_LAGUE, D_HONDT, HARE_NIEMEYER, ADAMS, HUNTINGTON_HILL)
+}
+
+
+def zuteilungsregel(verfahren: str | Zuteilungsregel) -> Zuteilungsregel:
+    """
+    Bestimme die Zuteilungsregel zu einem Verfahrensnamen
+
+        :param verfahren: Name des Verfahrens, z.B. "D'Hondt", oder bereits eine Zuteilungsregel
+        :return: Zuteilungsregel
+    """
+    if isinstance(verfahren, Zuteilungsregel):
+        return verfahren
+    if verfahren not in VERFAHREN:
+        raise ValueError(
+            f"{verfahren} ist kein bekanntes Zuteilungsverfahren, wähle aus {list(VERFAHREN.keys())}"
+        )
+    return VERFAHREN[verfahren]
+
+
+def Sitzzuteilung(  # pylint: disable=invalid-name
+    verfahren: str | Zuteilungsregel = SAINTE_LAGUE.name,
+    methode: str = "ganzzahl",
+    speicher: Verteilungsspeicher | None = SPEICHER,
+) -> Sitzverteilungsrechner:
+    """
+    Fabrik für ein Zuteilungsverfahren. Sainte-Laguë wird über SainteLague mit dessen Methoden berechnet, alle anderen
+    Verfahren über den gemeinsamen Ganzzahlkern.
+        :param verfahren: Name des Verfahrens, siehe VERFAHREN
+        :param methode: Algorithmus für Sainte-Laguë, siehe SainteLague
+        :param speicher: LRU-Speicher für bereits berechnete Verteilungen, None rechnet immer neu
+        :return: Funktion (tabelle, sitze) -> (tabelle, lose)
+    """
+    regel = zuteilungsregel(verfahren)
+    if regel is SAINTE_LAGUE:
+        return SainteLague(methode, speicher)
+    rechner = functools.partial(zuteilung_ganzzahl, regel=regel)
+    if speicher is None:
+        return rechner
+    return speicher.umhuelle(regel.name, rechner)
@@ -0,0 +1,122 @@
+"""Dieses Modul hält berechnete Sitzverteilungen in einem begrenzten LRU-Speicher vor. Gleiche Verteilungen entstehen
+etwa bei Stapeln mit geänderten Einstellungen, deren Landesverteilung übereinstimmt, oder bei den Hilfsverteilungen
+des Divisorverfahrens im Falle eines Losentscheids."""
+
+from __future__ import annotations
+
+import copy
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+from sitzverteilung.profil import zaehle
+
+pd = lade_bei_bedarf("pandas")
+
+
+class Verteilungsspeicher:
+    """
+    Begrenzter LRU-Speicher für Sitzverteilungen. Der Schlüssel besteht aus Methode, Sitzzahl und einer Prüfsumme
+    über Index, Spalten, Datentypen, Werte und attrs der Eingabetabelle. Gespeichert und herausgegeben werden nur
+    Kopien, Änderungen an Ein- oder Ausgabe wirken sich daher nicht auf den Speicher aus.
+    """
+
+    def __init__(self, groesse: int = 256):
+        """
+        :param groesse: Höchstzahl gespeicherter Verteilungen, 0 schaltet den Speicher ab
+        """
+        self.groesse = groesse
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self._eintraege: OrderedDict = OrderedDict()
+        self._sperre = threading.Lock()
+
+    def __len__(self):
+        return len(self._eintraege)
+
+    def umhuelle(self, methode: str, rechner: Callable) -> Callable:
+        """
+        Umhülle eine Sitzverteilungsmethode, sodass ihre Ergebnisse gespeichert werden
+
+            :param methode: Name der Methode, Teil des Schlüssels
+            :param rechner: Funktion (tabelle, sitze) -> (tabelle, lose)
+            :return: Funktion gleicher Signatur
+        """
+
+        @functools.wraps(rechner)
+        def gespeichert(tabelle: pd.DataFrame, sitze: int) -> tuple[pd.DataFrame, list]:
+            if self.groesse <= 0:
+                return rechner(tabelle, sitze)
+            schluessel = (methode, int(sitze), pruefsumme(tabelle))
+            with self._sperre:
+                eintrag = self._eintraege.get(schluessel)
+                if eintrag is not None:
+                    self._eintraege.move_to_end(schluessel)
+                    self.treffer += 1
+                else:
+                    self.fehlschlaege += 1
+            if eintrag is not None:
+                zaehle("Treffer im Verteilungsspeicher")
+            else:
+                eintrag = kopiere(*rechner(tabelle, sitze))
+                with self._sperre:
+                    self._eintraege[schluessel] = eintrag
+                    while len(self._eintraege) > self.groesse:
+                        self._eintraege.popitem(last=False)
+            return kopiere(*eintrag)
+
+        return gespeichert
+
+    def statistik(self) -> dict:
+        """
+        Treffer, Fehlschläge und Belegung des Speichers
+
+            :return: Kennzahlen des Speichers
+        """
+        with self._sperre:
+            return {
+                "treffer": self.treffer,
+                "fehlschlaege": self.fehlschlaege,
+                "eintraege": len(self._eintraege),
+                "groesse": self.groesse,
+            }
+
+    def leere(self):
+        """Entferne alle gespeicherten Verteilungen und setze die Zähler zurück"""
+        with self._sperre:
+            self._eintraege.clear()
+            self.treffer = 0
+            self.fehlschlaege = 0
+
+
+def pruefsumme(tabelle: pd.DataFrame) -> bytes:
+    """
+    Prüfsumme über alles, was das Ergebnis einer Sitzverteilung beeinflusst
+
+        :param tabelle: Dataframe mit Stimmenverteilung
+        :return: Prüfsumme
+    """
+    summe = hashlib.blake2b(digest_size=16)
+    summe.update(pd.util.hash_pandas_object(tabelle, index=True).to_numpy().tobytes())
+    summe.update(repr(list(tabelle.dtypes.astype(str).items())).encode())
+    summe.update(repr(sorted(tabelle.attrs.items())).encode())
+    return summe.digest()
+
+
+def kopiere(tabelle: pd.DataFrame, lose: list) -> tuple[pd.DataFrame, list]:
+    """
+    Unabhängige Kopie eines Verteilungsergebnisses
+
+        :param tabelle: Dataframe mit Sitzverteilung
+        :param lose: Liste für Verlosung
+        :return: Kopien von Tabelle samt attrs und Liste
+    """
+    kopie = tabelle.copy(deep=True)
+    kopie.attrs = copy.deepcopy(tabelle.attrs)
+    return kopie, list(lose)
+
+
+SPEICHER = Verteilungsspeicher()
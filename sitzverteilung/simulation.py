@@ -0,0 +1,450 @@
+"""Dieses Modul schätzt die Unsicherheit einer Sitzverteilung über eine Monte-Carlo-Simulation. Die Eingabestimmen
+werden um die vorliegenden Anteile gestreut und alle Szenarien eines Blocks durchlaufen Zulassung, Landesverteilung,
+Mindestsitze und Oberverteilung gemeinsam als Arrays."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+from sitzverteilung.rechner.ganzzahl import SAINTE_LAGUE, verteile
+from sitzverteilung.rechner.verfahren import zuteilungsregel
+from sitzverteilung.sitzverteilung import (
+    gesamtsitze_matrix,
+    kombiniere_mindestsitze,
+    setze_einstellungen,
+)
+from sitzverteilung.wahldaten import lade_wahldaten
+
+pd = lade_bei_bedarf("pandas")
+
+
+@dataclass
+class Simulation:
+    """Ergebnisse aller Szenarien einer Monte-Carlo-Simulation"""
+
+    parteien: np.ndarray  # Namen der Parteien mit Zweitstimmen
+    sitze: np.ndarray  # Szenario × Partei
+    gesamtsitze: np.ndarray  # Szenario, einschließlich unabhängiger Wahlkreissieger
+    ueberhang: np.ndarray  # unausgeglichene Überhangsmandate je Szenario
+    unabhaengige: np.ndarray  # Sitze unabhängiger Wahlkreissieger je Szenario
+    # Zeile der siegreichen Partei je Szenario und Wahlkreis, -1 ohne Stimmen
+    wahlkreissieger: np.ndarray = None
+
+    @classmethod
+    def verbinde(cls, bloecke):
+        """
+        Füge die Ergebnisse mehrerer Blöcke von Szenarien zusammen
+
+            :param list bloecke: Simulationen mit gleichen Parteien
+            :return: Simulation aller Szenarien
+        """
+        return cls(
+            bloecke[0].parteien,
+            np.concatenate([block.sitze for block in bloecke]),
+            np.concatenate([block.gesamtsitze for block in bloecke]),
+            np.concatenate([block.ueberhang for block in bloecke]),
+            np.concatenate([block.unabhaengige for block in bloecke]),
+            np.concatenate([block.wahlkreissieger for block in bloecke]),
+        )
+
+    def quantile(self, anteile=(0.05, 0.5, 0.95)) -> pd.DataFrame:
+        """
+        Quantile der Sitze je Partei und der Gesamtsitzzahl
+
+            :param anteile: gewünschte Quantile
+            :return: Tabelle Partei × Quantil
+        """
+        werte = np.column_stack((self.sitze, self.gesamtsitze))
+        return pd.DataFrame(
+            np.quantile(werte, anteile, axis=0).T,
+            index=self.parteien.tolist() + ["Gesamt"],
+            columns=list(anteile),
+        )
+
+    def mehrheit(self, parteien) -> float:
+        """
+        Wahrscheinlichkeit, dass die angegebenen Parteien gemeinsam mehr als die Hälfte der Sitze erhalten
+
+            :param parteien: Partei oder Liste von Parteien
+            :return: Anteil der Szenarien mit absoluter Mehrheit
+        """
+        spalten = np.flatnonzero(np.isin(self.parteien, np.atleast_1d(parteien)))
+        return float((2 * self.sitze[:, spalten].sum(axis=1) > self.gesamtsitze).mean())
+
+    def groesser_als(self, sitze: int) -> float:
+        """
+        Wahrscheinlichkeit, dass das Parlament mehr als die angegebene Anzahl an Sitzen hat
+
+            :param sitze: Vergleichsgröße
+            :return: Anteil der Szenarien mit größerem Parlament
+        """
+        return float((self.gesamtsitze > sitze).mean())
+
+    def zusammenfassung(self) -> pd.DataFrame:
+        """
+        Fasse die Simulation je Partei zusammen: Mittelwert, Quantile und Wahrscheinlichkeit einer eigenen Mehrheit
+
+            :return: Tabelle Partei × Kennzahl
+        """
+        tabelle = self.quantile()
+        tabelle.insert(
+            0, "Mittelwert", np.append(self.sitze, self.gesamtsitze[:, None], 1).mean(0)
+        )
+        tabelle["Mehrheit"] = [self.mehrheit(partei) for partei in self.parteien] + [
+            np.nan
+        ]
+        return tabelle
+
+
+def berechne_sitze(pfad, seed=None) -> Simulation:
+    """
+    Berechne die Sitzverteilung der unveränderten Eingabedaten im Verzeichnis allein über Arrays, ohne pandas zu laden.
+    Lose werden mit dem Zufallsgenerator gezogen.
+
+        :param pfad: Verzeichnispfad
+        :param seed: Startwert des Zufallsgenerators für Lose
+        :return: Ergebnis als Simulation mit einem Szenario
+    """
+    pfad = Path(pfad)
+    rng = np.random.default_rng(seed)
+    daten = lade_wahldaten(pfad)
+    return berechne_szenarien(
+        daten,
+        setze_einstellungen(pfad),
+        daten.zweitstimmen[np.newaxis],
+        daten.erststimmen[np.newaxis],
+        rng,
+    )
+
+
+def simuliere(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    pfad,
+    anzahl=10000,
+    konzentration=2000,
+    konzentration_erststimmen=500,
+    seed=None,
+    blockgroesse=500,
+) -> Simulation:
+    """
+    Simuliere viele Wahlausgänge um die Eingabedaten im Verzeichnis und berechne für jeden die Sitzverteilung. Die
+    Anteile je Land (Zweitstimmen) und je Wahlkreis (Erststimmen) werden aus einer Dirichlet-Verteilung gezogen, die
+    Stimmenzahl je Gebiet bleibt erhalten. Lose werden mit dem Zufallsgenerator der Simulation gezogen.
+
+        :param pfad: Verzeichnispfad
+        :param anzahl: Anzahl der Szenarien
+        :param konzentration: Konzentrationsparameter der Zweitstimmen, None für unveränderte Stimmen
+        :param konzentration_erststimmen: Konzentrationsparameter der Erststimmen, None für unveränderte Stimmen
+        :param seed: Startwert des Zufallsgenerators
+        :param blockgroesse: Anzahl gemeinsam berechneter Szenarien, begrenzt den Speicherbedarf
+        :return: Ergebnisse aller Szenarien
+    """
+    pfad = Path(pfad)
+    rng = np.random.default_rng(seed)
+    daten = lade_wahldaten(pfad)
+    einstellungen = setze_einstellungen(pfad)
+    return Simulation.verbinde(
+        [
+            berechne_szenarien(daten, einstellungen, zweitstimmen, erststimmen, rng)
+            for zweitstimmen, erststimmen in ziehe_szenarien(
+                daten,
+                anzahl,
+                (konzentration, konzentration_erststimmen),
+                rng,
+                blockgroesse,
+            )
+        ]
+    )
+
+
+def ziehe_szenarien(daten, anzahl, konzentrationen, rng, blockgroesse=500):
+    """
+    Ziehe die Stimmen der Szenarien blockweise, der nächste Block wird erst nach Berechnung des vorigen gezogen
+
+        :param Wahldaten daten: Eingabedaten
+        :param int anzahl: Anzahl der Szenarien
+        :param tuple konzentrationen: Konzentrationsparameter der Zweit- und Erststimmen, None für unveränderte Stimmen
+        :param np.random.Generator rng: Zufallsgenerator
+        :param int blockgroesse: Anzahl gemeinsam gezogener Szenarien
+        :return: Generator über Zweitstimmen und Erststimmen je Block
+    """
+    for start in range(0, anzahl, blockgroesse):
+        umfang = min(blockgroesse, anzahl - start)
+        yield (
+            ziehe_stimmen(daten.zweitstimmen, konzentrationen[0], umfang, rng),
+            ziehe_stimmen(daten.erststimmen, konzentrationen[1], umfang, rng),
+        )
+
+
+def ziehe_stimmen(stimmen, konzentration, anzahl, rng) -> np.ndarray:
+    """
+    Ziehe Stimmenverteilungen je Spalte aus einer Dirichlet-Verteilung mit Erwartungswert der vorliegenden Anteile. Die
+    Stimmenzahl je Spalte bleibt bis auf Rundung erhalten.
+
+        :param np.ndarray stimmen: Stimmen je Partei (Zeilen) und Gebiet (Spalten)
+        :param konzentration: Konzentrationsparameter, None für unveränderte Stimmen
+        :param int anzahl: Anzahl der Szenarien
+        :param np.random.Generator rng: Zufallsgenerator
+        :return: Stimmen je Szenario, Partei und Gebiet
+        :rtype: np.ndarray
+    """
+    if konzentration is None:
+        return np.broadcast_to(stimmen, (anzahl,) + stimmen.shape)
+    summe = stimmen.sum(axis=0)
+    # nur Einträge mit Stimmen ziehen, Parteien ohne Stimmen in einem Gebiet bleiben bei null
+    zeile, spalte = np.nonzero(stimmen)
+    gamma = np.zeros((anzahl,) + stimmen.shape)
+    gamma[:, zeile, spalte] = rng.standard_gamma(
+        konzentration * stimmen[zeile, spalte] / summe[spalte],
+        size=(anzahl, len(zeile)),
+    )
+    normierung = gamma.sum(axis=1, keepdims=True)
+    np.divide(gamma, normierung, out=gamma, where=normierung > 0)
+    return np.floor(gamma * summe).astype("int64")
+
+
+def berechne_szenarien(  # pylint: disable=too-many-locals
+    daten, einstellungen, zweitstimmen, erststimmen, rng
+):
+    """
+    Berechne die Sitzverteilung für einen Block von Szenarien
+
+        :param Wahldaten daten: Eingabedaten
+        :param dict einstellungen: Einstellungen aus setze_einstellungen
+        :param np.ndarray zweitstimmen: Zweitstimmen je Szenario, Partei und Land
+        :param np.ndarray erststimmen: Erststimmen je Szenario, Partei und Wahlkreis
+        :param np.random.Generator rng: Zufallsgenerator für Lose
+        :return: Ergebnisse der Szenarien des Blocks
+        :rtype: Simulation
+    """
+    parteien = zweitstimmen.shape[1]
+    sieger = ziehe_wahlkreissieger(erststimmen, rng)
+    direktmandate = zaehle_direktmandate(
+        sieger, daten.wahlkreis_land, len(daten.parteien), len(daten.laender)
+    )
+    zugelassen, mehrheitssieger = ermittle_zulassung(
+        einstellungen["hürde"], daten.parteien, zweitstimmen, direktmandate
+    )
+
+    # Wahlkreissieger nicht zugelassener Parteien verkleinern die zu verteilende Sitzzahl
+    unabhaengige = direktmandate.sum(axis=2)
+    unabhaengige[:, :parteien] *= ~zugelassen
+    unabhaengige = unabhaengige.sum(axis=1)
+    gesamtsitze = einstellungen["sitze_geplant"] - unabhaengige
+
+    stimmen = zweitstimmen * zugelassen[:, :, np.newaxis]
+    mindestsitze = berechne_mindestsitze(
+        stimmen,
+        direktmandate[:, :parteien],
+        daten.bevoelkerung,
+        gesamtsitze,
+        einstellungen,
+        rng,
+    )
+    sitze, gesamtsitze, ueberhang = oberverteilung(
+        stimmen.sum(axis=2).T,
+        mindestsitze.T * zugelassen.T,
+        gesamtsitze,
+        einstellungen,
+        rng,
+    )
+    wende_mehrheitsklausel_an(sitze, gesamtsitze, mehrheitssieger)
+
+    return Simulation(
+        daten.parteien[:parteien],
+        sitze.T,
+        gesamtsitze + unabhaengige,
+        ueberhang,
+        unabhaengige,
+        sieger.astype(np.min_scalar_type(-len(daten.parteien))),
+    )
+
+
+def oberverteilung(stimmen, mindestsitze, gesamtsitze, einstellungen, rng):
+    """
+    Erhöhe die Gesamtsitzzahl bis die Mindestsitze erreicht sind und verteile sie auf die Parteien
+
+        :param np.ndarray stimmen: Zweitstimmen zugelassener Parteien je Partei (Zeilen) und Szenario (Spalten)
+        :param np.ndarray mindestsitze: Mindestsitze in gleicher Form
+        :param np.ndarray gesamtsitze: Sitzzahl vor der Erhöhung je Szenario
+        :param dict einstellungen: Einstellungen aus setze_einstellungen
+        :param np.random.Generator rng: Zufallsgenerator für Lose
+        :return: Sitze je Partei und Szenario, Gesamtsitze, unausgeglichene Überhangsmandate
+        :rtype: (np.ndarray, np.ndarray, np.ndarray)
+    """
+    regel = zuteilungsregel(einstellungen["verfahren"])
+    gesamtsitze, _ = gesamtsitze_matrix(
+        stimmen,
+        mindestsitze,
+        gesamtsitze,
+        einstellungen["ueberhang"],
+        einstellungen["obergrenze"],
+        regel,
+    )
+    sitze = verteile_mit_los(stimmen, gesamtsitze, rng, regel)
+    differenz = np.maximum(mindestsitze - sitze, 0)
+    ueberhang = differenz.sum(axis=0)
+    return sitze + differenz, gesamtsitze + ueberhang, ueberhang
+
+
+def wende_mehrheitsklausel_an(sitze, gesamtsitze, mehrheitssieger):
+    """
+    Wenn eine Partei über 50 % der Stimmen gewinnt, stehen ihr über 50 % der Sitze zu. Die Sitze werden in den
+    übergebenen Arrays erhöht.
+
+        :param np.ndarray sitze: Sitze je Partei (Zeilen) und Szenario (Spalten)
+        :param np.ndarray gesamtsitze: Gesamtsitze je Szenario
+        :param np.ndarray mehrheitssieger: Partei mit absoluter Stimmenmehrheit je Szenario, -1 für keine
+    """
+    szenarien = np.flatnonzero(mehrheitssieger >= 0)
+    zusatz = np.maximum(
+        gesamtsitze[szenarien] - 2 * sitze[mehrheitssieger[szenarien], szenarien] + 1,
+        0,
+    )
+    sitze[mehrheitssieger[szenarien], szenarien] += zusatz
+    gesamtsitze[szenarien] += zusatz
+
+
+def berechne_mindestsitze(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    stimmen, direktmandate, bevoelkerung, gesamtsitze, einstellungen, rng
+):
+    """
+    Verteile die Sitze auf die Länder, berechne die erste Unterverteilung aller Länder aller Szenarien in einem
+    Durchlauf und daraus die Mindestsitze
+
+        :param np.ndarray stimmen: Zweitstimmen zugelassener Parteien je Szenario, Partei und Land
+        :param np.ndarray direktmandate: Direktmandate in gleicher Form
+        :param np.ndarray bevoelkerung: Bevölkerung je Land
+        :param np.ndarray gesamtsitze: Sitzzahl vor der Erhöhung je Szenario
+        :param dict einstellungen: Einstellungen aus setze_einstellungen
+        :param np.random.Generator rng: Zufallsgenerator für Lose
+        :return: Mindestsitze je Szenario und Partei
+        :rtype: np.ndarray
+    """
+    anzahl, parteien, laender = stimmen.shape
+    regel = zuteilungsregel(einstellungen["verfahren"])
+    landessitze = verteile_mit_los(
+        np.repeat(bevoelkerung[:, np.newaxis], anzahl, axis=1),
+        gesamtsitze,
+        rng,
+        regel,
+    )
+    # Länder ohne ausgezählte Zweitstimmen erhalten wie in verteile_landeslisten keine Listensitze
+    spalten = np.moveaxis(stimmen, 1, 0).reshape(parteien, -1)
+    ausgezaehlt = np.flatnonzero(spalten.sum(axis=0) > 0)
+    erste_unterverteilung = np.zeros(spalten.shape, dtype="int64")
+    erste_unterverteilung[:, ausgezaehlt] = verteile_mit_los(
+        spalten[:, ausgezaehlt],
+        landessitze.T.ravel()[ausgezaehlt],
+        rng,
+        regel,
+    )
+    erste_unterverteilung = np.moveaxis(
+        erste_unterverteilung.reshape((parteien, anzahl, laender)), 0, 1
+    )
+    return kombiniere_mindestsitze(
+        direktmandate, erste_unterverteilung, einstellungen["mindestsitze_methode"]
+    ).sum(axis=2)
+
+
+def ziehe_wahlkreissieger(erststimmen, rng) -> np.ndarray:
+    """
+    Bestimme die Wahlkreissieger aller Szenarien. Gleichstände entscheidet der Zufallsgenerator.
+
+        :param np.ndarray erststimmen: Erststimmen je Szenario, Partei und Wahlkreis
+        :param np.random.Generator rng: Zufallsgenerator
+        :return: Zeile der siegreichen Partei je Szenario und Wahlkreis, -1 für Wahlkreise ohne Stimmen
+        :rtype: np.ndarray
+    """
+    maximum = erststimmen.max(axis=1)
+    sieger = erststimmen.argmax(axis=1)
+
+    gleichstand = (erststimmen == maximum[:, np.newaxis]).sum(axis=1) > 1
+    szenario, wahlkreis = np.nonzero(gleichstand & (maximum > 0))
+    if len(szenario):
+        kandidaten = (
+            erststimmen[szenario, :, wahlkreis]
+            == maximum[szenario, wahlkreis, np.newaxis]
+        )
+        sieger[szenario, wahlkreis] = np.argmax(
+            np.where(kandidaten, rng.random(kandidaten.shape), -1), axis=1
+        )
+    return np.where(maximum > 0, sieger, -1)
+
+
+def zaehle_direktmandate(sieger, wahlkreis_land, parteien, laender) -> np.ndarray:
+    """
+    Zähle die Wahlkreissieger aller Szenarien je Partei und Land
+
+        :param np.ndarray sieger: Zeile der siegreichen Partei je Szenario und Wahlkreis, -1 für keine
+        :param np.ndarray wahlkreis_land: Land je Wahlkreis
+        :param int parteien: Anzahl der Parteien
+        :param int laender: Anzahl der Länder
+        :return: Direktmandate je Szenario, Partei und Land
+        :rtype: np.ndarray
+    """
+    anzahl = len(sieger)
+    szenario, wahlkreis = np.nonzero(sieger >= 0)
+    position = (
+        szenario * parteien + sieger[szenario, wahlkreis]
+    ) * laender + wahlkreis_land[wahlkreis]
+    anzahl_je_feld = np.bincount(position, minlength=anzahl * parteien * laender)
+    return anzahl_je_feld.reshape((anzahl, parteien, laender))
+
+
+def ermittle_zulassung(huerde, parteien, zweitstimmen, direktmandate):
+    """
+    Bestimme je Szenario, welche Parteien zur Sitzzuteilung zugelassen sind
+
+        :param dict huerde: Hürde aus den Einstellungen
+        :param np.ndarray parteien: alle Parteien, zuerst die mit Zweitstimmen
+        :param np.ndarray zweitstimmen: Zweitstimmen je Szenario, Partei und Land
+        :param np.ndarray direktmandate: Direktmandate je Szenario, Partei und Land
+        :return: Zulassung je Szenario und Partei, Mehrheitssieger je Szenario (-1 für keinen)
+        :rtype: (np.ndarray, np.ndarray)
+    """
+    stimmen = zweitstimmen.sum(axis=2)
+    summe = stimmen.sum(axis=1, keepdims=True)
+    # Szenarien ohne Zweitstimmen erhalten 0 %, die Sitzzuteilung weist sie anschließend zurück
+    prozent = np.divide(
+        100 * stimmen, summe, out=np.zeros(stimmen.shape), where=summe > 0
+    )
+    mehrheitssieger = np.where(
+        (prozent > 50).any(axis=1), np.argmax(prozent > 50, axis=1), -1
+    )
+
+    zugelassen = np.zeros(stimmen.shape, dtype=bool)
+    if "Prozent" in huerde.keys():
+        zugelassen |= prozent >= huerde["Prozent"]
+    if "Direkt" in huerde.keys():
+        direkt = direktmandate[:, : stimmen.shape[1]].sum(axis=2)
+        zugelassen |= direkt >= huerde["Direkt"]
+    if "Ausnahmen" in huerde.keys():
+        ausnahmen = np.isin(parteien[: stimmen.shape[1]], list(huerde["Ausnahmen"]))
+        zugelassen[:, ausnahmen] = True
+    return zugelassen, mehrheitssieger
+
+
+def verteile_mit_los(stimmen, sitze, rng, regel=SAINTE_LAGUE) -> np.ndarray:
+    """
+    Verteile die Sitze je Spalte und entscheide Gleichstände mit dem Zufallsgenerator
+
+        :param np.ndarray stimmen: Stimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param np.ndarray sitze: Anzahl zu verteilender Sitze je Spalte
+        :param np.random.Generator rng: Zufallsgenerator
+        :param Zuteilungsregel regel: Zuteilungsregel, standardmäßig Sainte-Laguë
+        :return: Sitze je Partei und Verteilung
+        :rtype: np.ndarray
+    """
+    sitzzahl, losmaske = verteile(stimmen, sitze, regel)
+    if losmaske.any():
+        fehlend = sitze - sitzzahl.sum(axis=0)
+        reihenfolge = np.argsort(
+            np.where(losmaske, -rng.random(losmaske.shape), 1), axis=0
+        )
+        rang = np.argsort(reihenfolge, axis=0)
+        sitzzahl = sitzzahl + (losmaske & (rang < fehlend))
+    return sitzzahl.astype("int64")
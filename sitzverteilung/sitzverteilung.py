@@ -1,99 +1,495 @@
 """Dieses Modul berechnet eine Sitzverteilung nach art des deutschen Bundestages"""
 
+from __future__ import annotations
+
+from collections import ChainMap
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
 import numpy as np
-import pandas as pd
 
 # pylint: disable=no-name-in-module, import-error
-from sitzverteilung.hilfsmittel import load_yaml
-from sitzverteilung.rechner.sainte_lague import SainteLague, losentscheid
+from sitzverteilung.hilfsmittel import lade_bei_bedarf, load_yaml
+from sitzverteilung.profil import stufe, zaehle
+from sitzverteilung.rechner.ganzzahl import (
+    SAINTE_LAGUE,
+    als_ganzzahlen,
+    gleichauf_maximum,
+    verteile,
+    verteilungsmatrix,
+)
+from sitzverteilung.rechner.losverfahren import Losziehung
+from sitzverteilung.rechner.sainte_lague import losentscheid
+from sitzverteilung.rechner.verfahren import Sitzzuteilung, zuteilungsregel
+from sitzverteilung.wahldaten import lade_wahldaten
+
+pd = lade_bei_bedarf("pandas")
+
+METHODE_STRING = "ganzzahl"
+
+
+@dataclass
+class Ergebnis:  # pylint: disable=too-many-instance-attributes
+    """
+    Ergebnis einer Sitzverteilungsberechnung mit allen Zwischenergebnissen
+
+        :ivar sitze: Stimmen und Sitze je Partei, unabhängige Wahlkreissieger mit Stimmen -1
+        :ivar gesamtsitze: Gesamtanzahl der Sitze
+        :ivar landesverteilung: Stimmen und Sitze je Land
+        :ivar unterverteilung: Sitze der ersten Unterverteilung je Partei und Land
+        :ivar direktmandate: Direktmandate je Partei und Land
+        :ivar mindestsitze: Mindestsitze je Partei
+        :ivar ueberhang: unausgeglichene Überhangsmandate je Partei
+        :ivar zitierdivisoren: Zitierdivisoren für "Länder", "Oberverteilung" und je Land der ersten Unterverteilung,
+            letztere werden erst beim Zugriff berechnet
+        :ivar lose: Empfänger gelöster Sitze je Verteilung mit Losentscheid
+        :ivar iterationen: Anzahl der Bisektionsschritte bei der Suche nach der Gesamtsitzzahl
+        :ivar mehrheitssieger: Partei mit über 50 % der Zweitstimmen oder None
+        :ivar unabhaengige: Direktmandate je Wahlkreissieger ohne zugelassene Partei
+    """
 
-METHODE_STRING = "divisor"
+    sitze: pd.DataFrame = None
+    gesamtsitze: int = 0
+    landesverteilung: pd.DataFrame = None
+    unterverteilung: pd.DataFrame = None
+    direktmandate: pd.DataFrame = None
+    mindestsitze: pd.Series = None
+    ueberhang: pd.Series = None
+    zitierdivisoren: Mapping = field(default_factory=dict)
+    lose: dict = field(default_factory=dict)
+    iterationen: int = 0
+    mehrheitssieger: str = None
+    unabhaengige: pd.Series = None
 
 
-def sitzverteilung(pfad):
+def sitzverteilung(pfad, einstellungen=None, ausgabe=False, losverfahren=None):
     """
     Berechne die Sitzverteilung mit den Eingabedaten im Verzeichnis
 
         :param pfad: Verzeichnispfad
+        :param dict einstellungen: Einträge, die Einstellungen.yaml überschreiben, z. B. {"Mindestsitze": "Pur"}
+        :param bool ausgabe: gib Zwischenergebnisse auf der Konsole aus, sonst werden keine Tabellen formatiert
+        :param losverfahren: Losverfahren für Gleichstände, siehe Losverfahren, standardmäßig interaktiv
+        :return: Sitzverteilung mit Zwischenergebnissen
+        :rtype: Ergebnis
     """
-    # initialisiere Sitzverteilungsrechner
-    sainte_lague = SainteLague(METHODE_STRING)
+    ergebnis = Ergebnis()
+    losentscheide = Losentscheide(losverfahren, ergebnis.lose, ausgabe)
 
     # Lade Daten aus Dateien
-    laender_yaml = load_yaml(pfad / "Länder.yaml")
-    laender = pd.DataFrame(
-        index=laender_yaml.keys(), data={"Stimmen": laender_yaml.values()}
-    )
-    erststimmen = {
-        key: pd.DataFrame(value)
-        for key, value in load_yaml(pfad / "Erststimme.yaml").items()
-    }
-    zweitstimmen = pd.DataFrame(load_yaml(pfad / "Zweitstimme.yaml"))
+    with stufe("Eingaben laden"):
+        laender, erststimmen, zweitstimmen = lade_eingaben(pfad)
 
-    # Zur Übersichtlichkeit in Zukunft: Einstellungen zu dict umbauen
-    einstellungen = setze_einstellungen(pfad)
-    direktmandate, mehrheitssieger, zweitstimmen = ermittle_zulassung(
-        einstellungen["hürde"], erststimmen, zweitstimmen
-    )
+        # Zur Übersichtlichkeit in Zukunft: Einstellungen zu dict umbauen
+        einstellungen = setze_einstellungen(pfad, einstellungen)
+    with stufe("Zulassung"):
+        ergebnis.direktmandate, ergebnis.mehrheitssieger, zweitstimmen = (
+            ermittle_zulassung(
+                einstellungen["hürde"], erststimmen, zweitstimmen, losentscheide
+            )
+        )
 
     # Überprüfe, ob es "unabhängige" Wahlkreissieger gibt
-    unabhaengige = direktmandate.drop(zweitstimmen.index).sum(axis=1)
-    unabhaengige = unabhaengige[unabhaengige > 0]
-    gesamtsitze = einstellungen["sitze_geplant"] - unabhaengige.sum()
+    ergebnis.unabhaengige = unabhaengige_sieger(
+        ergebnis.direktmandate, zweitstimmen.index
+    )
+    gesamtsitze = einstellungen["sitze_geplant"] - ergebnis.unabhaengige.sum()
 
     # Verteilung der Sitze auf die Länder
-    print("Verteile Sitze auf Länder")
-    laender, lose = sainte_lague(laender, gesamtsitze)
-    if lose:
-        laender = losentscheid(laender, lose, gesamtsitze)
+    melde(ausgabe, "Verteile Sitze auf Länder")
+    with stufe("Landesverteilung"):
+        laender = verteile_auf_laender(
+            laender, gesamtsitze, losentscheide, einstellungen["verfahren"]
+        )
+    ergebnis.landesverteilung = laender
 
-    mindestsitze = bestimme_mindestsitze(
-        direktmandate, laender, einstellungen["mindestsitze_methode"], zweitstimmen
-    )
+    melde(ausgabe, f"erste Unterverteilung in {', '.join(laender.index)}")
+    with stufe("Unterverteilung"):
+        ergebnis.mindestsitze, ergebnis.unterverteilung = bestimme_mindestsitze(
+            ergebnis.direktmandate,
+            laender,
+            einstellungen["mindestsitze_methode"],
+            zweitstimmen,
+            losentscheide,
+            einstellungen["verfahren"],
+        )
+    with stufe("Oberverteilung"):
+        return verteile_oberverteilung(
+            ergebnis, zweitstimmen, einstellungen, losentscheide, ausgabe
+        )
+
+
+def verteile_oberverteilung(
+    ergebnis, zweitstimmen, einstellungen, losentscheide, ausgabe=False
+):
+    """
+    Bestimme die Gesamtsitzzahl, verteile sie auf die Parteien und wende die Mehrheitsklausel an. Direktmandate,
+    Mehrheitssieger, unabhängige Wahlkreissieger, Landes- und erste Unterverteilung sowie Mindestsitze müssen im
+    Ergebnis bereits eingetragen sein.
+
+        :param Ergebnis ergebnis: Ergebnis bis einschließlich der Mindestsitze, wird vervollständigt
+        :param pd.DataFrame zweitstimmen: Zweitstimmen der zugelassenen Parteien je Land
+        :param dict einstellungen: Einstellungen, siehe setze_einstellungen
+        :param Losentscheide losentscheide: Losverfahren und Protokoll
+        :param bool ausgabe: gib Zwischenergebnisse auf der Konsole aus
+        :return: vollständiges Ergebnis
+        :rtype: Ergebnis
+    """
+    unabhaengige = ergebnis.unabhaengige
+    gesamtsitze = einstellungen["sitze_geplant"] - unabhaengige.sum()
 
     # Verteilung der Gesamtsitzanzahl
-    print("Oberverteilung")
+    melde(ausgabe, "Oberverteilung")
     stimmen = pd.DataFrame({"Stimmen": zweitstimmen.sum(axis=1)})
-    stimmen, lose = sainte_lague(stimmen, gesamtsitze)
+    if ausgabe:
+        print(
+            "Überhangsmandate\n",
+            pd.Series(
+                ueberhangsmandate(
+                    stimmen["Stimmen"],
+                    ergebnis.mindestsitze,
+                    gesamtsitze,
+                    einstellungen["verfahren"],
+                ),
+                index=stimmen.index,
+            ),
+        )
+    with stufe("Gesamtsitze bestimmen"):
+        ergebnis.gesamtsitze, ergebnis.iterationen = bestimme_gesamtsitze(
+            stimmen["Stimmen"],
+            ergebnis.mindestsitze,
+            gesamtsitze,
+            einstellungen["ueberhang"],
+            einstellungen["obergrenze"],
+            einstellungen["verfahren"],
+        )
+    zaehle("Schritte der Oberverteilung", ergebnis.iterationen)
+    if ergebnis.gesamtsitze > gesamtsitze:
+        melde(ausgabe, f"erhöhe Sitzanzahl auf {ergebnis.gesamtsitze}")
+    gesamtsitze = ergebnis.gesamtsitze
+    stimmen, lose = Sitzzuteilung(einstellungen["verfahren"], METHODE_STRING)(
+        stimmen, gesamtsitze
+    )
     if lose:
-        stimmen = losentscheid(stimmen, lose, gesamtsitze)
-    differenz = mindestsitze - stimmen["Sitze"]
-    differenz = differenz.where(differenz > 0, 0)
-    print("Überhangsmandate\n", differenz)
-    while differenz.sum() > einstellungen["ueberhang"] and gesamtsitze < (
-        einstellungen["obergrenze"] - differenz.sum()
-    ):
-        gesamtsitze += differenz.sum() - einstellungen["ueberhang"]
-        print(f"erhöhe Sitzanzahl auf {gesamtsitze}")
-        if gesamtsitze >= (einstellungen["obergrenze"] - differenz.sum()):
-            print(f'Obergrenze von {einstellungen["obergrenze"]} erreicht')
-            gesamtsitze = einstellungen["obergrenze"] - differenz.sum()
-        stimmen, lose = sainte_lague(stimmen, gesamtsitze)
-        if lose:
-            stimmen = losentscheid(stimmen, lose, gesamtsitze)
-        differenz = mindestsitze - stimmen["Sitze"]
-        differenz = differenz.where(differenz > 0, 0)
-    stimmen["Sitze"] += differenz
-    gesamtsitze += differenz.sum()
-    print("Unausgeglichene Überhangsmandate\n", differenz)
+        stimmen = losentscheide.ziehe(stimmen, lose, gesamtsitze, "Oberverteilung")
+    differenz = ergebnis.mindestsitze - stimmen["Sitze"]
+    ergebnis.ueberhang = differenz.where(differenz > 0, 0)
+    if ergebnis.ueberhang.sum() > einstellungen["ueberhang"]:
+        melde(ausgabe, f'Obergrenze von {einstellungen["obergrenze"]} erreicht')
+    stimmen["Sitze"] += ergebnis.ueberhang
+    gesamtsitze += ergebnis.ueberhang.sum()
+    melde(ausgabe, "Unausgeglichene Überhangsmandate\n", ergebnis.ueberhang)
 
     # Wenn eine Partei über 50 % der Stimmen gewinnt, stehen ihr über 50 % der Sitze zu
-    if mehrheitssieger is not None:
-        while stimmen.at[mehrheitssieger, "Sitze"] * 2 <= gesamtsitze:
-            print(f"erhöhe Sitze von {mehrheitssieger} auf über 50%")
-            stimmen.at[mehrheitssieger, "Sitze"] += 1
+    if ergebnis.mehrheitssieger is not None:
+        while stimmen.at[ergebnis.mehrheitssieger, "Sitze"] * 2 <= gesamtsitze:
+            melde(ausgabe, f"erhöhe Sitze von {ergebnis.mehrheitssieger} auf über 50%")
+            stimmen.at[ergebnis.mehrheitssieger, "Sitze"] += 1
             gesamtsitze += 1
-    stimmen = (
+    # die Zitierdivisoren der Unterverteilung werden erst beim Zugriff berechnet
+    ergebnis.zitierdivisoren = ChainMap(
+        {
+            "Länder": ergebnis.landesverteilung.attrs.get("Zitierdivisor"),
+            "Oberverteilung": stimmen.attrs.get("Zitierdivisor"),
+        },
+        ergebnis.unterverteilung.attrs.get("Zitierdivisor", {}),
+    )
+    ergebnis.sitze = (
         pd.concat((stimmen, unabhaengige[unabhaengige > 0].to_frame(name="Sitze")))
         .fillna(-1)
         .astype("int64")
     )
-    gesamtsitze += unabhaengige.sum()
-    print("Gesamtanzahl Sitze: ", gesamtsitze)
-    print("Sitzverteilung\n", stimmen)
+    ergebnis.gesamtsitze = int(gesamtsitze + unabhaengige.sum())
+    melde(ausgabe, "Gesamtanzahl Sitze: ", ergebnis.gesamtsitze)
+    melde(ausgabe, "Sitzverteilung\n", ergebnis.sitze)
+    return ergebnis
+
+
+def unabhaengige_sieger(direktmandate, parteien):
+    """
+    Bestimme die Wahlkreissieger, deren Partei nicht an der Sitzverteilung teilnimmt
+
+        :param pd.DataFrame direktmandate: Direktmandate je Partei und Land
+        :param pd.Index parteien: zugelassene Parteien
+        :return: Direktmandate je nicht zugelassener Partei mit mindestens einem Direktmandat
+        :rtype: pd.Series
+    """
+    unabhaengige = direktmandate.drop(parteien).sum(axis=1)
+    return unabhaengige[unabhaengige > 0]
+
+
+def verteile_auf_laender(
+    laender, gesamtsitze, losentscheide, verfahren=SAINTE_LAGUE.name
+):
+    """
+    Verteile die Sitze nach der Bevölkerung auf die Länder
+
+        :param pd.DataFrame laender: Länder mit Spalte Stimmen
+        :param int gesamtsitze: zu verteilende Sitze
+        :param Losentscheide losentscheide: Losverfahren und Protokoll
+        :param str verfahren: Zuteilungsverfahren, siehe VERFAHREN
+        :return: Länder mit Stimmen und Sitzen
+        :rtype: pd.DataFrame
+    """
+    laender, lose = Sitzzuteilung(verfahren, METHODE_STRING)(laender, gesamtsitze)
+    if lose:
+        laender = losentscheide.ziehe(laender, lose, gesamtsitze, "Länder")
+    return laender
+
+
+def lade_eingaben(pfad):
+    """
+    Lade die Stimmen aus den Eingabedateien im Verzeichnis über den Zwischenspeicher. Die Erststimmen bleiben im
+    kompakten Datenmodell, Länder und Zweitstimmen werden als kleine Tabellen über dessen Arrays gereicht.
+
+        :param pfad: Verzeichnispfad
+        :return: Länder mit Stimmen, Eingabedaten als Arrays, Zweitstimmen Partei × Land
+        :rtype: (pd.DataFrame, Wahldaten, pd.DataFrame)
+    """
+    daten = lade_wahldaten(pfad)
+    return daten.laender_tabelle(), daten, daten.zweitstimmen_tabelle()
+
+
+def melde(ausgabe, *werte):
+    """
+    Gib die Werte aus, wenn die Ausgabe eingeschaltet ist. Tabellen werden erst bei der Ausgabe formatiert.
+
+        :param bool ausgabe: Ausgabe eingeschaltet
+        :param werte: auszugebende Werte wie bei print
+    """
+    if ausgabe:
+        print(*werte)
+
+
+@dataclass
+class Losentscheide:
+    """Losverfahren einer Berechnung und Protokoll der Empfänger geloster Sitze je Verteilung"""
+
+    verfahren: Losziehung = None
+    gezogen: dict = field(default_factory=dict)
+    # Gleichstände auf der Konsole melden, wie ausgabe von sitzverteilung()
+    ausgabe: bool = False
+
+    def ziehe(self, tabelle, lose, sitze, verteilung):
+        """
+        Führe einen Losentscheid mit dem Losverfahren durch und vermerke die Empfänger der gelosten Sitze
+
+            :param pd.DataFrame tabelle: Tabelle mit Sitzverteilung vor der Verlosung
+            :param list lose: Liste mit Losen für den Lostopf
+            :param int sitze: Soll-Anzahl Sitze
+            :param str verteilung: Name der Verteilung
+            :return: Tabelle mit Sitzverteilung nach der Verlosung
+            :rtype: pd.DataFrame
+        """
+        ergebnis = losentscheid(tabelle, lose, sitze, self.verfahren)
+        ergebnis.attrs = tabelle.attrs
+        zusatz = ergebnis["Sitze"] - tabelle["Sitze"]
+        zaehle("Losentscheide")
+        zaehle("geloste Sitze", int(zusatz.sum()))
+        self.gezogen[verteilung] = zusatz.index[zusatz > 0].to_list()
+        melde(self.ausgabe, f"Lose an {self.gezogen[verteilung]}")
+        return ergebnis
+
+
+def bestimme_gesamtsitze(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    stimmen,
+    mindestsitze,
+    gesamtsitze,
+    ueberhang,
+    obergrenze,
+    verfahren=SAINTE_LAGUE.name,
+):
+    """
+    Bestimme die kleinste Gesamtsitzzahl ab gesamtsitze, bei der höchstens `ueberhang` Überhangsmandate unausgeglichen
+    bleiben oder die Sitzzahl samt Überhangsmandaten die Obergrenze erreicht
+
+        :param pd.Series stimmen: Zweitstimmen je Partei
+        :param pd.Series mindestsitze: Mindestsitze je Partei
+        :param int gesamtsitze: Sitzzahl vor der Erhöhung
+        :param int ueberhang: Anzahl nicht auszugleichender Überhangsmandate
+        :param obergrenze: Maximale Anzahl an Sitzen
+        :param str verfahren: Zuteilungsverfahren, siehe VERFAHREN
+        :return: Gesamtsitzzahl ohne unausgeglichene Überhangsmandate, Anzahl der dafür berechneten Verteilungen
+        :rtype: (int, int)
+    """
+    mindestsitze = mindestsitze.reindex(stimmen.index).fillna(0).to_numpy("int64")
+    erhoehung, iterationen = gesamtsitze_matrix(
+        stimmen.to_numpy()[:, np.newaxis],
+        mindestsitze[:, np.newaxis],
+        np.array([gesamtsitze]),
+        ueberhang,
+        obergrenze,
+        zuteilungsregel(verfahren),
+    )
+    return int(erhoehung[0]), iterationen
+
+
+def gesamtsitze_matrix(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    stimmen, mindestsitze, gesamtsitze, ueberhang, obergrenze, regel=SAINTE_LAGUE
+):
+    """
+    Bestimme für viele Verteilungen gleichzeitig die kleinste Gesamtsitzzahl, siehe bestimme_gesamtsitze. Da
+    Sainte-Laguë hausmonoton ist, wird je Spalte das Intervall bis zur Sitzzahl beim Mindestdivisor
+    min(Stimmen / (Mindestsitze - 0.5)) halbiert, wobei alle offenen Spalten je Schritt gemeinsam verteilt werden.
+    Für die übrigen hausmonotonen Divisorverfahren wird die obere Schranke durch Verdoppeln gesucht. Hare-Niemeyer
+    ist nicht hausmonoton, dort werden die Sitzzahlen bis zur Schranke der abgerundeten Quoten blockweise geprüft.
+
+        :param np.ndarray stimmen: Zweitstimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param np.ndarray mindestsitze: Mindestsitze in gleicher Form
+        :param np.ndarray gesamtsitze: Sitzzahl vor der Erhöhung je Spalte
+        :param int ueberhang: Anzahl nicht auszugleichender Überhangsmandate
+        :param obergrenze: Maximale Anzahl an Sitzen
+        :param Zuteilungsregel regel: Zuteilungsregel, standardmäßig Sainte-Laguë
+        :return: Gesamtsitzzahl je Spalte, Anzahl der Verteilungsschritte einschließlich der Prüfung der Startwerte
+        :rtype: (np.ndarray, int)
+    """
+    mindestsitze = np.asarray(mindestsitze, dtype="int64")
+    stimmen = als_ganzzahlen(stimmen, 4 * (int(mindestsitze.max(initial=0)) + 1))
+    untergrenze = np.asarray(gesamtsitze, dtype="int64").copy()
+
+    def erreicht(spalten, sitze, mindest=mindestsitze):
+        sitzzahl, _ = verteile(stimmen[:, spalten], sitze, regel)
+        differenz = np.maximum(mindest[:, spalten] - sitzzahl, 0).sum(axis=0)
+        return (differenz <= ueberhang) | (sitze + differenz >= obergrenze)
+
+    iterationen = 0
+    if regel is SAINTE_LAGUE:
+        obergrenze_suche = sitze_beim_mindestdivisor(stimmen, mindestsitze, untergrenze)
+    elif regel.hausmonoton:
+        # Parteien ohne Stimmen erreichen ihre Mindestsitze nie, sie beenden das Verdoppeln nicht
+        obergrenze_suche = untergrenze.copy()
+        mindest = np.where(stimmen > 0, mindestsitze, 0)
+        offen = np.ones(untergrenze.shape, dtype=bool)
+        while offen.any():
+            spalten = np.flatnonzero(offen)
+            obergrenze_suche[spalten] *= 2
+            if obergrenze < np.inf:
+                obergrenze_suche = np.minimum(obergrenze_suche, int(obergrenze))
+            stimmen = als_ganzzahlen(stimmen, 4 * (int(obergrenze_suche.max()) + 1))
+            offen[spalten[erreicht(spalten, obergrenze_suche[spalten], mindest)]] = (
+                False
+            )
+            iterationen += 1
+    else:
+        obergrenze_suche = sitze_bei_quote(stimmen, mindestsitze, untergrenze)
+    if obergrenze < np.inf:
+        obergrenze_suche = np.minimum(obergrenze_suche, int(obergrenze))
+    stimmen = als_ganzzahlen(stimmen, 4 * (int(obergrenze_suche.max()) + 1))
+
+    # Suche: erreicht(untergrenze) ist falsch, erreicht(obergrenze_suche) wahr
+    offen = ~erreicht(slice(None), untergrenze)
+    obergrenze_suche = np.where(offen, obergrenze_suche, untergrenze)
+    offen &= obergrenze_suche - untergrenze > 1
+    iterationen += 1
+    while offen.any():
+        spalten = np.flatnonzero(offen)
+        if regel.hausmonoton:
+            mitte = (untergrenze[spalten] + obergrenze_suche[spalten]) // 2
+            treffer = erreicht(spalten, mitte)
+            obergrenze_suche[spalten[treffer]] = mitte[treffer]
+            untergrenze[spalten[~treffer]] = mitte[~treffer]
+        else:
+            untergrenze[spalten], obergrenze_suche[spalten] = pruefe_block(
+                erreicht, spalten, untergrenze[spalten], obergrenze_suche[spalten]
+            )
+        offen &= obergrenze_suche - untergrenze > 1
+        iterationen += 1
+    return obergrenze_suche, iterationen
+
+
+def pruefe_block(erreicht, spalten, untergrenze, obergrenze, breite=32):
+    """
+    Prüfe je Spalte die nächsten `breite` Sitzzahlen oberhalb der Untergrenze in einer gemeinsamen Verteilung
+
+        :param erreicht: Funktion (spalten, sitze) -> Maske
+        :param np.ndarray spalten: offene Spalten
+        :param np.ndarray untergrenze: größte Sitzzahl je Spalte, die das Ziel verfehlt
+        :param np.ndarray obergrenze: Sitzzahl je Spalte, die das Ziel sicher erreicht
+        :param int breite: Anzahl geprüfter Sitzzahlen je Spalte
+        :return: neue Unter- und Obergrenze
+        :rtype: (np.ndarray, np.ndarray)
+    """
+    schritte = np.arange(1, breite + 1)
+    sitze = np.minimum(untergrenze[:, np.newaxis] + schritte, obergrenze[:, np.newaxis])
+    treffer = erreicht(np.repeat(spalten, breite), sitze.ravel()).reshape(sitze.shape)
+    gefunden = treffer.any(axis=1)
+    erste = np.where(gefunden, treffer.argmax(axis=1), breite - 1)
+    neu = sitze[np.arange(len(spalten)), erste]
+    return (
+        np.where(gefunden, neu - 1, neu),
+        np.where(gefunden, neu, obergrenze),
+    )
+
 
+def sitze_bei_quote(stimmen, mindestsitze, gesamtsitze):
+    """
+    Ab der Sitzzahl max(Mindestsitze · Gesamtstimmen / Stimmen) erreicht jede Partei ihre Mindestsitze bereits mit der
+    abgerundeten Quote, die ihr bei Hare-Niemeyer stets zusteht.
 
-def bestimme_mindestsitze(direktmandate, laender, mindestsitze_methode, zweitstimmen):
+        :param np.ndarray stimmen: ganzzahlige Zweitstimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param np.ndarray mindestsitze: Mindestsitze in gleicher Form
+        :param np.ndarray gesamtsitze: Sitzzahl für Spalten ohne Mindestsitze
+        :return: Sitzzahl je Spalte
+        :rtype: np.ndarray
+    """
+    bedarf = (mindestsitze > 0) & (stimmen > 0)
+    gesamt = stimmen.sum(axis=0)
+    quote = np.where(
+        bedarf, -((-mindestsitze * gesamt) // np.where(bedarf, stimmen, 1)), 0
+    )
+    return np.maximum(quote.max(axis=0).astype("int64"), gesamtsitze)
+
+
+def sitze_beim_mindestdivisor(stimmen, mindestsitze, gesamtsitze):
+    """
+    Beim Mindestdivisor D = min(Stimmen / (Mindestsitze - 0.5)) erhält jede Partei ihre Mindestsitze. Die dabei
+    vergebene Sitzzahl Σ ⌊V / D + 1/2⌋ ist eine obere Schranke der Gesamtsitzzahl.
+
+        :param np.ndarray stimmen: ganzzahlige Zweitstimmen je Partei (Zeilen) und Verteilung (Spalten)
+        :param np.ndarray mindestsitze: Mindestsitze in gleicher Form
+        :param np.ndarray gesamtsitze: Sitzzahl für Spalten ohne Mindestsitze
+        :return: Sitzzahl je Spalte
+        :rtype: np.ndarray
+    """
+    bedarf = (mindestsitze > 0) & (stimmen > 0)
+    engpass = np.argmax(
+        gleichauf_maximum(2 * mindestsitze - 1, 2 * stimmen, bedarf), axis=0
+    )[np.newaxis]
+    zaehler = np.where(
+        bedarf.any(axis=0), 2 * np.take_along_axis(stimmen, engpass, axis=0), 1
+    )
+    nenner = 2 * np.take_along_axis(mindestsitze, engpass, axis=0) - 1
+    sitze = ((2 * stimmen * nenner + zaehler) // (2 * zaehler)).sum(axis=0)
+    return np.where(bedarf.any(axis=0), sitze, gesamtsitze)
+
+
+def ueberhangsmandate(stimmen, mindestsitze, sitze, verfahren=SAINTE_LAGUE.name):
+    """
+    Bestimme die Überhangsmandate je Partei bei gegebener Gesamtsitzzahl. Bei einem Gleichstand bleiben die betroffenen
+    Sitze unberücksichtigt, da das Los erst bei der endgültigen Verteilung gezogen wird.
+
+        :param pd.Series stimmen: Zweitstimmen je Partei
+        :param pd.Series mindestsitze: Mindestsitze je Partei
+        :param int sitze: Gesamtsitzzahl
+        :param str verfahren: Zuteilungsverfahren, siehe VERFAHREN
+        :return: Überhangsmandate je Partei
+        :rtype: np.ndarray
+    """
+    werte = als_ganzzahlen(stimmen, 4 * (int(sitze) + 1))
+    mindestsitze = mindestsitze.reindex(stimmen.index).fillna(0).to_numpy("int64")
+    return np.maximum(
+        mindestsitze - verteile(werte, int(sitze), zuteilungsregel(verfahren))[0], 0
+    )
+
+
+def bestimme_mindestsitze(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    direktmandate,
+    laender,
+    mindestsitze_methode,
+    zweitstimmen,
+    losentscheide=None,
+    verfahren=SAINTE_LAGUE.name,
+):
     """
     Bestimme die Mindestsitze je Partei
 
@@ -101,58 +497,123 @@ def bestimme_mindestsitze(direktmandate, laender, mindestsitze_methode, zweitsti
         :param pd.DataFrame laender:
         :param str mindestsitze_methode: 'Keine', 'Pur' oder 'Mittelwert', siehe Dokumentation
         :param pd.DataFrame zweitstimmen:
-        :return: Mindestsitze
+        :param Losentscheide losentscheide: Losverfahren und Protokoll, standardmäßig interaktiv
+        :param str verfahren: Zuteilungsverfahren, siehe VERFAHREN
+        :return: Mindestsitze, erste Unterverteilung
+        :rtype: (pd.Series, pd.DataFrame)
+    """
+    unterverteilung = verteile_landeslisten(
+        zweitstimmen, laender, losentscheide, verfahren
+    )
+    mindestsitze = summiere_mindestsitze(
+        direktmandate, unterverteilung, mindestsitze_methode, zweitstimmen.index
+    )
+    return mindestsitze, unterverteilung
+
+
+def verteile_landeslisten(
+    zweitstimmen, laender, losentscheide=None, verfahren=SAINTE_LAGUE.name
+):
+    """
+    Verteile die Sitze jedes Landes auf die Landeslisten, alle Länder in einem Durchlauf. Länder ohne ausgezählte
+    Zweitstimmen erhalten noch keine Listensitze.
+
+        :param pd.DataFrame zweitstimmen: Zweitstimmen der zugelassenen Parteien je Land
+        :param pd.DataFrame laender: Länder mit Spalte Sitze
+        :param Losentscheide losentscheide: Losverfahren und Protokoll, standardmäßig interaktiv
+        :param str verfahren: Zuteilungsverfahren, siehe VERFAHREN
+        :return: Sitze je Partei und Land, Zitierdivisoren je Land in attrs
         :rtype: pd.DataFrame
     """
-    # initialisiere Sitzverteilungsrechner
-    sainte_lague = SainteLague(METHODE_STRING)
-
-    # erste Unterverteilung auf die Landeslisten
-    erste_unterverteilung = pd.DataFrame()
-    for land in laender.index:
-        print(f"erste Unterverteilung in {land}")
-        tabelle = pd.DataFrame({"Stimmen": zweitstimmen[land]})
-        sitze, lose = sainte_lague(tabelle, laender.at[land, "Sitze"])
-        if lose:
-            sitze = losentscheid(sitze, lose, laender.at[land, "Sitze"])
-        erste_unterverteilung[land] = sitze["Sitze"]
-    # Bestimmung der Mindestsitze
-    if mindestsitze_methode == "Keine":
-        mindestsitze = direktmandate
-    elif mindestsitze_methode == "Pur":
-        mindestsitze = erste_unterverteilung.where(
-            erste_unterverteilung > direktmandate.loc[zweitstimmen.index], direktmandate
-        )
-    elif mindestsitze_methode == "Mittelwert":
-        mittelwert = pd.concat(
-            [direktmandate.loc[zweitstimmen.index], erste_unterverteilung]
-        )
-        mittelwert = (
-            mittelwert.groupby(level=0, sort=False)
-            .mean()
-            .apply(np.ceil)
-            .astype("int64")
-        )
-        mindestsitze = mittelwert.where(
-            mittelwert > direktmandate.loc[zweitstimmen.index], direktmandate
-        )
-    else:
-        raise ValueError(
-            f"Methode {mindestsitze_methode} für Mindestsitze nicht bekannt"
+    losentscheide = losentscheide or Losentscheide()
+    stimmen = zweitstimmen[laender.index]
+    ausgezaehlt = laender.index[stimmen.sum(axis=0) > 0]
+    unterverteilung, lose = verteilungsmatrix(
+        stimmen[ausgezaehlt],
+        laender.loc[ausgezaehlt, "Sitze"],
+        zuteilungsregel(verfahren),
+    )
+    for land, lose_land in lose.items():
+        tabelle = pd.DataFrame(
+            {"Stimmen": stimmen[land], "Sitze": unterverteilung[land]}
         )
-    mindestsitze = mindestsitze.sum(axis=1)
-    return mindestsitze
+        sitze = losentscheide.ziehe(tabelle, lose_land, laender.at[land, "Sitze"], land)
+        unterverteilung[land] = sitze["Sitze"]
+    if len(ausgezaehlt) < len(laender.index):
+        attrs = unterverteilung.attrs
+        unterverteilung = unterverteilung.reindex(columns=laender.index, fill_value=0)
+        unterverteilung.attrs = attrs
+    return unterverteilung
+
+
+def summiere_mindestsitze(
+    direktmandate, unterverteilung, mindestsitze_methode, parteien
+):
+    """
+    Bestimme die Mindestsitze je Partei aus Direktmandaten und erster Unterverteilung
+
+        :param pd.DataFrame direktmandate: Direktmandate je Partei und Land
+        :param pd.DataFrame unterverteilung: Sitze der ersten Unterverteilung je Partei und Land
+        :param str mindestsitze_methode: 'Keine', 'Pur' oder 'Mittelwert', siehe Dokumentation
+        :param pd.Index parteien: zugelassene Parteien
+        :return: Mindestsitze je Partei
+        :rtype: pd.Series
+    """
+    direkt = direktmandate.loc[parteien]
+    if mindestsitze_methode != "Keine":
+        direkt = direkt.reindex(columns=unterverteilung.columns, fill_value=0)
+    mindestsitze = kombiniere_mindestsitze(
+        direkt, unterverteilung, mindestsitze_methode
+    )
+    return mindestsitze.sum(axis=1)
+
+
+def kombiniere_mindestsitze(direktmandate, erste_unterverteilung, mindestsitze_methode):
+    """
+    Bestimme die Mindestsitze je Partei und Land aus Direktmandaten und erster Unterverteilung. Funktioniert für
+    gleich indizierte Tabellen ebenso wie für Arrays beliebiger Form, etwa mit zusätzlicher Szenarioachse.
 
+        :param direktmandate: Direktmandate je Partei und Land
+        :param erste_unterverteilung: Sitze der ersten Unterverteilung je Partei und Land
+        :param str mindestsitze_methode: 'Keine', 'Pur' oder 'Mittelwert', siehe Dokumentation
+        :return: Mindestsitze je Partei und Land
+    """
+    if mindestsitze_methode == "Keine":
+        return direktmandate
+    if mindestsitze_methode == "Pur":
+        return np.maximum(erste_unterverteilung, direktmandate)
+    if mindestsitze_methode == "Mittelwert":
+        # aufgerundeter Mittelwert ⌈(D + U) / 2⌉ in Ganzzahlarithmetik
+        mittelwert = -(-(direktmandate + erste_unterverteilung) // 2)
+        return np.maximum(mittelwert, direktmandate)
+    raise ValueError(f"Methode {mindestsitze_methode} für Mindestsitze nicht bekannt")
 
-def ermittle_zulassung(huerde, erststimmen, zweitstimmen):
+
+def ermittle_zulassung(huerde, erststimmen, zweitstimmen, losentscheide=None):
     """
     Bestimme, welche Parteien zur Sitzzuteilung zugelassen sind, beinhaltet Berechnung der Direktmandate
-    :param dict erststimmen:
+    :param Wahldaten erststimmen: Eingabedaten mit Erststimmen je Partei und Wahlkreis
     :param dict huerde:
     :param pd.DataFrame zweitstimmen:
+    :param Losentscheide losentscheide: Losverfahren und Protokoll für Gleichstände in Wahlkreisen
     :return: Gibt die Direktmandate, einen möglichen Mehrheitssieger und die Zweitstimmen der zugelassenen Parteien aus
     :rtype: (pd.DataFrame, str or None, pd.DataFrame)
     """
+    # Zähle die Direktmandate der Parteien
+    direktmandate = zaehle_direktmandate(erststimmen, zweitstimmen.index, losentscheide)
+    mehrheitssieger, zweitstimmen = pruefe_huerde(huerde, direktmandate, zweitstimmen)
+    return direktmandate, mehrheitssieger, zweitstimmen
+
+
+def pruefe_huerde(huerde, direktmandate, zweitstimmen):
+    """
+    Prüfe bei bekannten Direktmandaten, welche Parteien die Hürde überwinden
+    :param dict huerde:
+    :param pd.DataFrame direktmandate: Direktmandate je Partei und Land
+    :param pd.DataFrame zweitstimmen:
+    :return: Gibt einen möglichen Mehrheitssieger und die Zweitstimmen der zugelassenen Parteien aus
+    :rtype: (str or None, pd.DataFrame)
+    """
     # Überprüfe, welche Parteien bei der Sitzverteilung berücksichtigt werden
     zulassung = pd.DataFrame()
     stimmen = zweitstimmen.sum(axis=1)
@@ -164,17 +625,6 @@ def ermittle_zulassung(huerde, erststimmen, zweitstimmen):
     except IndexError:
         mehrheitssieger = None
 
-    # Zähle die Direktmandate der Parteien
-    direktmandate = pd.DataFrame(index=zweitstimmen.index)
-    for land, tabelle_land in erststimmen.items():
-        direktmandate[land] = 0
-        # pylint: disable=fixme
-        # TODO: vektorisieren statt iterieren
-        for _, stimmen in tabelle_land.items():
-            if not stimmen.max() == 0:
-                sieger = stimmen.idxmax()
-                # sieger = 'DIE LINKE'
-                direktmandate.at[sieger, land] += 1
     zulassung["Direkt"] = direktmandate.sum(axis=1)
 
     # Initialisiere Spalte für mögliche Ausnahmen von der Hürde (z.B. nationale Minderheiten)
@@ -195,19 +645,155 @@ def ermittle_zulassung(huerde, erststimmen, zweitstimmen):
     zweitstimmen = zweitstimmen.loc[
         zulassung["Prozent"] | zulassung["Direkt"] | zulassung["Ausnahmen"]
     ]
-    return direktmandate, mehrheitssieger, zweitstimmen
+    return mehrheitssieger, zweitstimmen
 
 
-def setze_einstellungen(pfad):
+def zaehle_direktmandate(daten, parteien, losentscheide=None):
+    """
+    Bestimme die Sieger aller Wahlkreise in einem Durchlauf über die Stimmenmatrix Partei × Wahlkreis und zähle sie je
+    Land
+
+        :param Wahldaten daten: Eingabedaten mit Erststimmen je Partei und Wahlkreis
+        :param pd.Index parteien: Parteien, die in jedem Fall als Zeile geführt werden
+        :param Losentscheide losentscheide: Losverfahren und Protokoll für Gleichstände
+        :return: Direktmandate je Partei und Land, ergänzt um Wahlkreissieger ohne Zweitstimmen
+        :rtype: pd.DataFrame
+    """
+    zeilen = pd.Index(daten.parteien.tolist())
+    sieger = wahlkreissieger(daten.erststimmen, zeilen, daten.wahlkreis, losentscheide)
+    anzahl = zaehle_sieger(
+        sieger, daten.wahlkreis_land, len(daten.parteien), len(daten.laender)
+    )
+    return direktmandate_tabelle(
+        anzahl, zeilen, pd.Index(daten.laender.tolist()), parteien
+    )
+
+
+def direktmandate_je_land(tabelle, sieger, laender, parteien):
+    """
+    Zähle die Wahlkreissieger je Partei und Land
+
+        :param pd.DataFrame tabelle: Erststimmen als Tabelle Partei × (Land, Wahlkreis)
+        :param np.ndarray sieger: Zeilennummer des Siegers je Wahlkreis, -1 für Wahlkreise ohne Stimmen
+        :param pd.Index laender: Länder
+        :param pd.Index parteien: Parteien, die in jedem Fall als Zeile geführt werden
+        :return: Direktmandate je Partei und Land, ergänzt um Wahlkreissieger ohne Zweitstimmen
+        :rtype: pd.DataFrame
+    """
+    land = laender.get_indexer(tabelle.columns.get_level_values(0))
+    anzahl = zaehle_sieger(sieger, land, len(tabelle.index), len(laender))
+    return direktmandate_tabelle(anzahl, tabelle.index, laender, parteien)
+
+
+def zaehle_sieger(sieger, land, zeilen, spalten):
+    """
+    Zähle die Wahlkreissieger je Partei und Land über die Landeszugehörigkeit der Wahlkreise
+
+        :param np.ndarray sieger: Zeilennummer des Siegers je Wahlkreis, -1 für Wahlkreise ohne Stimmen
+        :param np.ndarray land: Nummer des Landes je Wahlkreis
+        :param int zeilen: Anzahl der Parteien
+        :param int spalten: Anzahl der Länder
+        :return: Direktmandate als Matrix Partei × Land
+        :rtype: np.ndarray
+    """
+    vergeben = sieger >= 0
+    return np.bincount(
+        sieger[vergeben] * spalten + land[vergeben], minlength=zeilen * spalten
+    ).reshape(zeilen, spalten)
+
+
+def direktmandate_tabelle(anzahl, zeilen, laender, parteien):
+    """
+    Überführe die gezählten Direktmandate in eine Tabelle mit den Zeilen parteien und den Wahlkreissiegern ohne
+    Zweitstimmen
+
+        :param np.ndarray anzahl: Direktmandate als Matrix Partei × Land
+        :param pd.Index zeilen: Parteien zu den Zeilen von anzahl
+        :param pd.Index laender: Länder
+        :param pd.Index parteien: Parteien, die in jedem Fall als Zeile geführt werden
+        :return: Direktmandate je Partei und Land
+        :rtype: pd.DataFrame
+    """
+    direktmandate = pd.DataFrame(anzahl, index=zeilen, columns=laender)
+    unabhaengige = zeilen[(anzahl.sum(axis=1) > 0) & ~zeilen.isin(parteien)]
+    return direktmandate.reindex(parteien.append(unabhaengige), fill_value=0)
+
+
+def bestimme_wahlkreissieger(tabelle, losentscheide=None):
+    """
+    Bestimme den Sieger jedes Wahlkreises. Bei Stimmengleichheit entscheidet das Los.
+
+        :param pd.DataFrame tabelle: Erststimmen als Tabelle Partei × (Land, Wahlkreis)
+        :param Losentscheide losentscheide: Losverfahren und Protokoll, standardmäßig interaktiv
+        :return: Zeilennummer des Siegers je Wahlkreis, -1 für Wahlkreise ohne Stimmen
+        :rtype: np.ndarray
+    """
+    return wahlkreissieger(
+        tabelle.to_numpy(dtype="int64"),
+        tabelle.index,
+        tabelle.columns.__getitem__,
+        losentscheide,
+    )
+
+
+def wahlkreissieger(werte, parteien, wahlkreis, losentscheide=None):
+    """
+    Bestimme den Sieger jedes Wahlkreises auf der Stimmenmatrix. Bei Stimmengleichheit entscheidet das Los.
+
+        :param np.ndarray werte: Erststimmen als Matrix Partei × Wahlkreis
+        :param pd.Index parteien: Parteien zu den Zeilen von werte
+        :param wahlkreis: Funktion Spalte -> Bezeichnung des Wahlkreises für Meldungen und Lose
+        :param Losentscheide losentscheide: Losverfahren und Protokoll, standardmäßig interaktiv
+        :return: Zeilennummer des Siegers je Wahlkreis, -1 für Wahlkreise ohne Stimmen
+        :rtype: np.ndarray
+    """
+    maximum = werte.max(axis=0, initial=0)
+    # die boolesche Maske ist ein Achtel der Stimmenmatrix, argmax über Achse 0 kopiert sie transponiert
+    hoechste = werte == maximum
+    sieger = np.where(maximum > 0, hoechste.argmax(axis=0), -1)
+
+    gleichstand = (maximum > 0) & (hoechste.sum(axis=0) > 1)
+    losentscheide = losentscheide or Losentscheide()
+    for spalte in np.flatnonzero(gleichstand):
+        kandidaten = parteien[werte[:, spalte] == maximum[spalte]].to_list()
+        melde(
+            losentscheide.ausgabe,
+            f"Gleichstand im Wahlkreis {wahlkreis(spalte)} zwischen {kandidaten}",
+        )
+        los = losentscheide.ziehe(
+            pd.DataFrame({"Sitze": 0}, index=kandidaten),
+            kandidaten,
+            1,
+            f"Wahlkreis {wahlkreis(spalte)}",
+        )
+        sieger[spalte] = parteien.get_loc(los["Sitze"].idxmax())
+    return sieger
+
+
+def setze_einstellungen(pfad, ueberschreibungen=None):
     """
     Parse die Einstellungen aus Einstellungen.yaml
 
         :param pfad: Verzeichnis
+        :param dict ueberschreibungen: Einträge, die die Datei überschreiben, mit den Schlüsseln der Datei
         :return: Einstellungen
         :rtype: dict
     """
     # Setze Variablen aus Einstellungen
     settings_yaml = load_yaml(pfad / "Einstellungen.yaml")
+    if ueberschreibungen:
+        settings_yaml = {**settings_yaml, **ueberschreibungen}
+    return einstellungen_aus(settings_yaml)
+
+
+def einstellungen_aus(settings_yaml):
+    """
+    Parse die Einstellungen aus dem bereits geladenen Inhalt von Einstellungen.yaml
+
+        :param dict settings_yaml: Inhalt von Einstellungen.yaml, gegebenenfalls mit überschriebenen Einträgen
+        :return: Einstellungen
+        :rtype: dict
+    """
     sitze_geplant = settings_yaml["Sitze"]  # erforderlich, kein default
     try:
         huerde = settings_yaml["Hürde"]
@@ -225,10 +811,15 @@ def setze_einstellungen(pfad):
         obergrenze = settings_yaml["Obergrenze"]
     except KeyError:
         obergrenze = np.inf
+    try:
+        verfahren = zuteilungsregel(settings_yaml["Verfahren"]).name
+    except KeyError:
+        verfahren = SAINTE_LAGUE.name
     return {
         "sitze_geplant": sitze_geplant,
         "hürde": huerde,
         "mindestsitze_methode": mindestsitze_methode,
         "ueberhang": ueberhang,
         "obergrenze": obergrenze,
+        "verfahren": verfahren,
     }
@@ -0,0 +1,193 @@
+"""Dieses Modul berechnet viele Sitzverteilungen parallel. Ein Stapel besteht aus Aufträgen, also Verzeichnissen mit
+optional veränderten Einstellungen, die blockweise auf einen Prozesspool verteilt werden. Die Ergebnisse werden
+sofort nach ihrer Fertigstellung weitergegeben, sodass nur Sitzzahlen im Speicher bleiben.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+from sitzverteilung.rechner.losverfahren import Losverfahren
+from sitzverteilung.sitzverteilung import sitzverteilung
+
+pd = lade_bei_bedarf("pandas")
+
+
+@dataclass
+class Auftrag:
+    """Eine Sitzverteilungsberechnung: Verzeichnis und Einträge, die Einstellungen.yaml überschreiben"""
+
+    pfad: Path
+    einstellungen: dict = field(default_factory=dict)
+    name: str = ""
+    losverfahren: dict = (
+        None  # Argumente für Losverfahren, standardmäßig die des Stapels
+    )
+
+    def __post_init__(self):
+        self.pfad = Path(self.pfad)
+        if not self.name:
+            self.name = str(self.pfad) + "".join(
+                f" {schluessel}={wert}"
+                for schluessel, wert in self.einstellungen.items()
+            )
+
+
+def finde_verzeichnisse(wurzel):
+    """
+    Finde alle Verzeichnisse unterhalb von wurzel, die eine Einstellungen.yaml enthalten
+
+        :param wurzel: Verzeichnis, z. B. beispiele
+        :return: sortierte Liste der Verzeichnisse
+        :rtype: list
+    """
+    return sorted(datei.parent for datei in Path(wurzel).rglob("Einstellungen.yaml"))
+
+
+def varianten(pfade, **optionen):
+    """
+    Erzeuge Aufträge für alle Kombinationen der angegebenen Einstellungen, z. B.
+    varianten(pfade, Mindestsitze=["Pur", "Mittelwert"], Obergrenze=[650, 700])
+
+        :param pfade: Verzeichnis oder Liste von Verzeichnissen
+        :param optionen: je Eintrag in Einstellungen.yaml eine Liste möglicher Werte
+        :return: Liste der Aufträge
+        :rtype: list
+    """
+    if isinstance(pfade, (str, Path)):
+        pfade = [pfade]
+    kombinationen = [
+        dict(zip(optionen.keys(), werte))
+        for werte in itertools.product(*optionen.values())
+    ]
+    return [
+        Auftrag(pfad, kombination) for pfad in pfade for kombination in kombinationen
+    ]
+
+
+def berechne_block(auftraege, losverfahren):
+    """
+    Berechne die Sitzverteilungen eines Blocks von Aufträgen im Arbeitsprozess, zurückgegeben werden nur die
+    Sitzzahlen. Jeder Auftrag erhält ein frisches Losverfahren, damit die Lose nicht von der Aufteilung in Blöcke
+    abhängen. Scheitert ein Auftrag, z. B. an einem abgelehnten Gleichstand, wird sein Fehler vermerkt und der Block
+    fortgesetzt.
+
+        :param list auftraege: Aufträge
+        :param dict losverfahren: Argumente für Losverfahren bei Aufträgen ohne eigene Angabe
+        :return: je Auftrag Name, Sitze je Partei und Fehlermeldung, ohne Fehler None
+        :rtype: list
+    """
+    ergebnisse = []
+    for auftrag in auftraege:
+        try:
+            ergebnis = sitzverteilung(
+                auftrag.pfad,
+                auftrag.einstellungen,
+                losverfahren=Losverfahren(**(auftrag.losverfahren or losverfahren)),
+            )
+        except Exception as fehler:  # pylint: disable=broad-exception-caught
+            ergebnisse.append((auftrag.name, {}, f"{type(fehler).__name__}: {fehler}"))
+            continue
+        ergebnisse.append((auftrag.name, ergebnis.sitze["Sitze"].to_dict(), None))
+    return ergebnisse
+
+
+def berechne_stapel(auftraege, arbeiter=None, blockgroesse=None, losverfahren=None):
+    """
+    Verteile die Aufträge blockweise auf einen Prozesspool und gib die Ergebnisse in der Reihenfolge ihrer
+    Fertigstellung zurück. Es sind höchstens zwei Blöcke je Arbeitsprozess gleichzeitig unterwegs.
+
+        :param auftraege: Aufträge oder Verzeichnisse
+        :param int arbeiter: Anzahl der Arbeitsprozesse, standardmäßig Anzahl der Prozessoren
+        :param int blockgroesse: Aufträge je Block, standardmäßig etwa vier Blöcke je Arbeitsprozess
+        :param dict losverfahren: Argumente für Losverfahren, standardmäßig werden Gleichstände abgelehnt
+        :return: Generator über Name, Sitze je Partei und Fehlermeldung, siehe berechne_block
+    """
+    auftraege = [
+        auftrag if isinstance(auftrag, Auftrag) else Auftrag(auftrag)
+        for auftrag in auftraege
+    ]
+    arbeiter = arbeiter or os.cpu_count() or 1
+    losverfahren = losverfahren or {"art": "ablehnen"}
+    blockgroesse = blockgroesse or max(1, -(-len(auftraege) // (4 * arbeiter)))
+    bloecke = (
+        auftraege[start : start + blockgroesse]
+        for start in range(0, len(auftraege), blockgroesse)
+    )
+
+    with ProcessPoolExecutor(max_workers=arbeiter) as pool:
+        laufend = set()
+        for block in bloecke:
+            if len(laufend) >= 2 * arbeiter:
+                fertig, laufend = wait(laufend, return_when=FIRST_COMPLETED)
+                for zukunft in fertig:
+                    yield from zukunft.result()
+            laufend.add(pool.submit(berechne_block, block, losverfahren))
+        while laufend:
+            fertig, laufend = wait(laufend, return_when=FIRST_COMPLETED)
+            for zukunft in fertig:
+                yield from zukunft.result()
+
+
+def stapeltabelle(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    auftraege, arbeiter=None, blockgroesse=None, ausgabe=None, losverfahren=None
+):
+    """
+    Berechne alle Aufträge und fasse die Sitze in einer Tabelle Auftrag × Partei zusammen
+
+        :param auftraege: Aufträge oder Verzeichnisse
+        :param int arbeiter: Anzahl der Arbeitsprozesse
+        :param int blockgroesse: Aufträge je Block
+        :param ausgabe: optionale CSV-Datei, in die jedes Ergebnis sofort als Auftrag;Partei;Sitze;Fehler geschrieben
+            wird, gescheiterte Aufträge mit einer Zeile ohne Partei und Sitze
+        :param dict losverfahren: Argumente für Losverfahren, siehe berechne_stapel
+        :return: Sitze je Auftrag (Zeilen) und Partei (Spalten), zusätzlich die Spalten Gesamt und Fehler, gescheiterte
+            Aufträge haben keine Sitze
+        :rtype: pd.DataFrame
+    """
+    auftraege = [
+        auftrag if isinstance(auftrag, Auftrag) else Auftrag(auftrag)
+        for auftrag in auftraege
+    ]
+    zeilen = {}
+    fehler = {}
+    with contextlib.ExitStack() as stack:
+        schreiber = None
+        if ausgabe is not None:
+            datei = stack.enter_context(
+                open(ausgabe, "w", encoding="utf-8", newline="")
+            )
+            schreiber = csv.writer(datei, delimiter=";")
+            schreiber.writerow(["Auftrag", "Partei", "Sitze", "Fehler"])
+        for name, sitze, meldung in berechne_stapel(
+            auftraege, arbeiter, blockgroesse, losverfahren
+        ):
+            zeilen[name] = sitze
+            if meldung is not None:
+                fehler[name] = meldung
+            if schreiber is None:
+                continue
+            if meldung is not None:
+                schreiber.writerow([name, "", "", meldung])
+            schreiber.writerows(
+                [name, partei, anzahl, ""] for partei, anzahl in sitze.items()
+            )
+
+    tabelle = (
+        pd.DataFrame.from_dict(zeilen, orient="index")
+        .reindex([auftrag.name for auftrag in auftraege])
+        .fillna(0)
+        .astype("Int64")
+    )
+    tabelle.loc[list(fehler)] = pd.NA
+    tabelle["Gesamt"] = tabelle.sum(axis=1, min_count=1).astype("Int64")
+    tabelle["Fehler"] = pd.Series(fehler, dtype="string").reindex(tabelle.index)
+    tabelle.index.name = "Auftrag"
+    return tabelle
@@ -0,0 +1,216 @@
+"""Dieses Modul hält die Stimmen einer Wahl in einem kompakten Datenmodell. Parteien und Länder stehen einmal in
+Namenstabellen, alle Stufen arbeiten mit ihren Nummern auf zusammenhängenden int64-Matrizen. Die Wahlkreise liegen
+nach Ländern geordnet, Versätze grenzen die Länder ab. Das Laden kommt ohne pandas aus, in pandas-Tabellen wird
+erst an den Rändern überführt."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+from sitzverteilung.zwischenspeicher import (
+    erststimmen_als_arrays,
+    lade_arrays,
+    laender_als_arrays,
+    tabelle_als_arrays,
+    versatz,
+)
+
+pd = lade_bei_bedarf("pandas")
+
+
+@dataclass
+class Wahldaten:
+    """Eingabedaten einer Wahl als Arrays"""
+
+    parteien: (
+        np.ndarray
+    )  # Parteien mit Zweitstimmen, danach Parteien nur mit Erststimmen
+    laender: np.ndarray
+    bevoelkerung: np.ndarray  # Land
+    zweitstimmen: np.ndarray  # Partei mit Zweitstimmen × Land
+    erststimmen: np.ndarray  # Partei × Wahlkreis
+    wahlkreisnamen: np.ndarray  # Name je Wahlkreis
+    wahlkreis_versatz: np.ndarray  # erster Wahlkreis je Land und Anzahl der Wahlkreise
+
+    @property
+    def wahlkreis_land(self) -> np.ndarray:
+        """Land je Wahlkreis"""
+        return np.repeat(np.arange(len(self.laender)), np.diff(self.wahlkreis_versatz))
+
+    def wahlkreis(self, spalte: int) -> tuple:
+        """
+        Land und Name eines Wahlkreises
+
+            :param spalte: Nummer des Wahlkreises
+            :return: (Land, Wahlkreis)
+        """
+        land = np.searchsorted(self.wahlkreis_versatz, spalte, side="right") - 1
+        return str(self.laender[land]), str(self.wahlkreisnamen[spalte])
+
+    def laender_tabelle(self) -> pd.DataFrame:
+        """
+        Bevölkerung je Land wie lade_laender
+
+            :return: Tabelle mit Spalte Stimmen je Land
+        """
+        return pd.DataFrame({"Stimmen": self.bevoelkerung}, index=self.laender.tolist())
+
+    def zweitstimmen_tabelle(self) -> pd.DataFrame:
+        """
+        Zweitstimmen als Tabelle über derselben Matrix, ohne sie zu kopieren
+
+            :return: Zweitstimmen als Tabelle Partei × Land
+        """
+        return pd.DataFrame(
+            self.zweitstimmen,
+            index=self.parteien[: len(self.zweitstimmen)].tolist(),
+            columns=self.laender.tolist(),
+            copy=False,
+        )
+
+    def erststimmen_tabelle(self) -> pd.DataFrame:
+        """
+        Erststimmen als Tabelle mit Spalten (Land, Wahlkreis), etwa für die Auszählung
+
+            :return: Erststimmen als Tabelle Partei × (Land, Wahlkreis)
+        """
+        return pd.DataFrame(
+            self.erststimmen,
+            index=self.parteien.tolist(),
+            columns=pd.MultiIndex.from_arrays(
+                [
+                    self.laender[self.wahlkreis_land].tolist(),
+                    self.wahlkreisnamen.tolist(),
+                ]
+            ),
+            copy=False,
+        )
+
+
+def lade_wahldaten(pfad) -> Wahldaten:
+    """
+    Lade Länder.yaml, Zweitstimme.yaml und Erststimme.yaml über den Zwischenspeicher in ein gemeinsames Datenmodell.
+    Die Erststimmen werden Land für Land aus den Blöcken des Zwischenspeichers in eine Matrix übertragen, ohne
+    Tabellen je Land zu bilden.
+
+        :param pfad: Verzeichnispfad
+        :return: Eingabedaten als Arrays
+    """
+    pfad = Path(pfad)
+    laender = lade_arrays(pfad / "Länder.yaml", laender_als_arrays)
+    zweit = lade_arrays(pfad / "Zweitstimme.yaml", tabelle_als_arrays)
+    erst = lade_arrays(pfad / "Erststimme.yaml", erststimmen_als_arrays)
+
+    namen = laender["laender"]
+    zweit_parteien = zweit["zeilen"]
+    erst_parteien = erst["parteien"]
+    parteien = np.concatenate(
+        [zweit_parteien, erst_parteien[~np.isin(erst_parteien, zweit_parteien)]]
+    )
+
+    spalten = pruefe_laender(namen, zweit["spalten"], "Zweitstimme.yaml")
+    zweitstimmen = np.zeros((len(zweit_parteien), len(namen)), dtype="int64")
+    zweitstimmen[:, spalten] = ganzzahlig(zweit["werte"])
+
+    return Wahldaten(
+        parteien,
+        namen,
+        ganzzahlig(laender["stimmen"]),
+        zweitstimmen,
+        *erststimmen_matrix(erst, parteien, namen),
+    )
+
+
+def erststimmen_matrix(erst: dict, parteien: np.ndarray, laender: np.ndarray) -> tuple:
+    """
+    Übertrage die Blöcke je Land aus dem Zwischenspeicher in eine Matrix Partei × Wahlkreis, geordnet nach Ländern
+
+        :param erst: Arrays aus erststimmen_als_arrays
+        :param parteien: Parteien zu den Zeilen der Matrix
+        :param laender: Länder aus Länder.yaml
+        :return: Erststimmen, Name je Wahlkreis, Versatz der Wahlkreise je Land
+    """
+    pruefe_laender(laender, erst["laender"], "Erststimme.yaml")
+    # Block je Land in Erststimme.yaml, -1 für Länder ohne Wahlkreise
+    bloecke = positionen(erst["laender"], laender)
+    wahlkreis_versatz = versatz(np.append(np.diff(erst["spalten_versatz"]), 0)[bloecke])
+    erststimmen = np.zeros((len(parteien), wahlkreis_versatz[-1]), dtype="int64")
+    zeilen = positionen(parteien, erst["parteien"])
+    for land, block in enumerate(bloecke):
+        if block >= 0:
+            spalten = slice(wahlkreis_versatz[land], wahlkreis_versatz[land + 1])
+            werte = ganzzahlig(abschnitt(erst, "werte", block))
+            erststimmen[zeilen[abschnitt(erst, "zeilen", block)], spalten] = (
+                werte.reshape(-1, spalten.stop - spalten.start)
+            )
+
+    # die Namen bleiben im Zwischenspeicher abgebildet, solange die Länder dort bereits geordnet sind
+    wahlkreisnamen = erst["wahlkreise"]
+    if not np.array_equal(bloecke, np.arange(len(erst["laender"]))):
+        wahlkreisnamen = np.concatenate(
+            [wahlkreisnamen[:0]]
+            + [abschnitt(erst, "spalten", block) for block in bloecke if block >= 0]
+        )
+    return erststimmen, wahlkreisnamen, wahlkreis_versatz
+
+
+def abschnitt(erst: dict, art: str, block: int) -> np.ndarray:
+    """
+    Abschnitt eines Landes in den flachen Arrays aus erststimmen_als_arrays
+
+        :param erst: Arrays aus erststimmen_als_arrays
+        :param art: "zeilen", "spalten" (Wahlkreisnamen) oder "werte"
+        :param block: Nummer des Landes in Erststimme.yaml
+        :return: Sicht auf den Abschnitt
+    """
+    werte = erst["wahlkreise" if art == "spalten" else art]
+    anfang, ende = erst[f"{art}_versatz"][block : block + 2]
+    return werte[anfang:ende]
+
+
+def pruefe_laender(laender: np.ndarray, namen: np.ndarray, datei: str) -> np.ndarray:
+    """
+    Ordne die Länder einer Eingabedatei den Ländern aus Länder.yaml zu
+
+        :param laender: Länder aus Länder.yaml
+        :param namen: Länder der Eingabedatei
+        :param datei: Name der Eingabedatei für die Fehlermeldung
+        :return: Nummer je Land der Eingabedatei
+    """
+    nummern = positionen(laender, namen)
+    if (nummern < 0).any():
+        raise ValueError(f"{datei} enthält Länder, die in Länder.yaml fehlen")
+    return nummern
+
+
+def positionen(namen: np.ndarray, gesucht) -> np.ndarray:
+    """
+    Positionen von Namen in einer Namenstabelle
+
+        :param namen: Namenstabelle, z. B. Parteien oder Länder
+        :param gesucht: gesuchte Namen
+        :return: Position je gesuchtem Namen, -1 für unbekannte Namen
+    """
+    position = {name: nummer for nummer, name in enumerate(namen.tolist())}
+    return np.array(
+        [position.get(name, -1) for name in np.asarray(gesucht).tolist()], dtype="intp"
+    )
+
+
+def ganzzahlig(werte) -> np.ndarray:
+    """
+    Überführe Stimmen in int64. Fehlende Einträge, etwa Parteien ohne Kandidaten in einem Wahlkreis, zählen als 0.
+
+        :param werte: Stimmen, ganzzahlig oder als Gleitkommazahlen
+        :return: Array vom Typ int64
+    """
+    werte = np.asarray(werte)
+    if werte.dtype.kind == "f":
+        werte = np.nan_to_num(werte)
+        if not np.all(np.mod(werte, 1) == 0):
+            raise ValueError("Stimmen müssen ganzzahlig sein")
+    return werte.astype("int64", copy=False)
@@ -0,0 +1,245 @@
+"""Dieses Modul hält die Eingabedateien eines Verzeichnisses als Binärdateien vor. Beim ersten Laden wird jede
+yaml-Datei in spaltenweise Arrays mit Namenstabellen für Länder, Parteien und Wahlkreise überführt und im Ordner
+.zwischenspeicher abgelegt. Spätere Aufrufe bilden die Arrays direkt in den Speicher ab, solange Änderungszeit, Größe
+oder Inhalt der Quelldatei unverändert sind."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from sitzverteilung.hilfsmittel import lade_bei_bedarf, load_yaml
+
+pd = lade_bei_bedarf("pandas")
+
+ZWISCHENSPEICHER = ".zwischenspeicher"
+VERSION = 1
+
+
+def lade_laender(pfad) -> pd.DataFrame:
+    """
+    Lade Länder.yaml
+
+        :param pfad: Verzeichnispfad
+        :return: Tabelle mit Spalte Stimmen je Land
+    """
+    arrays = lade_arrays(Path(pfad) / "Länder.yaml", laender_als_arrays)
+    return pd.DataFrame(
+        index=arrays["laender"].tolist(), data={"Stimmen": np.array(arrays["stimmen"])}
+    )
+
+
+def laender_als_arrays(inhalt: dict) -> dict:
+    """
+    Überführe den Inhalt von Länder.yaml in Arrays
+
+        :param inhalt: Land → Stimmen
+        :return: Namenstabelle der Länder und Stimmen
+    """
+    return {
+        "laender": np.array(list(inhalt.keys()), dtype=str),
+        "stimmen": np.array(list(inhalt.values())),
+    }
+
+
+def tabelle_als_arrays(inhalt: dict) -> dict:
+    """
+    Überführe eine verschachtelte Zuordnung Spalte → Zeile → Wert in Arrays, wie sie pd.DataFrame aufbaut
+
+        :param inhalt: Spalte → Zeile → Wert
+        :return: Werte als Matrix, Namenstabellen der Zeilen und Spalten
+    """
+    tabelle = pd.DataFrame(inhalt)
+    return {
+        "werte": tabelle.to_numpy(),
+        "zeilen": np.array(tabelle.index, dtype=str),
+        "spalten": np.array(tabelle.columns, dtype=str),
+    }
+
+
+def erststimmen_als_arrays(inhalt: dict) -> dict:
+    """
+    Überführe den Inhalt von Erststimme.yaml in spaltenweise Arrays. Die Tabellen der Länder liegen hintereinander in
+    einem Wertearray, ihre Zeilen verweisen auf eine gemeinsame Parteientabelle, die Versätze grenzen die Länder ab.
+
+        :param inhalt: Land → Wahlkreis → Partei → Stimmen
+        :return: Namenstabellen, Zeilenverweise, Werte und Versätze je Land
+    """
+    tabellen = [pd.DataFrame(wahlkreise) for wahlkreise in inhalt.values()]
+    parteien = pd.Index([]).append([tabelle.index for tabelle in tabellen]).unique()
+    werte = [tabelle.to_numpy().ravel() for tabelle in tabellen]
+    return {
+        "laender": np.array(list(inhalt.keys()), dtype=str),
+        "parteien": np.array(parteien, dtype=str),
+        "wahlkreise": np.array(
+            [wahlkreis for tabelle in tabellen for wahlkreis in tabelle.columns],
+            dtype=str,
+        ),
+        "zeilen": np.concatenate(
+            [parteien.get_indexer(tabelle.index) for tabelle in tabellen]
+        ),
+        "werte": np.concatenate(werte),
+        "zeilen_versatz": versatz([len(tabelle.index) for tabelle in tabellen]),
+        "spalten_versatz": versatz([len(tabelle.columns) for tabelle in tabellen]),
+        "werte_versatz": versatz([len(block) for block in werte]),
+    }
+
+
+def direktkandidaten_als_arrays(inhalt: dict) -> dict:
+    """
+    Überführe den Inhalt von Direktkandidaten.yaml in flache Arrays, die Versätze grenzen die Wahlkreise ab
+
+        :param inhalt: Wahlkreis → Partei → Name
+        :return: Namenstabelle der Wahlkreise, Partei und Name je Kandidatur, Versätze je Wahlkreis
+    """
+    kandidaturen = [list((bewerber or {}).items()) for bewerber in inhalt.values()]
+    return {
+        "wahlkreise": np.array(list(inhalt.keys()), dtype=str),
+        "parteien": np.array(
+            [partei for block in kandidaturen for partei, _ in block], dtype=str
+        ),
+        "namen": np.array(
+            [str(name).strip() for block in kandidaturen for _, name in block],
+            dtype=str,
+        ),
+        "versatz": versatz([len(block) for block in kandidaturen]),
+    }
+
+
+def listen_als_arrays(inhalt: dict) -> dict:
+    """
+    Überführe den Inhalt von Listenkandidaten.yaml in flache Arrays. Die Namen aller Listen liegen hintereinander in
+    Listenreihenfolge, die Versätze grenzen die Listen ab.
+
+        :param inhalt: Land → Partei → Namen in Listenreihenfolge
+        :return: Land und Partei je Liste, Namen und Versätze je Liste
+    """
+    listen = [
+        (land, partei, namen or [])
+        for land, parteien in inhalt.items()
+        for partei, namen in (parteien or {}).items()
+    ]
+    return {
+        "laender": np.array([land for land, _, _ in listen], dtype=str),
+        "parteien": np.array([partei for _, partei, _ in listen], dtype=str),
+        "namen": np.array(
+            [str(name).strip() for _, _, namen in listen for name in namen], dtype=str
+        ),
+        "versatz": versatz([len(namen) for _, _, namen in listen]),
+    }
+
+
+def versatz(laengen) -> np.ndarray:
+    """
+    Bestimme die Startpositionen aufeinanderfolgender Blöcke, ergänzt um das Ende des letzten Blocks
+
+        :param laengen: Länge je Block
+        :return: Versätze der Länge len(laengen) + 1
+    """
+    return np.concatenate(([0], np.cumsum(laengen, dtype="int64")))
+
+
+def lade_arrays(datei: Path, umwandeln) -> dict:
+    """
+    Lade die Arrays zu einer yaml-Datei aus dem Zwischenspeicher. Fehlt der Zwischenspeicher oder passt er nicht zur
+    Quelldatei, wird die Datei eingelesen, mit umwandeln überführt und der Zwischenspeicher neu geschrieben. Kann nicht
+    geschrieben werden, etwa in schreibgeschützten Verzeichnissen, werden die Arrays trotzdem zurückgegeben.
+
+        :param datei: yaml-Datei
+        :param umwandeln: Funktion vom Inhalt der Datei auf ein dict von Arrays
+        :return: Name → Array, aus dem Zwischenspeicher schreibgeschützt in den Speicher abgebildet
+    """
+    ordner = datei.parent / ZWISCHENSPEICHER / datei.stem
+    kennung = quellkennung(datei)
+    try:
+        gespeichert = json.loads((ordner / "quelle.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        gespeichert = {}
+
+    gueltig = gespeichert.get("version") == VERSION and (
+        gespeichert.get("stand") == kennung
+        or gespeichert.get("sha256") == pruefsumme(datei)
+    )
+    if gueltig:
+        try:
+            arrays = {
+                name: np.load(ordner / f"{name}.npy", mmap_mode="r")
+                for name in gespeichert["arrays"]
+            }
+            if gespeichert["stand"] != kennung:
+                schreibe_quelle(ordner, {**gespeichert, "stand": kennung})
+            return arrays
+        except (OSError, ValueError):
+            pass
+
+    arrays = umwandeln(load_yaml(datei))
+    try:
+        ordner.mkdir(parents=True, exist_ok=True)
+        (ordner / "quelle.json").unlink(missing_ok=True)
+        for name, array in arrays.items():
+            temporaer = temporaere_datei(ordner / f"{name}.npy")
+            np.save(temporaer, array, allow_pickle=False)
+            os.replace(temporaer, ordner / f"{name}.npy")
+        schreibe_quelle(
+            ordner,
+            {
+                "version": VERSION,
+                "stand": kennung,
+                "sha256": pruefsumme(datei),
+                "arrays": list(arrays.keys()),
+            },
+        )
+    except OSError:
+        pass
+    return arrays
+
+
+def quellkennung(datei: Path) -> list:
+    """
+    Änderungszeit in Nanosekunden und Größe der Datei als schnelle Kennung ihres Stands
+
+        :param datei: Quelldatei
+        :return: [Änderungszeit, Größe]
+    """
+    status = datei.stat()
+    return [status.st_mtime_ns, status.st_size]
+
+
+def pruefsumme(datei: Path) -> str:
+    """
+    SHA-256 des Dateiinhalts, erkennt unveränderte Dateien mit neuer Änderungszeit, etwa nach einem git checkout
+
+        :param datei: Quelldatei
+        :return: Prüfsumme als Hexadezimalzahl
+    """
+    return hashlib.sha256(datei.read_bytes()).hexdigest()
+
+
+def temporaere_datei(ziel: Path) -> Path:
+    """
+    Name einer temporären Datei neben dem Ziel, eindeutig je Prozess und Thread, die anschließend mit os.replace an
+    ihren Platz geschoben wird
+
+        :param ziel: endgültige Datei
+        :return: temporäre Datei mit derselben Endung
+    """
+    return ziel.with_name(
+        f"{ziel.stem}.{os.getpid()}.{threading.get_ident()}{ziel.suffix}"
+    )
+
+
+def schreibe_quelle(ordner: Path, quelle: dict):
+    """
+    Schreibe die Beschreibung des Zwischenspeichers atomar, damit gleichzeitige Leser nie eine halbe Datei sehen
+
+        :param ordner: Ordner des Zwischenspeichers
+        :param quelle: Version, Kennung, Prüfsumme und Namen der Arrays
+    """
+    temporaer = temporaere_datei(ordner / "quelle.json")
+    temporaer.write_text(json.dumps(quelle), encoding="utf-8")
+    os.replace(temporaer, ordner / "quelle.json")
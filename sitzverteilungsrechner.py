@@ -3,8 +3,18 @@
 import argparse
 from pathlib import Path
 
-from sitzverteilung.download import download
-from sitzverteilung.sitzverteilung import sitzverteilung
+from sitzverteilung.hilfsmittel import lade_bei_bedarf
+from sitzverteilung.profil import profiliere, stufe
+from sitzverteilung.rechner.losverfahren import Losverfahren, losverfahren_aus_text
+
+# erst bei Bedarf laden, damit Aufrufe ohne Download, Dienst oder pandas schnell starten
+auszaehlung = lade_bei_bedarf("sitzverteilung.auszaehlung")
+dienst = lade_bei_bedarf("sitzverteilung.dienst")
+kandidaten = lade_bei_bedarf("sitzverteilung.kandidaten")
+download = lade_bei_bedarf("sitzverteilung.download")
+simulation = lade_bei_bedarf("sitzverteilung.simulation")
+sitzverteilung = lade_bei_bedarf("sitzverteilung.sitzverteilung")
+stapel = lade_bei_bedarf("sitzverteilung.stapel")
 
 
 def parse():
@@ -21,6 +31,66 @@ def parse():
         nargs=2,
         default="",
     )
+    parser.add_argument(
+        "-s",
+        "--stapel",
+        help="berechne alle Verzeichnisse mit Einstellungen.yaml unterhalb der angegebenen Ordner parallel",
+        nargs="+",
+    )
+    parser.add_argument(
+        "-j", "--arbeiter", help="Anzahl der Arbeitsprozesse für --stapel", type=int
+    )
+    parser.add_argument(
+        "-o", "--ausgabe", help="CSV-Datei, in die --stapel die Ergebnisse schreibt"
+    )
+    parser.add_argument(
+        "-l",
+        "--los",
+        help="Losverfahren bei Gleichständen: interaktiv, ablehnen, zufall[:Startwert] oder reihenfolge:Partei,Partei",
+        type=losverfahren_aus_text,
+    )
+    parser.add_argument(
+        "-w",
+        "--live",
+        help="verfolge die Auszählung beim Beispiel bundestag und frage die Daten alle LIVE Sekunden ab",
+        type=float,
+    )
+    parser.add_argument(
+        "-d",
+        "--dienst",
+        help="starte einen lokalen HTTP-Dienst auf dem Port DIENST (standardmäßig 8080), der Anfragen als JSON "
+        "berechnet; ohne pfad in der Anfrage gilt das mit -b gewählte Beispiel",
+        nargs="?",
+        const=8080,
+        type=int,
+    )
+    parser.add_argument(
+        "--host",
+        help="Adresse des Dienstes, standardmäßig 127.0.0.1",
+        default="127.0.0.1",
+    )
+    parser.add_argument(
+        "-k",
+        "--kompakt",
+        help="berechne nur die Sitze je Partei allein über Arrays, ohne pandas; Gleichstände entscheidet das Los "
+        "mit dem Startwert aus -l zufall:Startwert",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-a",
+        "--abgeordnete",
+        help="besetze die Sitze mit den Bewerbern aus Direktkandidaten.yaml und Listenkandidaten.yaml und gib die "
+        "Abgeordneten aus; Gleichstände entscheidet das Los mit dem Startwert aus -l zufall:Startwert",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-p",
+        "--profil",
+        "--profile",
+        help="gib Dauer je Stufe, Anzahl der Verteilungen, Schritte, Lose und Rekursionstiefen aus "
+        "(ohne die Arbeitsprozesse von --stapel)",
+        action="store_true",
+    )
     return parser.parse_args()
 
 
@@ -29,6 +99,37 @@ def main():
     Hauptroutine für die Sitzverteilung
     """
     args = parse()
+    if not args.profil:
+        berechne(args)
+        return
+    with profiliere() as profil:
+        try:
+            berechne(args)
+        finally:
+            print(profil.bericht())
+
+
+def berechne(args):
+    """
+    Führe die gewählte Berechnung aus
+
+        :param argparse.Namespace args: geparste Argumente
+    """
+    if args.stapel:
+        verzeichnisse = [
+            verzeichnis
+            for ordner in args.stapel
+            for verzeichnis in stapel.finde_verzeichnisse(ordner)
+        ]
+        print(
+            stapel.stapeltabelle(
+                verzeichnisse,
+                args.arbeiter,
+                ausgabe=args.ausgabe,
+                losverfahren=args.los,
+            )
+        )
+        return
 
     beispiel = args.beispiel
 
@@ -41,11 +142,84 @@ def main():
     if not pfad.exists():
         raise ValueError(f"Das angegebene Beispiel am Ort {pfad} existiert nicht")
 
+    if args.dienst is not None:
+        dienst.starte_dienst(args.host, args.dienst, standardpfad=pfad)
+        return
+
+    if args.live:
+        losverfahren = Losverfahren(**(args.los or {}))
+        for aktualisierung in auszaehlung.beobachte(
+            pfad, args.live, losverfahren=losverfahren
+        ):
+            print(aktualisierung.ergebnis.sitze)
+            print(
+                "Gesamtanzahl Sitze:",
+                aktualisierung.ergebnis.gesamtsitze,
+                f"({len(aktualisierung.wahlkreise)} Wahlkreise,",
+                f"{len(aktualisierung.unterverteilungen)} Unterverteilungen neu)",
+                ", ".join(
+                    f"{schritt} {1000 * dauer:.0f} ms"
+                    for schritt, dauer in aktualisierung.latenz.items()
+                ),
+            )
+        return
+
     if beispiel:
         if beispiel[0] == "bundestag":
-            download(pfad)
+            with stufe("Download"):
+                download.download(pfad)
+
+    if args.kompakt:
+        zeige_kompakt(pfad, args.los)
+        return
+
+    if args.abgeordnete:
+        seed = zufallsstartwert(args.los, "--abgeordnete")
+        print(kandidaten.abgeordnete(pfad, seed=seed).to_string(index=False))
+        return
+
+    sitzverteilung.sitzverteilung(
+        pfad, ausgabe=True, losverfahren=Losverfahren(**(args.los or {}))
+    )
+
+
+def zeige_kompakt(pfad, los):
+    """
+    Berechne die Sitzverteilung ohne pandas und gib die Sitze je Partei aus
+
+        :param Path pfad: Verzeichnis mit den Eingabedaten
+        :param dict los: Argumente für das Losverfahren aus -l, nur zufall ist möglich
+    """
+    ergebnis = simulation.berechne_sitze(pfad, seed=zufallsstartwert(los, "--kompakt"))
+    zeilen = [
+        (partei, sitze)
+        for partei, sitze in zip(ergebnis.parteien.tolist(), ergebnis.sitze[0].tolist())
+        if sitze
+    ]
+    if ergebnis.unabhaengige[0]:
+        zeilen.append(("Wahlkreissieger ohne Zulassung", int(ergebnis.unabhaengige[0])))
+    breite = max(len(partei) for partei, _ in zeilen + [("Partei", 0)])
+    print("Sitzverteilung")
+    print(f"{'Partei':<{breite}}  Sitze")
+    for partei, sitze in zeilen:
+        print(f"{partei:<{breite}}  {sitze:5d}")
+    print("Gesamtanzahl Sitze: ", int(ergebnis.gesamtsitze[0]))
+
 
-    sitzverteilung(pfad)
+def zufallsstartwert(los, schalter):
+    """
+    Startwert für Lose aus -l, für Berechnungen, die Gleichstände nur per Zufallsgenerator entscheiden
+
+        :param dict los: Argumente für das Losverfahren aus -l, nur zufall ist möglich
+        :param str schalter: Name des Schalters für die Fehlermeldung
+        :return: Startwert oder None
+    """
+    los = los or {"art": "zufall"}
+    if los["art"] != "zufall":
+        raise ValueError(
+            f"{schalter} entscheidet Gleichstände nur per zufall, nicht per {los['art']}"
+        )
+    return los.get("seed")
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Tests des Sitzverteilungsrechners, auszuführen mit python -m unittest"""
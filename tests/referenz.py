@@ -0,0 +1,232 @@
+"""Exakte Referenzverfahren für die Tests: die ursprüngliche Zuteilung Sitz für Sitz nach der höchsten Rangzahl, mit
+Brüchen statt Gleitkommazahlen, der ursprüngliche Zitierdivisor und zufällige Stimmen mit festem Startwert.
+"""
+
+import decimal
+import math
+import random
+from fractions import Fraction
+
+import pandas as pd
+
+from sitzverteilung.hilfsmittel import remove_exponent
+
+HALB = decimal.Decimal("0.5")
+
+
+def rangzahl_sainte_lague(stimmen: int, sitzzahl: int) -> Fraction:
+    """Rangzahl V / (S + 0.5)"""
+    return Fraction(2 * stimmen, 2 * sitzzahl + 1)
+
+
+def rangzahl_d_hondt(stimmen: int, sitzzahl: int) -> Fraction:
+    """Rangzahl V / (S + 1)"""
+    return Fraction(stimmen, sitzzahl + 1)
+
+
+def rangzahl_adams(stimmen: int, sitzzahl: int):
+    """Rangzahl V / S, unendlich ohne Sitz"""
+    return Fraction(stimmen, sitzzahl) if sitzzahl else math.inf
+
+
+def rangzahl_huntington_hill(stimmen: int, sitzzahl: int):
+    """Quadrat der Rangzahl V / √(S·(S + 1)), unendlich ohne Sitz"""
+    return (
+        Fraction(stimmen * stimmen, sitzzahl * (sitzzahl + 1)) if sitzzahl else math.inf
+    )
+
+
+def hoechstzahlverfahren(stimmen: list, sitze: int, rangzahl=rangzahl_sainte_lague):
+    """
+    Vergib die Sitze einzeln an die Partei mit der höchsten Rangzahl wie das ursprüngliche sainte_lague_rangzahl.
+    Liegen mehr Parteien gleichauf, als Sitze übrig sind, bleiben diese Sitze unvergeben.
+
+        :param stimmen: Stimmen je Partei
+        :param sitze: Anzahl zu verteilender Sitze
+        :param rangzahl: Funktion (Stimmen, Sitze) -> Rangzahl für den nächsten Sitz
+        :return: Sitze je Partei, Nummern der Parteien im Lostopf
+        :rtype: (list, list)
+    """
+    sitzzahl = [0] * len(stimmen)
+    while sum(sitzzahl) < sitze:
+        rang = [rangzahl(*partei) for partei in zip(stimmen, sitzzahl)]
+        gleichauf = [partei for partei, wert in enumerate(rang) if wert == max(rang)]
+        if len(gleichauf) > sitze - sum(sitzzahl):
+            return sitzzahl, gleichauf
+        sitzzahl[gleichauf[0]] += 1
+    return sitzzahl, []
+
+
+def hare_niemeyer(stimmen: list, sitze: int):
+    """
+    Vergib die abgerundeten Quoten V·sitze / gesamt und die übrigen Sitze nach den größten Resten. Liegen an der
+    Grenze mehr Reste gleichauf, als Sitze übrig sind, bleiben diese Sitze unvergeben.
+
+        :param stimmen: Stimmen je Partei
+        :param sitze: Anzahl zu verteilender Sitze
+        :return: Sitze je Partei, Nummern der Parteien im Lostopf
+        :rtype: (list, list)
+    """
+    quoten = [Fraction(partei * sitze, sum(stimmen)) for partei in stimmen]
+    sitzzahl = [math.floor(quote) for quote in quoten]
+    reste = [quote - sitz for quote, sitz in zip(quoten, sitzzahl)]
+    offen = sitze - sum(sitzzahl)
+    if not offen:
+        return sitzzahl, []
+    grenze = sorted(reste, reverse=True)[offen - 1]
+    hoeher = [partei for partei, rest in enumerate(reste) if rest > grenze]
+    gleichauf = [partei for partei, rest in enumerate(reste) if rest == grenze]
+    for partei in hoeher:
+        sitzzahl[partei] += 1
+    if len(gleichauf) > offen - len(hoeher):
+        return sitzzahl, gleichauf
+    for partei in gleichauf:
+        sitzzahl[partei] += 1
+    return sitzzahl, []
+
+
+def zufaellige_stimmen(rng: random.Random, parteien: int = 7) -> list:
+    """
+    Ziehe Stimmen für bis zu `parteien` Parteien. Die Hälfte der Fälle besteht aus wenigen Vielfachen einer kleinen
+    Basis, damit exakte Gleichstände häufig vorkommen.
+
+        :param rng: Zufallsgenerator
+        :param parteien: höchste Anzahl Parteien
+        :return: positive Stimmen je Partei
+    """
+    anzahl = rng.randint(1, parteien)
+    if rng.random() < 0.5:
+        basis = rng.choice([1, 2, 3, 5, 7, 10])
+        return [basis * rng.randint(1, 6) for _ in range(anzahl)]
+    return [rng.randint(1, 10 ** rng.randint(1, 6)) for _ in range(anzahl)]
+
+
+def als_tabelle(stimmen: list) -> pd.DataFrame:
+    """
+    Stimmen als Tabelle für die Sitzverteilungsrechner, die Parteien heißen P0, P1, ...
+
+        :param stimmen: Stimmen je Partei
+        :return: Tabelle mit Spalte Stimmen
+    """
+    return pd.DataFrame(
+        {"Stimmen": stimmen}, index=[f"P{partei}" for partei in range(len(stimmen))]
+    )
+
+
+def nice_round_bisher(first, second) -> str:  # pylint: disable=too-many-branches
+    """
+    Ursprüngliche Fassung von nice_round, die die Ziffern der Grenzen als Zeichenketten vergleicht. Sie erwartet
+    Dezimalzahlen ohne Exponent, siehe remove_exponent.
+
+        :param first: untere Grenze
+        :param second: obere Grenze
+        :return: "schöne" Zahl als string
+    """
+    if first == second:
+        return str(first)
+    first, second = sorted((first, second))
+
+    first = str(first)
+    second = str(second)
+    first = first if "." in first else f"{first}."
+    second = second if "." in second else f"{second}."
+    pre_decimal = len(first.split(".", maxsplit=1)[0]) - len(
+        second.split(".", maxsplit=1)[0]
+    )
+    post_decimal = len(first.split(".")[1]) - len(second.split(".")[1])
+
+    if pre_decimal < 0:
+        first = "".join(["0" * abs(pre_decimal), first])
+    elif pre_decimal > 0:
+        second = "".join(["0" * abs(pre_decimal), second])
+
+    if post_decimal < 0:
+        first = "".join([first, "0" * abs(post_decimal)])
+    elif pre_decimal > 0:
+        second = "".join([second, "0" * abs(post_decimal)])
+
+    resulting_number = ""
+    for first_digit, second_digit in zip(first, second):
+        if first_digit == second_digit:
+            resulting_number = "".join([resulting_number, first_digit])
+        else:
+            for nice_digit in [5, 8, 6, 4, 2, 9, 7, 5, 3, 1, 0]:
+                if nice_digit in range(int(first_digit) + 1, int(second_digit) + 1):
+                    resulting_number = "".join([resulting_number, str(nice_digit)])
+                    if "." not in resulting_number:
+                        adding_zeros = len(first.split(".", maxsplit=1)[0]) - len(
+                            resulting_number
+                        )
+                        resulting_number = "".join(
+                            [resulting_number, "0" * adding_zeros]
+                        )
+                    break
+            break
+    return resulting_number
+
+
+def divisorgrenzen_bisher(stimmen: list, sitzzahl: list) -> tuple:
+    """
+    Divisorgrenzen wie im ursprünglichen bestimme_zitierdivisor: max(V / (S + 0.5)) abgerundet und min(V / (S - 0.5))
+    über Parteien mit Sitzen aufgerundet, jeweils auf 28 Stellen
+
+        :param stimmen: positive Stimmen je Partei
+        :param sitzzahl: Sitze je Partei, mindestens einer vergeben
+        :return: Untergrenze, Obergrenze
+        :rtype: (decimal.Decimal, decimal.Decimal)
+    """
+    with decimal.localcontext(decimal.Context(rounding=decimal.ROUND_DOWN)):
+        untergrenze = max(
+            decimal.Decimal(v) / (decimal.Decimal(s) + HALB)
+            for v, s in zip(stimmen, sitzzahl)
+        )
+    with decimal.localcontext(decimal.Context(rounding=decimal.ROUND_UP)):
+        obergrenze = min(
+            decimal.Decimal(v) / (decimal.Decimal(s) - HALB)
+            for v, s in zip(stimmen, sitzzahl)
+            if s > 0
+        )
+    return untergrenze, obergrenze
+
+
+def zitierdivisor_bisher(stimmen: list, sitzzahl: list) -> decimal.Decimal:
+    """
+    Zitierdivisor wie im ursprünglichen bestimme_zitierdivisor
+
+        :param stimmen: positive Stimmen je Partei
+        :param sitzzahl: Sitze je Partei, mindestens einer vergeben
+        :return: "schöner" Divisor
+    """
+    untergrenze, obergrenze = divisorgrenzen_bisher(stimmen, sitzzahl)
+    return decimal.Decimal(
+        nice_round_bisher(remove_exponent(untergrenze), remove_exponent(obergrenze))
+    )
+
+
+def gesamtsitze_bisher(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    stimmen: list, mindestsitze: list, gesamtsitze: int, ueberhang: int, obergrenze
+) -> int:
+    """
+    Erhöhe die Gesamtsitzzahl schrittweise wie die ursprüngliche Oberverteilung, bis höchstens `ueberhang`
+    Überhangsmandate bleiben oder die Obergrenze erreicht ist. Wie bei bestimme_gesamtsitze zählen nur die ohne Los
+    vergebenen Sitze.
+
+        :param stimmen: Stimmen je Partei
+        :param mindestsitze: Mindestsitze je Partei
+        :param gesamtsitze: Sitzzahl vor der Erhöhung
+        :param ueberhang: Anzahl nicht auszugleichender Überhangsmandate
+        :param obergrenze: Maximale Anzahl an Sitzen
+        :return: Gesamtsitzzahl
+    """
+
+    def differenz(sitze):
+        sitzzahl, _ = hoechstzahlverfahren(stimmen, sitze)
+        return sum(
+            max(mindest - sitz, 0) for mindest, sitz in zip(mindestsitze, sitzzahl)
+        )
+
+    summe = differenz(gesamtsitze)
+    while summe > ueberhang and gesamtsitze < obergrenze - summe:
+        gesamtsitze = min(gesamtsitze + summe - ueberhang, obergrenze - summe)
+        summe = differenz(gesamtsitze)
+    return gesamtsitze
@@ -0,0 +1,66 @@
+"""Eine teilweise ausgezählte Wahl für die Tests: Die Bundestagswahl 2021, in der Bremen und das Saarland noch keine
+Stimmen gemeldet haben."""
+
+import shutil
+from pathlib import Path
+
+from sitzverteilung.hilfsmittel import dump_yaml, load_yaml
+from sitzverteilung.rechner.losverfahren import Losverfahren
+from sitzverteilung.sitzverteilung import sitzverteilung
+
+BEISPIEL = Path(__file__).resolve().parent.parent / "beispiele" / "bundestag" / "2021"
+DATEIEN = [
+    "Einstellungen.yaml",
+    "Länder.yaml",
+    "Direktkandidaten.yaml",
+    "Listenkandidaten.yaml",
+]
+OFFEN = ["Bremen", "Saarland"]
+
+
+def erzeuge_teilauszaehlung(ziel: Path, offen: list, erststimmen: bool = False):
+    """
+    Kopiere die Bundestagswahl 2021 und setze die Zweitstimmen der offenen Länder auf null
+
+        :param ziel: Verzeichnis der neuen Wahl
+        :param offen: Länder ohne gemeldete Stimmen
+        :param erststimmen: auch die Erststimmen der offenen Länder auf null setzen
+    """
+    ziel.mkdir(parents=True)
+    for datei in DATEIEN:
+        shutil.copy(BEISPIEL / datei, ziel / datei)
+    zweitstimmen = load_yaml(BEISPIEL / "Zweitstimme.yaml")
+    for land in offen:
+        zweitstimmen[land] = {partei: 0 for partei in zweitstimmen[land]}
+    dump_yaml(zweitstimmen.items(), ziel / "Zweitstimme.yaml")
+    wahlkreise = load_yaml(BEISPIEL / "Erststimme.yaml")
+    if erststimmen:
+        for land in offen:
+            wahlkreise[land] = {
+                wahlkreis: {partei: 0 for partei in stimmen}
+                for wahlkreis, stimmen in wahlkreise[land].items()
+            }
+    dump_yaml(wahlkreise.items(), ziel / "Erststimme.yaml")
+
+
+def sitze_je_partei(parteien, sitze) -> dict:
+    """
+    Sitze je Partei mit mindestens einem Sitz
+
+        :param parteien: Namen der Parteien
+        :param sitze: Sitze in gleicher Reihenfolge
+        :return: Partei → Sitze
+    """
+    return {partei: int(anzahl) for partei, anzahl in zip(parteien, sitze) if anzahl}
+
+
+def erwartete_sitze(pfad) -> tuple:
+    """
+    Sitze je Partei und Gesamtsitze nach sitzverteilung(), Lose mit Startwert 1
+
+        :param pfad: Verzeichnispfad
+        :return: Partei → Sitze, Gesamtsitze
+    """
+    ergebnis = sitzverteilung(pfad, losverfahren=Losverfahren(art="zufall", seed=1))
+    sitze = ergebnis.sitze["Sitze"]
+    return sitze_je_partei(sitze.index, sitze), ergebnis.gesamtsitze
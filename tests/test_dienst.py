@@ -0,0 +1,84 @@
+"""Prüft den Sitzverteilungsdienst über HTTP an einer teilweise ausgezählten Wahl"""
+
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sitzverteilung.dienst import Sitzverteilungsdienst, erzeuge_server
+from sitzverteilung.hilfsmittel import load_yaml
+from tests.teilauszaehlung import OFFEN, erwartete_sitze, erzeuge_teilauszaehlung
+
+
+class TestDienst(unittest.TestCase):
+    """Dienst mit der teilweise ausgezählten Wahl als Standardpfad"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.wurzel = Path(tempfile.mkdtemp())
+        cls.pfad = cls.wurzel / "teilauszaehlung"
+        erzeuge_teilauszaehlung(cls.pfad, OFFEN, erststimmen=True)
+        cls.dienst = Sitzverteilungsdienst(
+            wurzel=cls.wurzel, standardpfad="teilauszaehlung", wartezeit=0.2, saat=1
+        )
+        cls.server = erzeuge_server(cls.dienst, port=0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.wurzel)
+
+    def sende(self, auftrag: dict) -> tuple:
+        """
+        Sende eine Anfrage an POST /sitzverteilung
+
+            :param auftrag: Anfrage
+            :return: HTTP-Status und Antwort
+        """
+        anfrage = urllib.request.Request(
+            f"http://127.0.0.1:{self.server.server_port}/sitzverteilung",
+            data=json.dumps(auftrag).encode(),
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(anfrage, timeout=60) as antwort:
+                return antwort.status, json.loads(antwort.read())
+        except urllib.error.HTTPError as fehler:
+            return fehler.code, json.loads(fehler.read())
+
+    def test_teilauszaehlung(self):
+        """Die unveränderte Wahl ergibt dieselben Sitze wie sitzverteilung()"""
+        status, antwort = self.sende({})
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            (antwort["sitze"], antwort["gesamtsitze"]), erwartete_sitze(self.pfad)
+        )
+
+    def test_fehler_trifft_nur_eigene_anfrage(self):
+        """Eine fehlerhafte Anfrage im selben Stapel lässt die übrigen unberührt"""
+        zweitstimmen = load_yaml(self.pfad / "Zweitstimme.yaml")
+        ohne_stimmen = {
+            partei: {land: 0 for land in zweitstimmen}
+            for partei in zweitstimmen[OFFEN[0]]
+        }
+        auftraege = [
+            {"zweitstimmen": {"CDU": {OFFEN[0]: 1000}}},
+            {"zweitstimmen": ohne_stimmen},
+            {"zweitstimmen": {"SPD": {OFFEN[1]: 1000}}},
+        ]
+        with ThreadPoolExecutor(len(auftraege)) as pool:
+            antworten = list(pool.map(self.sende, auftraege))
+        self.assertEqual([status for status, _ in antworten], [200, 400, 200])
+        self.assertIn("gesamtsitze", antworten[0][1])
+        self.assertIn("fehler", antworten[1][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
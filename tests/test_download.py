@@ -0,0 +1,180 @@
+"""Prüft den Download gegen einen lokalen Server mit ETag, bedingtem GET und Range-Anfragen: abgebrochene Downloads
+werden fortgesetzt, und die Kennungen erfolgreicher Dateien bleiben erhalten, wenn andere fehlschlagen.
+"""
+
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from sitzverteilung.download import KENNUNGEN, lade_herunter
+
+
+class Bundeswahlleiter(BaseHTTPRequestHandler):
+    """Liefert die Dateien aus inhalte, bricht Übertragungen nach abbruch Bytes ab und antwortet für defekt mit 500"""
+
+    inhalte: dict = {}
+    abbruch: dict = {}
+    defekt: set = set()
+    anfragen: list = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Verzeichnis oder Datei ausliefern"""
+        name = self.path.lstrip("/")
+        self.anfragen.append((name, dict(self.headers)))
+        if not name:
+            self.antworte(
+                200,
+                "".join(
+                    f'<a href="{datei}">{datei}</a>' for datei in self.inhalte
+                ).encode(),
+            )
+        elif name in self.defekt or name not in self.inhalte:
+            self.antworte(500, b"")
+        else:
+            self.liefere(name)
+
+    def liefere(self, name):
+        """Eine Datei mit ETag, bedingt und ab einer Position ausliefern"""
+        inhalt = self.inhalte[name]
+        etag = f'"{hashlib.sha256(inhalt).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.antworte(304, b"", etag)
+            return
+        start = 0
+        bereich = self.headers.get("Range")
+        if bereich and self.headers.get("If-Range") == etag:
+            start = int(bereich.removeprefix("bytes=").rstrip("-"))
+        if start >= len(inhalt) > 0:
+            self.antworte(416, b"", etag)
+            return
+        self.antworte(
+            206 if start else 200,
+            inhalt[start:],
+            etag,
+            abbruch=self.abbruch.pop(name, None),
+        )
+
+    def antworte(self, status, inhalt, etag=None, abbruch=None):
+        """Antwort mit vollständiger Content-Length senden, bei abbruch nur die ersten Bytes"""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(inhalt)))
+        self.end_headers()
+        self.wfile.write(inhalt[:abbruch])
+        if abbruch is not None:
+            self.close_connection = True
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keine Ausgabe je Anfrage"""
+
+
+class TestDownload(unittest.TestCase):
+    """Download aus einem lokalen Server in ein temporäres Verzeichnis"""
+
+    def setUp(self):
+        self.pfad = Path(tempfile.mkdtemp())
+        Bundeswahlleiter.inhalte = {
+            "kerg2.csv": bytes(range(256)) * 4000,
+            "kandidaturen.csv": b"Name;Partei\n" * 1000,
+        }
+        Bundeswahlleiter.abbruch = {}
+        Bundeswahlleiter.defekt = set()
+        Bundeswahlleiter.anfragen = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Bundeswahlleiter)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.pfad)
+
+    def lade(self) -> dict:
+        """Lade alle Dateien des Servers herunter"""
+        return lade_herunter(self.pfad, url=self.url, arbeiter=2)
+
+    def bereiche(self, name) -> list:
+        """Range-Kopfzeilen aller Anfragen einer Datei"""
+        return [
+            kopf.get("Range")
+            for datei, kopf in Bundeswahlleiter.anfragen
+            if datei == name
+        ]
+
+    def pruefe_inhalte(self):
+        """Alle Dateien liegen vollständig und ohne Teildateien vor"""
+        for name, inhalt in Bundeswahlleiter.inhalte.items():
+            self.assertEqual((self.pfad / "daten" / name).read_bytes(), inhalt)
+        self.assertEqual(list((self.pfad / "daten").glob("*.teil*")), [])
+
+    def test_abgebrochener_erster_download(self):
+        """Ein abgebrochener erster Download wird ab der Teildatei fortgesetzt"""
+        Bundeswahlleiter.abbruch["kerg2.csv"] = 300000
+        with self.assertRaises(requests.RequestException):
+            self.lade()
+        teil = (self.pfad / "daten" / "kerg2.csv.teil").stat().st_size
+        self.assertGreater(teil, 0)
+
+        self.assertEqual(
+            self.lade(), {"kerg2.csv": "neu", "kandidaturen.csv": "unverändert"}
+        )
+        self.assertEqual(self.bereiche("kerg2.csv")[-1], f"bytes={teil}-")
+        self.pruefe_inhalte()
+
+    def test_abgebrochene_aktualisierung(self):
+        """Eine abgebrochene Aktualisierung einer vorhandenen Datei wird fortgesetzt"""
+        self.lade()
+        Bundeswahlleiter.inhalte["kerg2.csv"] = bytes(reversed(range(256))) * 5000
+        Bundeswahlleiter.abbruch["kerg2.csv"] = 200000
+        with self.assertRaises(requests.RequestException):
+            self.lade()
+        teil = (self.pfad / "daten" / "kerg2.csv.teil").stat().st_size
+        self.assertGreater(teil, 0)
+
+        self.assertEqual(self.lade()["kerg2.csv"], "aktualisiert")
+        self.assertEqual(self.bereiche("kerg2.csv")[-1], f"bytes={teil}-")
+        self.pruefe_inhalte()
+
+    def test_geaenderte_datei_beginnt_neu(self):
+        """Hat sich die Datei seit dem Abbruch geändert, wird sie vollständig neu geladen"""
+        Bundeswahlleiter.abbruch["kerg2.csv"] = 300000
+        with self.assertRaises(requests.RequestException):
+            self.lade()
+        Bundeswahlleiter.inhalte["kerg2.csv"] = b"neu;" * 50000
+
+        self.assertEqual(self.lade()["kerg2.csv"], "neu")
+        self.pruefe_inhalte()
+
+    def test_kennungen_trotz_fehler(self):
+        """Schlägt eine Datei fehl, bleiben die Kennungen der übrigen erhalten"""
+        Bundeswahlleiter.defekt.add("kerg2.csv")
+        with self.assertRaises(requests.HTTPError):
+            self.lade()
+        kennungen = json.loads(
+            (self.pfad / "daten" / KENNUNGEN).read_text(encoding="utf-8")
+        )
+        self.assertIn("ETag", kennungen["kandidaturen.csv"])
+        self.assertNotIn("kerg2.csv", kennungen)
+
+        Bundeswahlleiter.defekt.clear()
+        self.assertEqual(
+            self.lade(), {"kerg2.csv": "neu", "kandidaturen.csv": "unverändert"}
+        )
+        kopf = [
+            kopf
+            for datei, kopf in Bundeswahlleiter.anfragen
+            if datei == "kandidaturen.csv"
+        ][-1]
+        self.assertIn("If-None-Match", kopf)
+
+
+if __name__ == "__main__":
+    unittest.main()
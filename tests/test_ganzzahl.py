@@ -0,0 +1,61 @@
+"""Vergleicht den Ganzzahlkern für Sainte-Laguë auf zufälligen Stimmen mit festem Startwert mit der ursprünglichen
+Zuteilung Sitz für Sitz und mit dem Decimal-Divisorverfahren"""
+
+import random
+import unittest
+
+from sitzverteilung.rechner.divisor import sainte_lague_divisor
+from sitzverteilung.rechner.ganzzahl import (
+    SAINTE_LAGUE,
+    sainte_lague_ganzzahl,
+    zuteilung_ganzzahl,
+)
+from tests.referenz import als_tabelle, hoechstzahlverfahren, zufaellige_stimmen
+
+FAELLE = 1000
+
+
+class TestGanzzahl(unittest.TestCase):
+    """sainte_lague_ganzzahl und zuteilung_ganzzahl gegen die Referenzverfahren"""
+
+    def test_wie_hoechstzahlverfahren(self):
+        """Sitze und Lostopf stimmen überein, auch bei exakten Gleichständen"""
+        rng = random.Random(1)
+        gleichstaende = 0
+        for _ in range(FAELLE):
+            stimmen, sitze = zufaellige_stimmen(rng), rng.randint(1, 40)
+            sitzzahl, lostopf = hoechstzahlverfahren(stimmen, sitze)
+            gleichstaende += bool(lostopf)
+            for rechner in (sainte_lague_ganzzahl, zuteilung_ganzzahl):
+                with self.subTest(
+                    rechner=rechner.__name__, stimmen=stimmen, sitze=sitze
+                ):
+                    tabelle, lose = rechner(als_tabelle(stimmen), sitze)
+                    self.assertEqual(tabelle["Sitze"].to_list(), sitzzahl)
+                    self.assertEqual(lose, [f"P{partei}" for partei in lostopf])
+        self.assertGreater(gleichstaende, FAELLE // 20)
+
+    def test_wie_divisorverfahren(self):
+        """Ohne Gleichstand stimmen Sitze und Zitierdivisor mit sainte_lague_divisor überein"""
+        rng = random.Random(2)
+        for _ in range(FAELLE // 4):
+            stimmen, sitze = zufaellige_stimmen(rng), rng.randint(1, 40)
+            if hoechstzahlverfahren(stimmen, sitze)[1]:
+                continue
+            erwartet, _ = sainte_lague_divisor(als_tabelle(stimmen), sitze)
+            for tabelle, _ in (
+                sainte_lague_ganzzahl(als_tabelle(stimmen), sitze),
+                zuteilung_ganzzahl(als_tabelle(stimmen), sitze, SAINTE_LAGUE),
+            ):
+                with self.subTest(stimmen=stimmen, sitze=sitze):
+                    self.assertEqual(
+                        tabelle["Sitze"].to_list(), erwartet["Sitze"].to_list()
+                    )
+                    self.assertEqual(
+                        tabelle.attrs["Zitierdivisor"],
+                        erwartet.attrs["Zitierdivisor"],
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Vergleicht die Halbierungssuche der Gesamtsitzzahl auf zufälligen Eingaben mit festem Startwert mit der
+ursprünglichen schrittweisen Erhöhung"""
+
+import math
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sitzverteilung.sitzverteilung import bestimme_gesamtsitze, gesamtsitze_matrix
+from tests.referenz import gesamtsitze_bisher
+
+FAELLE = 300
+
+
+def zufaellige_oberverteilung(rng: random.Random) -> tuple:
+    """
+    Ziehe Stimmen, Mindestsitze, Sitzzahl, Überhang und Obergrenze. Die Mindestsitze streuen um die Quote, sodass
+    häufig Überhangsmandate entstehen.
+
+        :param rng: Zufallsgenerator
+        :return: Stimmen, Mindestsitze, Sitzzahl vor der Erhöhung, Überhang, Obergrenze
+    """
+    stimmen = [rng.randint(1, 10**6) for _ in range(rng.randint(2, 7))]
+    gesamtsitze = rng.randint(5, 80)
+    mindestsitze = [
+        int(partei * gesamtsitze / sum(stimmen) * rng.uniform(0, 1.8))
+        for partei in stimmen
+    ]
+    obergrenze = rng.choice([math.inf, gesamtsitze + rng.randint(0, 2 * gesamtsitze)])
+    return stimmen, mindestsitze, gesamtsitze, rng.choice([0, 0, 1, 3]), obergrenze
+
+
+class TestGesamtsitze(unittest.TestCase):
+    """bestimme_gesamtsitze und gesamtsitze_matrix gegen gesamtsitze_bisher"""
+
+    def test_wie_schrittweise_erhoehung(self):
+        """Jede Oberverteilung endet bei derselben Gesamtsitzzahl wie die schrittweise Erhöhung"""
+        rng = random.Random(6)
+        erhoeht = 0
+        for _ in range(FAELLE):
+            stimmen, mindestsitze, gesamtsitze, ueberhang, obergrenze = (
+                zufaellige_oberverteilung(rng)
+            )
+            erwartet = gesamtsitze_bisher(
+                stimmen, mindestsitze, gesamtsitze, ueberhang, obergrenze
+            )
+            erhoeht += erwartet > gesamtsitze
+            parteien = [f"P{partei}" for partei in range(len(stimmen))]
+            with self.subTest(
+                stimmen=stimmen,
+                mindestsitze=mindestsitze,
+                gesamtsitze=gesamtsitze,
+                ueberhang=ueberhang,
+                obergrenze=obergrenze,
+            ):
+                ergebnis, _ = bestimme_gesamtsitze(
+                    pd.Series(stimmen, index=parteien),
+                    pd.Series(mindestsitze, index=parteien),
+                    gesamtsitze,
+                    ueberhang,
+                    obergrenze,
+                )
+                self.assertEqual(ergebnis, erwartet)
+        self.assertGreater(erhoeht, FAELLE // 4)
+
+    def test_matrix(self):
+        """Alle Spalten einer Matrix ergeben dieselbe Gesamtsitzzahl wie einzeln schrittweise erhöht"""
+        rng = random.Random(7)
+        for _ in range(FAELLE // 30):
+            spalten = [zufaellige_oberverteilung(rng) for _ in range(10)]
+            ueberhang, obergrenze = spalten[0][3:]
+            parteien = max(len(spalte[0]) for spalte in spalten)
+            stimmen, mindestsitze = (
+                np.array(
+                    [
+                        spalte[teil] + [0] * (parteien - len(spalte[teil]))
+                        for spalte in spalten
+                    ]
+                ).T
+                for teil in (0, 1)
+            )
+            gesamtsitze = np.array([spalte[2] for spalte in spalten])
+            ergebnis, _ = gesamtsitze_matrix(
+                stimmen, mindestsitze, gesamtsitze, ueberhang, obergrenze
+            )
+            self.assertEqual(
+                ergebnis.tolist(),
+                [
+                    gesamtsitze_bisher(
+                        spalte[0], spalte[1], spalte[2], ueberhang, obergrenze
+                    )
+                    for spalte in spalten
+                ],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Prüft die Besetzung der Sitze an einer teilweise ausgezählten Wahl und die Listenplätze im Beispiel vb/9"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from sitzverteilung import kandidaten
+from tests.teilauszaehlung import OFFEN, erwartete_sitze, erzeuge_teilauszaehlung
+
+VB = Path(__file__).resolve().parent.parent / "beispiele" / "vb" / "9"
+
+
+class TestKandidaten(unittest.TestCase):
+    """Abgeordnete und Wahlchancen, wenn Länder noch keine Stimmen gemeldet haben"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.wurzel = Path(tempfile.mkdtemp())
+        cls.pfade = {}
+        for erststimmen in (False, True):
+            cls.pfade[erststimmen] = cls.wurzel / f"erststimmen_{erststimmen}"
+            erzeuge_teilauszaehlung(cls.pfade[erststimmen], OFFEN, erststimmen)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.wurzel)
+
+    def test_abgeordnete(self):
+        """Alle Sitze sind besetzt, offene Länder haben nur die Sieger ihrer Wahlkreise"""
+        for erststimmen, pfad in self.pfade.items():
+            with self.subTest(erststimmen=erststimmen):
+                tabelle = kandidaten.abgeordnete(pfad, seed=1)
+                sitze, gesamtsitze = erwartete_sitze(pfad)
+                self.assertEqual(tabelle.groupby("Partei").size().to_dict(), sitze)
+                self.assertEqual(len(tabelle), gesamtsitze)
+                self.assertNotIn("unbesetzt", tabelle["Mandat"].tolist())
+                offen = tabelle[tabelle["Land"].isin(OFFEN)]
+                self.assertEqual(
+                    set(offen["Mandat"]), set() if erststimmen else {"Wahlkreis"}
+                )
+
+    def test_wahlchancen(self):
+        """Bewerber offener Länder werden in keinem Szenario über die Liste gewählt"""
+        chancen = kandidaten.wahlchancen(self.pfade[False], anzahl=50, seed=1)
+        offen = chancen[chancen["Land"].isin(OFFEN)]
+        self.assertTrue((offen["Gewählt"] == offen["Direktmandat"]).all())
+        self.assertGreater(offen["Direktmandat"].sum(), 0)
+
+
+class TestListenplatz(unittest.TestCase):
+    """Listenplätze der Abgeordneten im Beispiel vb/9"""
+
+    def test_sieger_ohne_listenplatz(self):
+        """Ein Wahlkreissieger, der auf keiner Liste steht, hat keinen Listenplatz statt Platz 0"""
+        tabelle = kandidaten.abgeordnete(VB, seed=1).set_index("Name")
+        self.assertIs(tabelle.loc["Caroline Kaiser", "Listenplatz"], pd.NA)
+        self.assertEqual(tabelle.loc["Caroline Kaiser", "Mandat"], "Wahlkreis")
+        self.assertEqual(tabelle.loc["Alex Regenborn", "Listenplatz"], 1)
+        self.assertFalse((tabelle["Listenplatz"] == 0).any())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Prüft den Aufruf sitzverteilungsrechner.py --kompakt an einer teilweise ausgezählten Wahl"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.teilauszaehlung import OFFEN, erwartete_sitze, erzeuge_teilauszaehlung
+
+SKRIPT = Path(__file__).resolve().parent.parent / "sitzverteilungsrechner.py"
+
+
+def kompakt(pfad: Path) -> tuple:
+    """
+    Führe --kompakt im Verzeichnis der Wahl aus und lies die ausgegebenen Sitze
+
+        :param pfad: Verzeichnispfad
+        :return: Partei → Sitze, Gesamtsitze
+    """
+    ausgabe = subprocess.run(
+        [sys.executable, str(SKRIPT), "--kompakt", "-l", "zufall:1"],
+        cwd=pfad,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    sitze = {}
+    for zeile in ausgabe[2:-1]:
+        partei, anzahl = zeile.rsplit(None, 1)
+        sitze[partei] = int(anzahl)
+    return sitze, int(ausgabe[-1].rsplit(None, 1)[1])
+
+
+class TestKompakt(unittest.TestCase):
+    """--kompakt liefert dieselben Sitze wie sitzverteilung()"""
+
+    def test_teilauszaehlung(self):
+        """Länder ohne gemeldete Stimmen, mit und ohne ihre Erststimmen"""
+        wurzel = Path(tempfile.mkdtemp())
+        try:
+            for erststimmen in (False, True):
+                with self.subTest(erststimmen=erststimmen):
+                    pfad = wurzel / f"erststimmen_{erststimmen}"
+                    erzeuge_teilauszaehlung(pfad, OFFEN, erststimmen)
+                    self.assertEqual(kompakt(pfad), erwartete_sitze(pfad))
+        finally:
+            shutil.rmtree(wurzel)
+
+
+if __name__ == "__main__":
+    unittest.main()
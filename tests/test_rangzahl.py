@@ -0,0 +1,81 @@
+"""Vergleicht das Rangzahlverfahren und die Wahl des Zitierdivisors auf zufälligen Eingaben mit festem Startwert mit
+den ursprünglichen Fassungen"""
+
+import decimal
+import random
+import unittest
+
+import numpy as np
+
+from sitzverteilung.hilfsmittel import nice_round, remove_exponent, rundeste_zahl
+from sitzverteilung.rechner.ganzzahl import bestimme_zitierdivisor
+from sitzverteilung.rechner.sainte_lague import sainte_lague_rangzahl
+from tests.referenz import (
+    als_tabelle,
+    divisorgrenzen_bisher,
+    hoechstzahlverfahren,
+    nice_round_bisher,
+    zitierdivisor_bisher,
+    zufaellige_stimmen,
+)
+
+FAELLE = 1000
+
+
+class TestRangzahl(unittest.TestCase):
+    """sainte_lague_rangzahl, rundeste_zahl und der Zitierdivisor gegen die Referenzverfahren"""
+
+    def test_wie_hoechstzahlverfahren(self):
+        """Sitze und Lostopf stimmen mit der Zuteilung Sitz für Sitz überein, auch bei exakten Gleichständen"""
+        rng = random.Random(3)
+        for _ in range(FAELLE):
+            stimmen, sitze = zufaellige_stimmen(rng), rng.randint(1, 40)
+            sitzzahl, lostopf = hoechstzahlverfahren(stimmen, sitze)
+            with self.subTest(stimmen=stimmen, sitze=sitze):
+                tabelle, lose = sainte_lague_rangzahl(als_tabelle(stimmen), sitze)
+                self.assertEqual(tabelle["Sitze"].to_list(), sitzzahl)
+                self.assertEqual(lose, [f"P{partei}" for partei in lostopf])
+
+    def test_rundeste_zahl(self):
+        """rundeste_zahl und nice_round wählen dieselbe Zahl wie die ursprüngliche Fassung von nice_round"""
+        rng = random.Random(4)
+        for _ in range(10 * FAELLE):
+            sitze = rng.randint(1, 800)
+            stimmen = rng.randint(1, 10 ** rng.randint(1, 8))
+            grenzen = divisorgrenzen_bisher(
+                [stimmen, stimmen + rng.randint(0, stimmen // 10 + 1)], [sitze, sitze]
+            )
+            if grenzen[0] >= grenzen[1]:
+                continue
+            with self.subTest(grenzen=grenzen):
+                erwartet = decimal.Decimal(
+                    nice_round_bisher(*(remove_exponent(grenze) for grenze in grenzen))
+                )
+                self.assertEqual(rundeste_zahl(*grenzen), erwartet)
+                self.assertEqual(decimal.Decimal(nice_round(*grenzen)), erwartet)
+
+    def test_zitierdivisor(self):
+        """Ohne Gleichstand ergibt sich derselbe Zitierdivisor wie bisher, und er erzeugt die Sitze"""
+        rng = random.Random(5)
+        for _ in range(FAELLE):
+            stimmen, sitze = zufaellige_stimmen(rng), rng.randint(1, 40)
+            sitzzahl, lostopf = hoechstzahlverfahren(stimmen, sitze)
+            if lostopf:
+                continue
+            with self.subTest(stimmen=stimmen, sitze=sitze):
+                divisor = bestimme_zitierdivisor(np.array(stimmen), np.array(sitzzahl))
+                self.assertEqual(divisor, zitierdivisor_bisher(stimmen, sitzzahl))
+                with decimal.localcontext(
+                    decimal.Context(rounding=decimal.ROUND_HALF_UP)
+                ):
+                    self.assertEqual(
+                        [
+                            int((decimal.Decimal(partei) / divisor).to_integral_value())
+                            for partei in stimmen
+                        ],
+                        sitzzahl,
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
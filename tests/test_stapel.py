@@ -0,0 +1,59 @@
+"""Prüft, dass ein gescheiterter Auftrag den Stapel nicht abbricht"""
+
+import csv
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from sitzverteilung.stapel import Auftrag, stapeltabelle
+
+VB = Path(__file__).resolve().parent.parent / "beispiele" / "vb" / "9"
+
+
+class TestStapel(unittest.TestCase):
+    """Stapel aus dem Beispiel vb/9 und einer Kopie mit Gleichstand im Wahlkreis Hamburg"""
+
+    def setUp(self):
+        self.ordner = Path(tempfile.mkdtemp())
+        self.gleichstand = self.ordner / "gleichstand"
+        shutil.copytree(VB, self.gleichstand)
+        erststimmen = self.gleichstand / "Erststimme.yaml"
+        erststimmen.write_text(
+            erststimmen.read_text(encoding="utf-8").replace("Lüd: 2", "Lüd: 6", 1),
+            encoding="utf-8",
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.ordner)
+
+    def test_abgelehnter_gleichstand(self):
+        """Der abgelehnte Gleichstand steht in der Spalte Fehler, die übrigen Aufträge werden berechnet"""
+        auftraege = [
+            Auftrag(self.gleichstand, name="gleichstand"),
+            Auftrag(VB, name="vb"),
+            Auftrag(VB, {"Mindestsitze": "Pur"}, name="pur"),
+        ]
+        tabelle = stapeltabelle(
+            auftraege, arbeiter=1, blockgroesse=3, ausgabe=self.ordner / "stapel.csv"
+        )
+
+        self.assertEqual(list(tabelle.index), ["gleichstand", "vb", "pur"])
+        self.assertTrue(tabelle.loc["gleichstand", "Fehler"].startswith("Gleichstand"))
+        self.assertTrue(tabelle.drop(columns="Fehler").loc["gleichstand"].isna().all())
+        self.assertTrue(tabelle.loc[["vb", "pur"], "Fehler"].isna().all())
+        self.assertEqual(tabelle.loc["vb", "Gesamt"], 15)
+
+        with open(self.ordner / "stapel.csv", encoding="utf-8", newline="") as datei:
+            zeilen = list(csv.reader(datei, delimiter=";"))
+        self.assertEqual(zeilen[0], ["Auftrag", "Partei", "Sitze", "Fehler"])
+        self.assertEqual(
+            {zeile[0] for zeile in zeilen[1:]}, {"gleichstand", "vb", "pur"}
+        )
+        fehlerzeilen = [zeile for zeile in zeilen if zeile[0] == "gleichstand"]
+        self.assertEqual(len(fehlerzeilen), 1)
+        self.assertEqual(fehlerzeilen[0][3], tabelle.loc["gleichstand", "Fehler"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Prüft die Array-Pfade an einer teilweise ausgezählten Wahl, sie müssen dieselben Sitze liefern wie
+sitzverteilung()"""
+
+import shutil
+import tempfile
+import unittest
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from sitzverteilung import simulation
+from sitzverteilung.sitzverteilung import setze_einstellungen
+from sitzverteilung.wahldaten import lade_wahldaten
+from tests.teilauszaehlung import (
+    OFFEN,
+    erwartete_sitze,
+    erzeuge_teilauszaehlung,
+    sitze_je_partei,
+)
+
+
+class TestTeilauszaehlung(unittest.TestCase):
+    """Teilweise ausgezählte Wahl, einmal mit und einmal ohne Erststimmen der offenen Länder"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ordner = Path(tempfile.mkdtemp())
+        cls.pfade = {}
+        for erststimmen in (False, True):
+            cls.pfade[erststimmen] = cls.ordner / f"erststimmen_{erststimmen}"
+            erzeuge_teilauszaehlung(cls.pfade[erststimmen], OFFEN, erststimmen)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.ordner)
+
+    def test_arrays_wie_sitzverteilung(self):
+        """berechne_sitze liefert dieselben Sitze wie sitzverteilung()"""
+        for erststimmen, pfad in self.pfade.items():
+            with self.subTest(erststimmen=erststimmen):
+                arrays = simulation.berechne_sitze(pfad, seed=1)
+                self.assertEqual(
+                    (
+                        sitze_je_partei(arrays.parteien, arrays.sitze[0]),
+                        int(arrays.gesamtsitze[0]),
+                    ),
+                    erwartete_sitze(pfad),
+                )
+
+    def test_simulation(self):
+        """Szenarien ohne Streuung entsprechen sitzverteilung(), gestreute Szenarien lassen offene Länder bei null"""
+        pfad = self.pfade[True]
+        unveraendert = simulation.simuliere(
+            str(pfad),
+            anzahl=3,
+            konzentration=None,
+            konzentration_erststimmen=None,
+            seed=1,
+        )
+        for szenario in range(3):
+            self.assertEqual(
+                (
+                    sitze_je_partei(
+                        unveraendert.parteien, unveraendert.sitze[szenario]
+                    ),
+                    int(unveraendert.gesamtsitze[szenario]),
+                ),
+                erwartete_sitze(pfad),
+            )
+
+        gestreut = simulation.simuliere(pfad, anzahl=200, seed=1, blockgroesse=64)
+        self.assertEqual(gestreut.sitze.shape[0], 200)
+        self.assertTrue((gestreut.sitze.sum(axis=1) <= gestreut.gesamtsitze).all())
+
+    def test_nullspalten_einzelner_szenarien(self):
+        """Ein Land ohne Zweitstimmen nur in einzelnen gezogenen Szenarien"""
+        daten = lade_wahldaten(self.pfade[False])
+        rng = np.random.default_rng(1)
+        zweitstimmen, erststimmen = next(
+            simulation.ziehe_szenarien(daten, 4, (2000, 500), rng)
+        )
+        offen = np.isin(daten.laender, OFFEN)
+        self.assertFalse(zweitstimmen[:, :, offen].any())
+        zweitstimmen = zweitstimmen.copy()
+        zweitstimmen[1, :, np.flatnonzero(daten.laender == "Hamburg")] = 0
+        ergebnis = simulation.berechne_szenarien(
+            daten,
+            setze_einstellungen(self.pfade[False]),
+            zweitstimmen,
+            erststimmen,
+            rng,
+        )
+        self.assertEqual(ergebnis.sitze.shape[0], 4)
+
+    def test_szenario_ohne_zweitstimmen(self):
+        """Ein Szenario ganz ohne Zweitstimmen lässt keine Partei über die Prozenthürde zu, ohne Division durch null"""
+        daten = lade_wahldaten(self.pfade[False])
+        zweitstimmen = np.stack([daten.zweitstimmen, np.zeros_like(daten.zweitstimmen)])
+        einstellungen = setze_einstellungen(self.pfade[False])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            zugelassen, mehrheitssieger = simulation.ermittle_zulassung(
+                {"Prozent": einstellungen["hürde"]["Prozent"]},
+                daten.parteien,
+                zweitstimmen,
+                np.zeros_like(zweitstimmen),
+            )
+        self.assertTrue(zugelassen[0].any())
+        self.assertFalse(zugelassen[1].any())
+        self.assertEqual(mehrheitssieger[1], -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Vergleicht die fünf Zuteilungsverfahren auf zufälligen Stimmen mit festem Startwert: die vektorisierte Verteilung
+mit der einzelnen und die einzelne mit den exakten Referenzverfahren"""
+
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sitzverteilung.rechner.ganzzahl import verteilungsmatrix, zuteilung_ganzzahl
+from sitzverteilung.rechner.verfahren import VERFAHREN
+from tests.referenz import (
+    als_tabelle,
+    hare_niemeyer,
+    hoechstzahlverfahren,
+    rangzahl_adams,
+    rangzahl_d_hondt,
+    rangzahl_huntington_hill,
+    rangzahl_sainte_lague,
+    zufaellige_stimmen,
+)
+
+FAELLE = 250
+
+# Verfahrensname → Referenz (stimmen, sitze) -> (Sitze je Partei, Nummern der Parteien im Lostopf)
+REFERENZEN = {
+    "Sainte-Laguë": lambda stimmen, sitze: hoechstzahlverfahren(
+        stimmen, sitze, rangzahl_sainte_lague
+    ),
+    "D'Hondt": lambda stimmen, sitze: hoechstzahlverfahren(
+        stimmen, sitze, rangzahl_d_hondt
+    ),
+    "Hare-Niemeyer": hare_niemeyer,
+    "Adams": lambda stimmen, sitze: hoechstzahlverfahren(
+        stimmen, sitze, rangzahl_adams
+    ),
+    "Huntington-Hill": lambda stimmen, sitze: hoechstzahlverfahren(
+        stimmen, sitze, rangzahl_huntington_hill
+    ),
+}
+
+
+def zufaellige_matrix(rng: random.Random, spalten: int) -> pd.DataFrame:
+    """
+    Stimmen mehrerer Verteilungen, einzelne Parteien haben in manchen Spalten keine Stimmen
+
+        :param rng: Zufallsgenerator
+        :param spalten: Anzahl der Verteilungen
+        :return: Tabelle Partei × Verteilung
+    """
+    parteien = rng.randint(1, 7)
+    werte = np.zeros((parteien, spalten), dtype="int64")
+    for spalte in range(spalten):
+        stimmen = zufaellige_stimmen(rng, parteien)
+        werte[rng.sample(range(parteien), len(stimmen)), spalte] = stimmen
+    return pd.DataFrame(
+        werte,
+        index=[f"P{partei}" for partei in range(parteien)],
+        columns=[f"V{spalte}" for spalte in range(spalten)],
+    )
+
+
+class TestVerfahren(unittest.TestCase):
+    """zuteilung_ganzzahl und verteilungsmatrix für Sainte-Laguë, D'Hondt, Hare-Niemeyer, Adams und Huntington-Hill"""
+
+    def test_wie_referenz(self):
+        """Sitze und Lostopf stimmen mit der Referenz überein, auch bei exakten Gleichständen"""
+        self.assertEqual(REFERENZEN.keys(), VERFAHREN.keys())
+        rng = random.Random(8)
+        for name, regel in VERFAHREN.items():
+            for _ in range(FAELLE):
+                stimmen, sitze = zufaellige_stimmen(rng), rng.randint(1, 40)
+                sitzzahl, lostopf = REFERENZEN[name](stimmen, sitze)
+                with self.subTest(verfahren=name, stimmen=stimmen, sitze=sitze):
+                    tabelle, lose = zuteilung_ganzzahl(
+                        als_tabelle(stimmen), sitze, regel
+                    )
+                    self.assertEqual(tabelle["Sitze"].to_list(), sitzzahl)
+                    self.assertEqual(lose, [f"P{partei}" for partei in lostopf])
+
+    def test_matrix_wie_einzeln(self):
+        """Jede Spalte der vektorisierten Verteilung gleicht der einzelnen Verteilung samt Losen und Zitierdivisor"""
+        rng = random.Random(9)
+        for name, regel in VERFAHREN.items():
+            for _ in range(FAELLE // 20):
+                stimmen = zufaellige_matrix(rng, 20)
+                sitze = np.array([rng.randint(1, 40) for _ in stimmen.columns])
+                matrix, lose = verteilungsmatrix(stimmen, sitze, regel)
+                for position, spalte in enumerate(stimmen.columns):
+                    with self.subTest(
+                        verfahren=name, stimmen=stimmen[spalte].to_list()
+                    ):
+                        tabelle, einzeln = zuteilung_ganzzahl(
+                            stimmen[[spalte]].set_axis(["Stimmen"], axis=1),
+                            sitze[position],
+                            regel,
+                        )
+                        self.assertEqual(
+                            matrix[spalte].to_list(), tabelle["Sitze"].to_list()
+                        )
+                        self.assertEqual(lose.get(spalte, []), einzeln)
+                        self.assertEqual(
+                            str(matrix.attrs["Zitierdivisor"][spalte]),
+                            str(tabelle.attrs["Zitierdivisor"]),
+                        )
+
+
+if __name__ == "__main__":
+    unittest.main()